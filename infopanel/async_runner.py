@@ -0,0 +1,227 @@
+"""
+Optional asyncio runtime for the driver.
+
+Instead of a blocking frame loop plus paho's network thread, everything runs as
+tasks and timers on one event loop:
+
+* frames are drawn by a task that sleeps between frames for as long as the
+  scene allows, waking early for MQTT messages,
+* scene changes are timers set for when the current scene's duration ends,
+* MQTT sockets are watched by the loop and read only when data arrives, and
+  a dropped connection is retried with backoff like paho's own network thread,
+* sprites that fetch slow data are refreshed by the driver's
+  :py:class:`~infopanel.fetcher.BackgroundFetcher`, polled from the loop
+  and waking it when a fetch finishes.
+
+A blank panel suspends its display and sleeps until a command or timer wakes it.
+
+Use it with ``python -m infopanel --asyncio``.
+"""
+
+import asyncio
+import logging
+
+import paho.mqtt.client as paho
+
+from infopanel import driver, scenes
+
+LOG = logging.getLogger(__name__)
+
+# Longest time a blank panel sleeps before checking for commands anyway, in case
+# data arrives from a thread the loop doesn't know about.
+MAX_IDLE_S = 1.0
+# Seconds between attempts to reconnect to MQTT, doubling up to the max.
+RECONNECT_MIN_S = 1.0
+RECONNECT_MAX_S = 120.0
+
+
+class AsyncRunner(object):
+    """Run a driver (and optionally its MQTT client) on an asyncio event loop."""
+
+    def __init__(self, infopanel, client=None):
+        """Construct a runner for a driver and an unstarted MQTTClient."""
+        self.driver = infopanel
+        self.client = client
+        self._loop = None
+        self._wake = None
+        self._stopping = None
+        self._scene_timer = None
+        self._tasks = []
+        self._sockets = None
+
+    async def run(self):
+        """Run until :py:meth:`stop` is called."""
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._stopping = asyncio.Event()
+        if self.client is not None:
+            self._sockets = _MQTTSockets(self._loop, self._wake, self.driver)
+            self.client.connect(prepare=self._sockets.attach)
+        self.driver.fetcher.on_done = self._wake_threadsafe
+        self._tasks.append(self._loop.create_task(self._frames()))
+        self._schedule_scene_change()
+        try:
+            await self._stopping.wait()
+        finally:
+            self.driver.fetcher.on_done = None
+            if self._scene_timer is not None:
+                self._scene_timer.cancel()
+            for task in self._tasks:
+                task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+            if self.client is not None:
+                self._sockets.close()
+                self.client.disconnect()
+
+    def stop(self):
+        """Stop running. Safe to call from any thread."""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._stopping.set)
+
+    def _wake_threadsafe(self):
+        """Wake the frame loop from another thread."""
+        try:
+            self._loop.call_soon_threadsafe(self._wake.set)
+        except RuntimeError:
+            pass  # the loop closed while a fetch was finishing.
+
+    def _schedule_scene_change(self):
+        """(Re)start the timer for the end of the active scene."""
+        if self._scene_timer is not None:
+            self._scene_timer.cancel()
+        self._scene_timer = self._loop.call_later(
+            self.driver.interval, self._change_scene
+        )
+
+    def _change_scene(self):
+        self.driver._change_scene()  # pylint: disable=protected-access
+        self._schedule_scene_change()
+        self._wake.set()
+
+    async def _frames(self):
+        """Draw frames as often as the scene needs and handle commands between them."""
+        drv = self.driver
+        suspended = False
+        while True:
+            scene = drv.active_scene
+            frame_start = self._loop.time()
+            self._wake.clear()
+            drv.fetcher.poll()
+            if isinstance(scene, scenes.Blank):
+                if not suspended:
+                    drv.display.suspend()
+                    suspended = True
+                await self._idle(MAX_IDLE_S)
+            else:
+                if suspended:
+                    drv.display.resume()
+                    suspended = False
+                drv.draw_frame()
+                await asyncio.sleep(driver.FRAME_DELAY_S)
+                await self._idle(frame_start + drv.frame_period - self._loop.time())
+            drv._check_schedule()  # pylint: disable=protected-access
+            drv._check_for_command()  # pylint: disable=protected-access
+            if drv.active_scene is not scene:
+                # a command changed the scene, so its duration starts now.
+                self._schedule_scene_change()
+
+    async def _idle(self, timeout):
+        """Sleep until something wakes us up or the timeout passes."""
+        if timeout <= 0:
+            return
+        try:
+            await asyncio.wait_for(self._wake.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+
+class _MQTTSockets(object):
+    """Service a paho client's socket from the event loop instead of a thread."""
+
+    def __init__(self, loop, wake, infopanel):
+        self._loop = loop
+        self._wake = wake
+        self._driver = infopanel
+        self._client = None
+        self._misc = None
+        self._reconnecting = None
+        self._closed = False
+
+    def attach(self, client):
+        """Attach to a paho client before it connects."""
+        self._client = client
+        client.on_socket_open = self._on_socket_open
+        client.on_socket_close = self._on_socket_close
+        client.on_socket_register_write = self._on_socket_register_write
+        client.on_socket_unregister_write = self._on_socket_unregister_write
+        on_message = client.on_message
+
+        def on_message_and_wake(*args):
+            datasrc = self._driver.data_source
+            version = datasrc.latest_version()
+            on_message(*args)
+            # only wake for data that the active scene shows, or commands.
+            if datasrc.changed_since(version, self._driver.wake_keys):
+                self._wake.set()
+
+        client.on_message = on_message_and_wake
+
+    def close(self):
+        """Stop housekeeping and reconnecting, before disconnecting on purpose."""
+        self._closed = True
+        for task in (self._misc, self._reconnecting):
+            if task is not None:
+                task.cancel()
+
+    def _on_socket_open(self, client, userdata, sock):  # pylint: disable=unused-argument
+        self._loop.add_reader(sock, client.loop_read)
+        if self._misc is None or self._misc.done():
+            self._misc = self._loop.create_task(self._misc_loop())
+
+    def _on_socket_close(self, client, userdata, sock):  # pylint: disable=unused-argument
+        self._loop.remove_reader(sock)
+        self._loop.remove_writer(sock)
+        if self._misc is not None:
+            self._misc.cancel()
+        self._start_reconnecting()
+
+    def _start_reconnecting(self):
+        if self._closed:
+            return
+        if self._reconnecting is None or self._reconnecting.done():
+            self._reconnecting = self._loop.create_task(self._reconnect())
+
+    def _on_socket_register_write(
+        self, client, userdata, sock
+    ):  # pylint: disable=unused-argument
+        self._loop.add_writer(sock, client.loop_write)
+
+    def _on_socket_unregister_write(
+        self, client, userdata, sock
+    ):  # pylint: disable=unused-argument
+        self._loop.remove_writer(sock)
+
+    async def _misc_loop(self):
+        """Do paho's keepalive and retry bookkeeping once a second."""
+        while self._client.loop_misc() == paho.MQTT_ERR_SUCCESS:
+            await asyncio.sleep(1.0)
+        self._start_reconnecting()
+
+    async def _reconnect(self):
+        """Reconnect until it works, waiting longer after each failure."""
+        delay = RECONNECT_MIN_S
+        while True:
+            LOG.warning("MQTT connection lost. Reconnecting in %.1f s", delay)
+            await asyncio.sleep(delay)
+            try:
+                if self._client.reconnect() == paho.MQTT_ERR_SUCCESS:
+                    LOG.info("Reconnected to MQTT")
+                    return
+            except (OSError, ValueError) as error:
+                LOG.warning("Could not reconnect to MQTT: %s", error)
+            delay = min(2 * delay, RECONNECT_MAX_S)
+
+
+def run(infopanel, client=None):
+    """Run a driver on a new event loop until interrupted."""
+    asyncio.run(AsyncRunner(infopanel, client).run())
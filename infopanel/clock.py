@@ -0,0 +1,128 @@
+"""
+Time source for animation and frame pacing.
+
+Everything that measures elapsed time for drawing goes through :py:func:`now`,
+and the driver waits between frames through :py:func:`sleep` and
+:py:func:`wait_for_change`, so that the clock can be swapped out (e.g. frozen
+in tests, or a :py:class:`SimulatedClock` to fast-forward through hours of
+scene changes; see :py:mod:`infopanel.simulation`). Timestamps of data, like
+when a value goes stale or its history, come from :py:func:`wall_time`.
+"""
+
+import heapq
+import itertools
+import time
+
+
+class Clock(object):
+    """The real, monotonic clock."""
+
+    def now(self):  # pylint: disable=no-self-use
+        """Get seconds from some fixed point in the past."""
+        return time.monotonic()
+
+    def wall_time(self):  # pylint: disable=no-self-use
+        """Get seconds since the epoch, for timestamps."""
+        return time.time()
+
+    def sleep(self, seconds):  # pylint: disable=no-self-use
+        """Wait for some seconds."""
+        time.sleep(seconds)
+
+    def wait_for_change(
+        self, data_source, version, timeout=None, cancelled=None, keys=None
+    ):  # pylint: disable=no-self-use, too-many-arguments
+        """Wait for new data. See :py:meth:`infopanel.data.InputData.wait_for_change`."""
+        return data_source.wait_for_change(version, timeout, cancelled, keys)
+
+
+class SimulatedClock(Clock):
+    """
+    A clock that jumps ahead whenever something waits on it.
+
+    Nothing ever really sleeps, so hours of panel time pass as fast as frames
+    can be drawn. Callbacks scheduled with :py:meth:`at` run when the clock
+    passes their time, e.g. to send commands as if they came over MQTT.
+    """
+
+    def __init__(self, start=0.0, wall_start=None):
+        """
+        Construct a clock starting at ``start`` seconds.
+
+        Its wall time starts at ``wall_start`` seconds since the epoch, or now.
+        """
+        self.time = start
+        self._wall_offset = (time.time() if wall_start is None else wall_start) - start
+        self._events = []  # heap of (time, order, callback)
+        self._order = itertools.count()
+
+    def now(self):
+        """Get the simulated time."""
+        return self.time
+
+    def wall_time(self):
+        """Get the simulated seconds since the epoch."""
+        return self._wall_offset + self.time
+
+    def at(self, when, callback):
+        """Call ``callback()`` once the clock reaches ``when``."""
+        heapq.heappush(self._events, (when, next(self._order), callback))
+
+    def sleep(self, seconds):
+        """Jump ahead, running whatever is scheduled on the way."""
+        self._advance(self.time + seconds)
+
+    def wait_for_change(
+        self, data_source, version, timeout=None, cancelled=None, keys=None
+    ):  # pylint: disable=too-many-arguments
+        """Jump ahead until a scheduled callback sets data or the timeout passes."""
+        deadline = float("inf") if timeout is None else self.time + timeout
+        while True:
+            if data_source.changed_since(version, keys) or (cancelled and cancelled()):
+                return True
+            if not self._events or self._events[0][0] > deadline:
+                if deadline == float("inf"):
+                    return False  # nothing will ever happen.
+                self.time = deadline
+                return False
+            self._run_next()
+
+    def _advance(self, target):
+        while self._events and self._events[0][0] <= target:
+            self._run_next()
+        self.time = max(self.time, target)
+
+    def _run_next(self):
+        when, _order, callback = heapq.heappop(self._events)
+        self.time = max(self.time, when)
+        callback()
+
+
+CLOCK = Clock()
+
+
+def now():
+    """Get the current time of the active clock."""
+    return CLOCK.now()
+
+
+def wall_time():
+    """Get the current seconds since the epoch of the active clock."""
+    return CLOCK.wall_time()
+
+
+def sleep(seconds):
+    """Wait for some seconds on the active clock."""
+    CLOCK.sleep(seconds)
+
+
+def wait_for_change(data_source, version, timeout=None, cancelled=None, keys=None):
+    """Wait on the active clock for data (of ``keys``) newer than ``version``."""
+    return CLOCK.wait_for_change(data_source, version, timeout, cancelled, keys)
+
+
+def set_clock(clock):
+    """Make a different clock active and return the one it replaced."""
+    global CLOCK  # pylint: disable=global-statement
+    previous, CLOCK = CLOCK, clock
+    return previous
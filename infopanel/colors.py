@@ -1,6 +1,8 @@
 """Colors."""
 
+import matplotlib
 import matplotlib.colors as mcolor
+import numpy
 
 # make a custom colormap that goes from pure green to pure red.
 GREEN_RED = mcolor.LinearSegmentedColormap(
@@ -27,3 +29,18 @@ def interpolate_color(current, minv=0.0, maxv=1.0, cmap=None):
     val = (current - minv) * 255 / (maxv - minv)
     r, g, b, _a = cmap(val / 255.0)
     return [int(x * 255) for x in (r, g, b)]
+
+
+def colormap(name):
+    """Get a colormap by name: ``green_red`` or any matplotlib colormap."""
+    if name == GREEN_RED.name:
+        return GREEN_RED
+    return matplotlib.colormaps[name]
+
+
+def interpolate_colors(values, minv=0.0, maxv=1.0, cmap=None):
+    """Get an array of colors from a colormap for an array of values at once."""
+    if cmap is None:
+        cmap = GREEN_RED
+    rgba = cmap((numpy.asarray(values, dtype=float) - minv) / (maxv - minv))
+    return (rgba[..., :3] * 255).astype(int)
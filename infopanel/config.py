@@ -1,7 +1,5 @@
 """Configuration file stuff."""
 
-import inspect
-
 import yaml
 
 try:
@@ -10,11 +8,50 @@ except ImportError:
     from yaml import Loader
 import voluptuous as vol
 
-from infopanel import sprites, scenes
+from infopanel import data, registry, schedule
+
+
+def registered_type(types):
+    """Validate that a type name is known to a registry without importing it."""
+
+    def validator(name):
+        if name not in types:
+            raise vol.Invalid(
+                "Unknown type {}. Known types: {}".format(name, ", ".join(types.names()))
+            )
+        return name
+
+    return validator
+
+
+def time_of_day(text):
+    """Validate a time of day like ``07:30``."""
+    try:
+        schedule.parse_time(text)
+    except ValueError as error:
+        raise vol.Invalid(str(error))
+    return text
+
+
+def topic_or_routes(conf):
+    """Validate that MQTT config says what to subscribe to."""
+    if not conf.get("topic") and not conf.get("routes"):
+        raise vol.Invalid("MQTT needs a topic or some routes to subscribe to")
+    return conf
 
-SPRITE_NAMES = [name for name, value in inspect.getmembers(sprites, inspect.isclass)]
 
-MQTT = vol.Schema(
+ROUTE = vol.Schema(
+    {
+        "topic": str,
+        vol.Optional("key"): str,
+        vol.Optional("parser", default="string"): vol.Any(
+            "string", "number", "json", "batch"
+        ),
+        vol.Optional("path"): str,
+    }
+)
+
+MQTT = vol.All(
     {
         "broker": str,
         vol.Optional("port", default=1883): int,
@@ -23,22 +60,24 @@ MQTT = vol.Schema(
         vol.Optional("username"): str,
         vol.Optional("password"): str,
         vol.Optional("certificate"): str,
-        "topic": str,
-    }
+        vol.Optional("topic"): str,
+        vol.Optional("routes", default=[]): [ROUTE],
+    },
+    topic_or_routes,
 )
 
-SPRITE = vol.Schema({"type": vol.Any(*SPRITE_NAMES)}, extra=vol.ALLOW_EXTRA)
+SPRITE = vol.Schema({"type": registered_type(registry.SPRITES)}, extra=vol.ALLOW_EXTRA)
 SPRITES = vol.Schema({str: SPRITE})
 
-SCENE_NAMES = [name for name, value in inspect.getmembers(scenes, inspect.isclass)]
 # sprite list in scenes is a list because you may want multiple of one
 # sprite in a scene.
 SCENES = vol.Schema(
     {
         str: {
-            vol.Optional("type", default="Scene"): vol.Any(*SCENE_NAMES),
+            vol.Optional("type", default="Scene"): registered_type(registry.SCENES),
             vol.Optional("path"): str,
             vol.Optional("sprites"): list,
+            vol.Optional("frame_rate"): vol.All(vol.Coerce(float), vol.Range(min=0.1)),
         }
     },
     extra=vol.ALLOW_EXTRA,
@@ -64,6 +103,55 @@ RGBMATRIX = vol.Schema(
     }
 )
 
+DATA_KEY = vol.Schema(
+    {
+        vol.Optional("type"): vol.Any("str", "int", "float"),
+        vol.Optional("ttl"): vol.Coerce(float),
+    }
+)
+
+DATA = vol.Schema(
+    {
+        vol.Optional("max_keys", default=data.DEFAULT_MAX_KEYS): vol.All(
+            int, vol.Range(min=1)
+        ),
+        vol.Optional("ttl"): vol.Coerce(float),
+        vol.Optional("keys", default={}): {str: DATA_KEY},
+    }
+)
+
+HISTORY = vol.Schema(
+    {
+        "keys": [str],
+        vol.Optional("raw_samples", default=600): vol.All(int, vol.Range(min=1)),
+        vol.Optional("minutes", default=1440): vol.All(int, vol.Range(min=1)),
+        vol.Optional("hours", default=720): vol.All(int, vol.Range(min=1)),
+        vol.Optional("path"): str,
+        vol.Optional("save_minutes", default=10.0): vol.All(
+            vol.Coerce(float), vol.Range(min=0.1)
+        ),
+    }
+)
+
+SCHEDULE = vol.Schema(
+    [
+        {
+            "start": vol.All(str, time_of_day),
+            "end": vol.All(str, time_of_day),
+            "mode": str,
+            vol.Optional("brightness"): vol.All(int, vol.Range(min=0, max=100)),
+        }
+    ]
+)
+
+ARRAYMATRIX = vol.Schema(
+    {vol.Optional("width", default=64): int, vol.Optional("height", default=32): int}
+)
+
+RECORDING = ARRAYMATRIX.extend(
+    {"path": str, vol.Optional("format", default="raw"): vol.In(["raw", "png"])}
+)
+
 GLOBAL = vol.Schema({"font_dir": str, "default_mode": str, "random": bool})
 
 SCHEMA = vol.Schema(
@@ -72,8 +160,13 @@ SCHEMA = vol.Schema(
         "sprites": SPRITES,
         "scenes": SCENES,
         "modes": MODES,
+        vol.Optional("data"): DATA,
+        vol.Optional("history"): HISTORY,
+        vol.Optional("schedule"): SCHEDULE,
         vol.Optional("RGBMatrix"): RGBMATRIX,
         vol.Optional("DummyMatrix"): None,
+        vol.Optional("ArrayMatrix"): vol.Any(None, ARRAYMATRIX),
+        vol.Optional("Recording"): RECORDING,
         "global": GLOBAL,
     }
 )
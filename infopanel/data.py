@@ -1,17 +1,382 @@
 """Input data that might come over MQTT or whatever."""
 
 import collections
+import collections.abc
+import itertools
+import logging
+import threading
+
+import numpy
+
+from infopanel import clock
+
+LOG = logging.getLogger(__name__)
+
+# Keys the driver uses for commands. These are never evicted and never go stale.
+CONTROL_KEYS = ("power", "mode", "brightness", "image_path", "random")
+
+TYPES = {"str": str, "int": int, "float": float}
+
+DEFAULT_MAX_KEYS = 256
 
 
 class InputData(collections.defaultdict):
-    """Container for all the live data."""
+    """
+    Container for all the live data.
+
+    Every key has a version number that goes up whenever the key is set, so
+    consumers can cheaply tell whether anything changed since they last looked
+    instead of re-reading and re-parsing values every frame. Callbacks can also
+    subscribe to a key to be told about new values as they arrive.
+
+    Writers may be on other threads (e.g. MQTT). Readers that need several
+    values to be consistent with each other, like a frame being drawn, should
+    read from a :py:meth:`snapshot` instead of the live data. :py:meth:`update`
+    sets many values as one change.
 
-    def __init__(self):
+    Parameters
+    ----------
+    max_keys : int, optional
+        Most data keys to hold. When a new key would go over, the key that was
+        updated longest ago is forgotten. Control keys are never forgotten.
+    ttl : float, optional
+        Seconds after its last update that a value is considered stale.
+    key_types : dict, optional
+        Data key to type name (``str``, ``int``, ``float``). Values of these keys
+        are converted once when they arrive rather than by every reader.
+    key_ttls : dict, optional
+        Data key to a ttl that overrides the default ``ttl``.
+    """
+
+    def __init__(self, max_keys=None, ttl=None, key_types=None, key_ttls=None):
         """Construct default data."""
         collections.defaultdict.__init__(self)
         self.default_factory = lambda: 0
+        self.max_keys = max_keys
+        self.ttl = ttl
+        self._types = {key: TYPES[name] for key, name in (key_types or {}).items()}
+        self._ttls = dict(key_ttls or {})
+        self._counter = itertools.count(1)
+        self._versions = {}
+        self._updated = collections.OrderedDict()  # key: time, oldest first
+        self._expires = {}
+        self._subscribers = collections.defaultdict(list)
+        self._samples = {}
+        self.history = None  # see infopanel.history
+        self.lock = threading.RLock()
+        self._changed = threading.Condition(self.lock)
+        self._latest_version = 0
+        self._snapshot = None
+        self.frame = None
         self["power"] = "1"
         self["mode"] = "all"
         self["brightness"] = 100
         self["image_path"] = ""
         self["random"] = "0"
+
+    def __missing__(self, key):
+        """Read an unset key as 0, without storing it as if it had been set."""
+        return self.default_factory()
+
+    def __setitem__(self, key, value):
+        """Set a value, notifying anything waiting on or subscribed to it."""
+        with self.lock:
+            calls = self._set(key, value)
+        self._notify(calls)
+
+    def update(self, *args, **kwargs):  # pylint: disable=arguments-differ
+        """Set many values at once, as one change."""
+        calls = []
+        with self.lock:
+            for key, value in dict(*args, **kwargs).items():
+                calls.extend(self._set(key, value))
+        self._notify(calls)
+
+    def _set(self, key, value):
+        """
+        Store a value and do the bookkeeping. Call with the lock held.
+
+        Returns the subscriber calls to make once the lock is released, so slow
+        subscribers (like saving history) don't hold up other threads.
+        """
+        value = self._convert(key, value)
+        now = clock.wall_time()
+        collections.defaultdict.__setitem__(self, key, value)
+        self._versions[key] = self._latest_version = next(self._counter)
+        self._changed.notify_all()
+        self._updated.pop(key, None)
+        self._updated[key] = now
+        ttl = self._ttls.get(key, self.ttl)
+        if ttl is not None and key not in CONTROL_KEYS:
+            self._expires[key] = now + ttl
+        if self.max_keys is not None:
+            while self._data_key_count() > self.max_keys and self._evict_oldest(key):
+                pass
+        samples = self._samples.get(key)
+        if samples is not None:
+            samples.append(value, now)
+        return [(callback, key, value) for callback in self._subscribers.get(key, ())]
+
+    @staticmethod
+    def _notify(calls):
+        """Make subscriber calls collected by :py:meth:`_set`."""
+        for callback, key, value in calls:
+            try:
+                callback(key, value)
+            except Exception:  # pylint: disable=broad-except
+                # a broken subscriber must not stop data from flowing.
+                LOG.exception("Subscriber of %s failed", key)
+
+    def _convert(self, key, value):
+        """Convert a value to the configured type of its key, if any."""
+        converter = self._types.get(key)
+        if converter is None or value is None:
+            return value
+        try:
+            return converter(value)
+        except (TypeError, ValueError):
+            LOG.warning("Cannot convert %s value %r to %s", key, value, converter)
+            return None
+
+    def _data_key_count(self):
+        """Count the keys that aren't control keys."""
+        controls = sum(1 for key in CONTROL_KEYS if key in self._updated)
+        return len(self._updated) - controls
+
+    def _evict_oldest(self, keep):
+        """
+        Forget the least-recently updated data key other than ``keep``.
+
+        Returns False if there was nothing to forget.
+        """
+        for key in self._updated:
+            if key not in CONTROL_KEYS and key != keep:
+                break
+        else:
+            return False
+        LOG.debug("Forgetting %s to stay under %d keys", key, self.max_keys)
+        del self[key]
+        return True
+
+    def __delitem__(self, key):
+        """Forget a key and everything tracked about it."""
+        with self.lock:
+            collections.defaultdict.__delitem__(self, key)
+            self._versions.pop(key, None)
+            self._updated.pop(key, None)
+            self._expires.pop(key, None)
+            self._snapshot = None
+
+    def version(self, key):
+        """Get a number that increases every time a key is set. 0 means not set."""
+        return self._versions.get(key, 0)
+
+    def latest_version(self):
+        """Get the version of whatever key was set most recently."""
+        return self._latest_version
+
+    def changed_since(self, version, keys=None):
+        """Check if any of some keys (or any key at all) was set after ``version``."""
+        if keys is None:
+            return self._latest_version > version
+        return any(self._versions.get(key, 0) > version for key in keys)
+
+    def wait_for_change(self, version, timeout=None, cancelled=None, keys=None):
+        """
+        Block until any key is set after ``version``, or the timeout passes.
+
+        Returns True if something changed. This lets an idle consumer sleep
+        without polling yet wake the moment a command arrives. If ``keys`` are
+        given, only those keys count. If given, ``cancelled`` is checked
+        whenever waiters are woken by :py:meth:`wake` and ends the wait early
+        when it returns True.
+        """
+        with self.lock:
+            return self._changed.wait_for(
+                lambda: (
+                    self.changed_since(version, keys) or (cancelled and cancelled())
+                ),
+                timeout,
+            )
+
+    def wake(self):
+        """Make waiters in :py:meth:`wait_for_change` check their ``cancelled``."""
+        with self.lock:
+            self._changed.notify_all()
+
+    def samples(self, key, size):
+        """
+        Get a :py:class:`RingBuffer` of the latest numeric values of a key.
+
+        The buffer is kept from the first call on, holding at least ``size``
+        values (it grows if a later caller wants more), and is shared by
+        everyone asking about the key. It starts with the current value, if any.
+        """
+        with self.lock:
+            samples = self._samples.get(key)
+            if samples is None or samples.size < size:
+                grown = RingBuffer(size)
+                if samples is not None:
+                    grown.extend(*samples.arrays())
+                elif key in self:
+                    grown.append(self[key], self._updated.get(key))
+                samples = self._samples[key] = grown
+            return samples
+
+    def snapshot(self):
+        """
+        Get an immutable :py:class:`Snapshot` of all the data as of now.
+
+        The data is only copied (under the lock) when something was set since
+        the last snapshot; otherwise the copy is shared.
+        """
+        previous = self._snapshot
+        if previous is None or previous.latest_version != self._latest_version:
+            with self.lock:
+                self._snapshot = Snapshot(
+                    dict(self),
+                    dict(self._versions),
+                    dict(self._expires),
+                    self._latest_version,
+                )
+            return self._snapshot
+        return previous.retaken()
+
+    def begin_frame(self):
+        """Take the snapshot that everything drawn in the next frame reads from."""
+        self.frame = self.snapshot()
+        return self.frame
+
+    def end_frame(self):
+        """Let reads between frames see the live data again."""
+        self.frame = None
+
+    def view(self):
+        """Get the snapshot of the frame being drawn, or a new one between frames."""
+        return self.frame if self.frame is not None else self.snapshot()
+
+    def updated(self, key):
+        """Get the time a key was last set, or None."""
+        return self._updated.get(key)
+
+    def is_stale(self, key):
+        """Check if a key's value is older than its ttl."""
+        expires = self._expires.get(key)
+        return expires is not None and clock.wall_time() > expires
+
+    def subscribe(self, key, callback):
+        """Call ``callback(key, value)`` whenever ``key`` is set, outside the lock."""
+        self._subscribers[key].append(callback)
+
+    def unsubscribe(self, key, callback):
+        """Stop calling a previously-subscribed callback."""
+        self._subscribers[key].remove(callback)
+
+
+class RingBuffer(object):
+    """
+    The latest ``size`` samples of a value, with the times they arrived.
+
+    Samples live in fixed NumPy arrays, so keeping history costs no allocation
+    per sample. Values that aren't numbers are kept as NaN, which graphs show as
+    gaps. ``version`` goes up with every sample so readers can tell when to redraw.
+    """
+
+    def __init__(self, size):
+        """Construct an empty buffer."""
+        self.size = size
+        self.version = 0
+        self._times = numpy.full(size, numpy.nan)
+        self._values = numpy.full(size, numpy.nan)
+        self._next = 0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        """Count the values held, at most ``size``."""
+        return self._count
+
+    def append(self, value, when=None):
+        """Add a sample, replacing the oldest one if the buffer is full."""
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            value = numpy.nan
+        with self._lock:
+            self._times[self._next] = clock.wall_time() if when is None else when
+            self._values[self._next] = value
+            self._next = (self._next + 1) % self.size
+            self._count = min(self._count + 1, self.size)
+            self.version += 1
+
+    def extend(self, times, values):
+        """Add many samples, oldest first."""
+        for when, value in zip(times, values):
+            self.append(value, when)
+
+    def arrays(self):
+        """Get copies of the sample times and values, oldest first."""
+        with self._lock:
+            start = (self._next - self._count) % self.size
+            order = (start + numpy.arange(self._count)) % self.size
+            return self._times[order], self._values[order]
+
+
+class Snapshot(collections.abc.Mapping):
+    """
+    Read-only copy of :py:class:`InputData` at one moment.
+
+    Missing keys read as 0, like in the live data, and a value's staleness is
+    judged at the time the snapshot was taken so it can't change mid-frame.
+    """
+
+    def __init__(self, values, versions, expires, latest_version, taken_at=None):
+        """Construct a snapshot from copies of the data's tables."""
+        self._values = values
+        self._versions = versions
+        self._expires = expires
+        self.latest_version = latest_version
+        self.taken_at = clock.wall_time() if taken_at is None else taken_at
+
+    def __getitem__(self, key):
+        """Get a value as it was when the snapshot was taken, or 0 if unset."""
+        return self._values.get(key, 0)
+
+    def __contains__(self, key):
+        """Check if a key was set when the snapshot was taken."""
+        return key in self._values
+
+    def __iter__(self):
+        """Iterate over the keys in the snapshot."""
+        return iter(self._values)
+
+    def __len__(self):
+        """Count the keys in the snapshot."""
+        return len(self._values)
+
+    def retaken(self):
+        """Get a snapshot of the same data, taken now."""
+        return Snapshot(
+            self._values, self._versions, self._expires, self.latest_version
+        )
+
+    def version(self, key):
+        """Get the version a key had when the snapshot was taken. 0 means not set."""
+        return self._versions.get(key, 0)
+
+    def is_stale(self, key):
+        """Check if a key's value was older than its ttl when the snapshot was taken."""
+        expires = self._expires.get(key)
+        return expires is not None and self.taken_at > expires
+
+
+def input_data_factory(config):
+    """Build the data store from the optional ``data`` config section."""
+    conf = config.get("data") or {}
+    keys = conf.get("keys") or {}
+    return InputData(
+        max_keys=conf.get("max_keys", DEFAULT_MAX_KEYS),
+        ttl=conf.get("ttl"),
+        key_types={key: opts["type"] for key, opts in keys.items() if "type" in opts},
+        key_ttls={key: opts["ttl"] for key, opts in keys.items() if "ttl" in opts},
+    )
@@ -1,5 +1,7 @@
 """Displays to present stuff."""
 
+import collections
+
 from matplotlib import cm
 
 try:
@@ -9,7 +11,9 @@ except ImportError:
     print("No RGB Matrix library found. Cannot use that display.")
     RGBMatrix = None
 
-from infopanel import colors
+import numpy
+
+from infopanel import colors, render
 
 
 class Display(object):
@@ -17,11 +21,27 @@ class Display(object):
     A display screen.
 
     This is a common interface to whatever kind of display you have.
+
+    ``stats`` counts what got drawn and what was skipped for being off-screen.
+    The driver logs and resets it on every scene change.
     """
 
+    def __init__(self):
+        """Construct a display."""
+        self.stats = collections.Counter()
+
     def text(self, font, x, y, red, green, blue, text):
-        """Render text in a font to a place on the screen in a certain color."""
-        raise NotImplementedError
+        """
+        Render text in a font to a place on the screen in a certain color.
+
+        ``font`` is a :py:class:`~infopanel.fonts.FontAtlas` and ``y`` is the
+        baseline. By default this sets the pixels of the glyphs that are on the
+        screen one by one. Returns the width of the text.
+        """
+        x, visible, width = font.clip(x, text, self.width)
+        self.stats["glyphs_culled"] += len(text) - len(visible)
+        font.draw(self.set_pixel, x, y, red, green, blue, visible)
+        return width
 
     @property
     def width(self):
@@ -46,6 +66,45 @@ class Display(object):
         """Set a pixel to a color."""
         raise NotImplementedError
 
+    def set_pixels(self, xs, ys, color, x=0, y=0):
+        """
+        Set many pixels to one color.
+
+        Pixels are at ``(x + xs[i], y + ys[i])``. Displays should override this
+        with something faster than setting the pixels one by one.
+        """
+        red, green, blue = color
+        for xi, yi in zip(xs, ys):
+            self.set_pixel(x + xi, y + yi, red, green, blue)
+
+    def clear(self):
+        """Clear the frame being drawn."""
+        raise NotImplementedError
+
+    def buffer(self):
+        """Show the frame that was drawn."""
+        raise NotImplementedError
+
+    def blit(self, strip, x, y):
+        """
+        Draw the part of a :py:class:`~infopanel.render.Strip` that is on screen.
+
+        The strip's top-left corner goes at ``(x, y)``.
+        """
+        for color, xs, ys in strip.window(-x, self.width - x):
+            self.set_pixels(xs, ys, color, x, y)
+
+    def suspend(self):
+        """Go dark and use as little power as the hardware allows."""
+        self.clear()
+        self.buffer()
+
+    def resume(self):
+        """Come back from :py:meth:`suspend`."""
+
+    def close(self):
+        """Release whatever the display holds on to when the panel quits."""
+
     def set_image(self, image, x=0, y=0):
         """Apply an image to the screen."""
         raise NotImplementedError
@@ -81,6 +140,7 @@ class RGBMatrixDisplay(Display):
         Display.__init__(self)
         self._matrix = matrix
         self.canvas = matrix.CreateFrameCanvas()
+        self._brightness_before_suspend = None
 
     @property
     def width(self):
@@ -104,13 +164,24 @@ class RGBMatrixDisplay(Display):
 
     def text(self, font, x, y, red, green, blue, text):
         """Render text in a font to a place on the screen in a certain color."""
-        color = graphics.Color(red, green, blue)  # may require caching
-        return graphics.DrawText(self.canvas, font, x, y, color, text)
+        x, visible, width = font.clip(x, text, self.width)
+        self.stats["glyphs_culled"] += len(text) - len(visible)
+        if visible:
+            color = graphics.Color(red, green, blue)  # may require caching
+            graphics.DrawText(self.canvas, font.native(), x, y, color, visible)
+        return width
 
     def set_pixel(self, x, y, red, green, blue):
         """Set a pixel to a color."""
         self.canvas.SetPixel(x, y, red, green, blue)
 
+    def set_pixels(self, xs, ys, color, x=0, y=0):
+        """Set many pixels to one color."""
+        red, green, blue = color
+        set_pixel = self.canvas.SetPixel  # skip the attribute lookups per pixel
+        for xi, yi in zip(xs, ys):
+            set_pixel(x + xi, y + yi, red, green, blue)
+
     def set_image(self, image, x=0, y=0):
         """Apply an image to the screen."""
         self.canvas.SetImage(image, x, y)
@@ -119,11 +190,127 @@ class RGBMatrixDisplay(Display):
         """Clear the canvas."""
         self.canvas.Clear()
 
+    def suspend(self):
+        """
+        Blank the matrix at zero brightness.
+
+        The rgbmatrix library has no way to stop its refresh thread short of
+        tearing down the matrix, but at zero brightness with a black frame it
+        does the least work it can.
+        """
+        self._brightness_before_suspend = self.brightness
+        self.canvas.Clear()
+        self.canvas = self._matrix.SwapOnVSync(self.canvas)
+        self._matrix.brightness = 0
+
+    def resume(self):
+        """Restore the brightness from before the suspend."""
+        if self._brightness_before_suspend is not None:
+            self.brightness = self._brightness_before_suspend
+            self._brightness_before_suspend = None
+
     def buffer(self):
         """Swap the off-display canvas/buffer with the on-display one."""
         self.canvas = self._matrix.SwapOnVSync(self.canvas)
 
 
+class ArrayDisplay(Display):
+    """
+    A display that draws into a NumPy array instead of onto hardware.
+
+    Text is rasterized from BDF glyph metrics just like the rgbmatrix library
+    does it, so widths and layout match the real panel. This is handy for
+    running, benchmarking, and profiling scenes off-device.
+    """
+
+    def __init__(self, width=64, height=32, text_renderer=None):
+        """Construct a display with a black frame."""
+        Display.__init__(self)
+        self.canvas = numpy.zeros((height, width, 3), dtype=numpy.uint8)
+        self.frame = self.canvas.copy()  # the last buffered frame
+        self.frames = 0
+        self._brightness = 100
+        self._text = text_renderer or render.TEXT
+
+    @property
+    def width(self):
+        """Width of the display in pixels."""
+        return self.canvas.shape[1]
+
+    @property
+    def height(self):
+        """Height of the display in pixels."""
+        return self.canvas.shape[0]
+
+    @property
+    def brightness(self):
+        """Brightness of display from 0 to 100."""
+        return self._brightness
+
+    @brightness.setter
+    def brightness(self, value):
+        self._brightness = value
+
+    def text(self, font, x, y, red, green, blue, text):
+        """Render text in a font to a place on the screen in a certain color."""
+        if font is None:
+            return 0  # the font failed to load, which has been logged.
+        run = self._text.render(font, text)
+        self._paint(run.mask, x + run.left, y + run.top, (red, green, blue))
+        return run.width
+
+    def _paint(self, mask, x, y, color):
+        """Set the pixels of a mask at a place on the canvas, clipping to its edges."""
+        height, width = mask.shape
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + width, self.width), min(y + height, self.height)
+        if x0 >= x1 or y0 >= y1:
+            self.stats["text_culled"] += 1
+            return
+        self.canvas[y0:y1, x0:x1][mask[y0 - y : y1 - y, x0 - x : x1 - x]] = color
+
+    def set_pixel(self, x, y, red, green, blue):
+        """Set a pixel to a color."""
+        if 0 <= x < self.width and 0 <= y < self.height:
+            self.canvas[y, x] = (red, green, blue)
+
+    def set_pixels(self, xs, ys, color, x=0, y=0):
+        """Set many pixels to one color with one array write."""
+        xs = numpy.add(xs, x)
+        ys = numpy.add(ys, y)
+        inside = (xs >= 0) & (xs < self.width) & (ys >= 0) & (ys < self.height)
+        self.canvas[ys[inside], xs[inside]] = color
+
+    def blit(self, strip, x, y):
+        """Copy the on-screen window of a strip with one masked array write."""
+        height, width = strip.lit.shape
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + width, self.width), min(y + height, self.height)
+        if x0 >= x1 or y0 >= y1:
+            return
+        rows, cols = slice(y0 - y, y1 - y), slice(x0 - x, x1 - x)
+        lit = strip.lit[rows, cols]
+        self.canvas[y0:y1, x0:x1][lit] = strip.pixels[rows, cols][lit]
+
+    def set_image(self, image, x=0, y=0):
+        """Apply a PIL image to the screen."""
+        pixels = numpy.asarray(image.convert("RGB"))
+        height, width, _colors = pixels.shape
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + width, self.width), min(y + height, self.height)
+        if x0 < x1 and y0 < y1:
+            self.canvas[y0:y1, x0:x1] = pixels[y0 - y : y1 - y, x0 - x : x1 - x]
+
+    def clear(self):
+        """Clear the canvas."""
+        self.canvas[:] = 0
+
+    def buffer(self):
+        """Keep a copy of the finished frame."""
+        self.frame = self.canvas.copy()
+        self.frames += 1
+
+
 def rgbmatrix_options_factory(config):
     """Build RGBMatrix options object."""
     options = RGBMatrixOptions()
@@ -155,6 +342,19 @@ def display_factory(config):
         options = rgbmatrix_options_factory(config["RGBMatrix"])
         matrix = RGBMatrix(options=options)
         display = RGBMatrixDisplay(matrix)
+    elif "ArrayMatrix" in config:
+        conf = config["ArrayMatrix"] or {}
+        display = ArrayDisplay(conf.get("width", 64), conf.get("height", 32))
+    elif "Recording" in config:
+        # pylint: disable=import-outside-toplevel, cyclic-import
+        from infopanel import recording
+
+        conf = config["Recording"]
+        display = recording.RecordingDisplay(
+            recording.writer_factory(conf["path"], conf["format"]),
+            conf["width"],
+            conf["height"],
+        )
     elif "DummyMatrix" in config:
         # pylint: disable=import-outside-toplevel, cyclic-import
         from infopanel.tests import (
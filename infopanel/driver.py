@@ -9,12 +9,13 @@ import os
 import itertools
 
 from infopanel import mqtt, scenes, config, display, sprites, data
-from infopanel import helpers
+from infopanel import helpers, fetcher, clock, fonts, history, profiling, schedule
 
 FRAME_DELAY_S = 0.005
 MODE_BLANK = "blank"
 MODE_ALL = "all"
 MODE_ALL_DURATION = 5  # 5 second default scene duration.
+SUSPEND_CHECK_S = 1.0  # how often a suspended driver checks if it was stopped.
 ON = "1"  # for MQTT processing
 OFF = "0"
 
@@ -22,6 +23,49 @@ LOG = logging.getLogger(__name__)
 logging.basicConfig(level=logging.DEBUG)
 
 
+class ShuffleBag(object):
+    """
+    Random picks that come up in proportion to their weights.
+
+    Each item goes into a bag ``weight`` times. Picks are drawn from the bag
+    without putting them back until it is empty, then the bag is refilled and
+    shuffled again, so every item gets its share in every round rather than
+    just on average.
+    """
+
+    def __init__(self, weighted, rng=random):
+        """Construct a bag of ``(item, weight)``. All-zero weights count as equal."""
+        weighted = list(weighted)
+        self.weighted = [(item, weight) for item, weight in weighted if weight > 0]
+        self.weighted = self.weighted or [(item, 1) for item, _weight in weighted]
+        self._rng = rng
+        self._bag = []
+
+    def _round(self):
+        items = []
+        for item, weight in self.weighted:
+            items.extend([item] * weight)
+        self._rng.shuffle(items)
+        return items
+
+    def draw(self, avoid=None):
+        """Pick the next item, which is never ``avoid`` unless there's nothing else."""
+        if not self._bag:
+            self._bag = self._round()
+        if not self._bag:
+            return None
+        if self._bag[-1] is avoid:
+            others = [i for i, item in enumerate(self._bag) if item is not avoid]
+            if not others and len(self.weighted) > 1:
+                # only repeats are left, so start on the next round underneath.
+                self._bag = self._round() + self._bag
+                others = [i for i, item in enumerate(self._bag) if item is not avoid]
+            if others:
+                i = self._rng.choice(others)
+                self._bag[i], self._bag[-1] = self._bag[-1], self._bag[i]
+        return self._bag.pop()
+
+
 class Driver(object):  # pylint: disable=too-many-instance-attributes
     """Main controller for the infopanel."""
 
@@ -34,17 +78,27 @@ class Driver(object):  # pylint: disable=too-many-instance-attributes
         self.scenes = {}  # name: scene
         self.durations_in_s = {}  # scene: seconds
         self.brightnesses = {}  # scene: brightness percent
+        self.weights = {}  # scene: how often random mode picks it
         self.scene_sequence = []
         self._scene_iterator = itertools.cycle(self.scene_sequence)
+        self._shuffle_bag = ShuffleBag([])
+        self.upcoming_scene = None  # picked ahead of time, see _change_scene
+        self.wake_keys = None  # data keys that the active scene redraws for
         self._randomize_scenes = ON
         self._previous_mode = None
         self._mode = MODE_ALL
         self.modes = {}
         self.active_scene = None
         self._stop = threading.Event()
+        self.fetcher = fetcher.BackgroundFetcher()
         self.interval = 2
         # just used to detect changes in data. Should be handled on data.
         self._brightness = 100
+        self.last_wake_latency_s = None
+        self.frame_period = FRAME_DELAY_S
+        self.profiler = None  # see start_profiling
+        self.schedule = None  # see start_schedule
+        self._schedule_due = float("inf")  # wall time of the next transition
 
     def run(self):
         """
@@ -55,15 +109,43 @@ class Driver(object):  # pylint: disable=too-many-instance-attributes
         Uses the clock to figure out when to switch scenes instead of the number of frames
         because some scenes are way slower than others.
 
+        Frames are drawn only as often as the active scene needs (see
+        :py:meth:`infopanel.scenes.Scene.frame_rate`). Between frames the driver
+        sleeps on the data source, so commands and new data still get handled
+        right away.
+
+        Only new values of :py:attr:`wake_keys` cut that sleep short, so a
+        busy broker doesn't make a scene that shows none of its data redraw
+        at the message rate.
+
+        In blank mode nothing is drawn at all; see :py:meth:`suspend`.
         """
-        interval_start = time.time()
+        interval_start = clock.now()
         while True:
-            if self._stop.isSet():
+            if self._stop.is_set():
                 break
-            self.draw_frame()
+            frame_start = clock.now()
+            self._check_schedule()
             self._check_for_command()
-            time.sleep(FRAME_DELAY_S)
-            now = time.time()
+            if self._mode == MODE_BLANK:
+                self.suspend()
+                interval_start = clock.now()
+                continue
+            self.fetcher.poll()
+            # anything that arrives from here on gets drawn in the next frame.
+            version = self.data_source.latest_version()
+            self.draw_frame()
+            clock.sleep(FRAME_DELAY_S)
+            now = clock.now()
+            wait = min(
+                frame_start + self.frame_period - now,
+                interval_start + self.interval - now,
+            )
+            if wait > 0:
+                clock.wait_for_change(
+                    self.data_source, version, wait, self._stop.is_set, self.wake_keys
+                )
+                now = clock.now()
             if now - interval_start > self.interval:
                 interval_start = now
                 self._change_scene()
@@ -71,15 +153,53 @@ class Driver(object):  # pylint: disable=too-many-instance-attributes
     def stop(self):
         """Shut down the thread."""
         self._stop.set()
+        self.data_source.wake()
 
-    def _change_scene(self):
-        """Switch to another active_scene, maybe."""
+    def suspend(self):
+        """
+        Power the display down and block until the mode changes.
+
+        No frames are drawn and no commands are polled while suspended. The
+        thread sleeps on the data source until something new arrives, and wakes
+        up for good when the mode is no longer blank. The time from that mode
+        command arriving to waking up is kept in ``last_wake_latency_s``.
+        """
+        LOG.info("Suspending display.")
+        self.display.suspend()
+        datasrc = self.data_source
+        version = datasrc.latest_version()
+        while not self._stop.is_set() and datasrc["mode"] == MODE_BLANK:
+            if self._check_schedule():
+                continue
+            clock.wait_for_change(datasrc, version, SUSPEND_CHECK_S, self._stop.is_set)
+            version = datasrc.latest_version()
+        self.display.resume()
+        mode_set_at = datasrc.updated("mode")
+        if mode_set_at is not None and not self._stop.is_set():
+            self.last_wake_latency_s = time.time() - mode_set_at
+            LOG.info("Woke up %.1f ms after mode command.", 1000 * self.last_wake_latency_s)
+
+    def _pick_scene(self, avoid):
+        """Pick a scene from the mode, at random or in order."""
         if self._randomize_scenes == ON:
-            new_scene = random.choice(self.scene_sequence)
-        else:
-            new_scene = next(self._scene_iterator)
+            return self._shuffle_bag.draw(avoid)
+        return next(self._scene_iterator)
+
+    def _change_scene(self):
+        """
+        Switch to another active_scene, maybe.
+
+        The scene after this one is picked right away and told to
+        :py:meth:`~infopanel.scenes.Scene.prepare`, so it can get ready while
+        this one is showing.
+        """
+        new_scene = self.upcoming_scene or self._pick_scene(self.active_scene)
+        self.upcoming_scene = None
 
         if new_scene != self.active_scene:
+            if self.display.stats:
+                LOG.debug("Render stats: %s", dict(self.display.stats))
+                self.display.stats.clear()
             LOG.debug("Switching to new scene: %s", new_scene)
             self.display.clear()
             new_scene.reinit()
@@ -90,35 +210,61 @@ class Driver(object):  # pylint: disable=too-many-instance-attributes
                 self.display.brightness = brightness
             self.active_scene = new_scene
             self.interval = self.durations_in_s[new_scene]
+            self.frame_period = 1.0 / new_scene.frame_rate()
+            self.wake_keys = self.scene_keys(new_scene)
+            LOG.debug("Drawing at %.1f frames per second", 1.0 / self.frame_period)
+            if self.profiler is not None:
+                self.profiler.switch(self.scene_name(new_scene))
+
+        if len(self.scene_sequence) > 1:
+            self.upcoming_scene = self._pick_scene(new_scene)
+            self._prepare(self.upcoming_scene)
+
+    def _prepare(self, scene):
+        """
+        Get a scene ready before it is shown.
+
+        Fetches of its sprites that would come due while it's up start now
+        instead, so it shows fresh data for its whole duration.
+        """
+        scene.prepare()
+        self.fetcher.expedite(
+            scene.sprites, self.interval + self.durations_in_s.get(scene, 0)
+        )
 
     def _check_for_command(self):
         """
         Process any incoming commands.
 
+        Commands are read from one snapshot of the data so that e.g. a mode and
+        brightness sent together are applied together.
+
         Notes
         -----
         This must be fast.
         """
-        if self.data_source["mode"] != self._mode:
-            success = self.apply_mode(self.data_source["mode"])
+        commands = self.data_source.snapshot()
+        if commands["mode"] != self._mode:
+            success = self.apply_mode(commands["mode"])
             if not success:
                 # Invalid mode. Reset data source to avoid dead-locking.
                 self.data_source["mode"] = self._mode
             self._change_scene()
 
-        if self.data_source["brightness"] != self._brightness:
+        if commands["brightness"] != self._brightness:
             try:
-                self._brightness = int(self.data_source["brightness"])
+                self._brightness = int(commands["brightness"])
             except TypeError:
                 # leave brightness unchanged if it's e.g. a None
                 pass
             self.display.brightness = self._brightness
 
-        if self.data_source["random"] != self._randomize_scenes:
-            self._randomize_scenes = self.data_source["random"]
+        if commands["random"] != self._randomize_scenes:
+            self._randomize_scenes = commands["random"]
+            self.upcoming_scene = None  # picked the other way
 
-        if self.data_source["image_path"]:
-            self.change_image_path(self.data_source["image_path"])
+        if commands["image_path"]:
+            self.change_image_path(commands["image_path"])
             # clear it out in anticipation of next command.
             self.data_source["image_path"] = ""
 
@@ -135,19 +281,25 @@ class Driver(object):  # pylint: disable=too-many-instance-attributes
                 scene = self.scenes[mode]
                 self.scene_sequence = [scene]
                 self.durations_in_s[scene] = MODE_ALL_DURATION
+                self.weights[scene] = 1
             else:
                 LOG.error("Invalid mode: %s", mode)
                 return False
         else:
             self.scene_sequence = []
-            for scene_name, duration, brightness in self.modes[mode]:
+            for scene_name, duration, brightness, weight in self.modes[mode]:
                 scene = self.scenes[scene_name]
                 self.scene_sequence.append(scene)
                 self.durations_in_s[scene] = duration
+                self.weights[scene] = weight
                 self.brightnesses[scene] = (
                     brightness if brightness is not None else self._brightness
                 )
         self._scene_iterator = itertools.cycle(self.scene_sequence)
+        self._shuffle_bag = ShuffleBag(
+            [(scene, self.weights[scene]) for scene in self.scene_sequence]
+        )
+        self.upcoming_scene = None
         self._previous_mode = self._mode  # for suspend/resume
         self._mode = mode
         return True
@@ -176,17 +328,85 @@ class Driver(object):  # pylint: disable=too-many-instance-attributes
         except AttributeError:
             LOG.warning("The %s sprite cannot have its path modified.", sprite_name)
 
+    def bound_keys(self):
+        """Get the data keys that the driver or any sprite reads."""
+        keys = set(data.CONTROL_KEYS)
+        for sprites_of_name in self.sprites.values():
+            for sprite in sprites_of_name:
+                if getattr(sprite, "data_label", None):
+                    keys.add(sprite.data_label)
+        if self.data_source.history is not None:
+            keys.update(self.data_source.history.keys())
+        return keys
+
+    def scene_keys(self, scene):  # pylint: disable=no-self-use
+        """Get the data keys that change what a scene shows, plus commands."""
+        keys = set(data.CONTROL_KEYS)
+        for sprite in scene.sprites:
+            if getattr(sprite, "data_label", None):
+                keys.add(sprite.data_label)
+        return keys
+
     def draw_frame(self):
         """Perform a double-buffered draw frame and frame switch."""
         self.display.clear()
-        self.active_scene.draw_frame(self.display)
+        self.display.stats["frames"] += 1
+        # sprites read this snapshot, so a frame never mixes old and new data
+        # and writers never wait on drawing.
+        self.data_source.begin_frame()
+        try:
+            self.active_scene.draw_frame(self.display)
+        finally:
+            self.data_source.end_frame()
         self.display.buffer()
+        if self.profiler is not None:
+            self.profiler.frame_drawn()
+
+    def scene_name(self, scene):
+        """Get the name a scene was configured under."""
+        for name, named_scene in self.scenes.items():
+            if named_scene is scene:
+                return name
+        return scene.__class__.__name__
+
+    def start_schedule(self, daily):
+        """Follow a :py:class:`~infopanel.schedule.Schedule`, starting with what's due now."""
+        self.schedule = daily
+        self._schedule_due = clock.wall_time()
+        self._check_schedule()
+
+    def _check_schedule(self):
+        """
+        Send the scheduled mode and brightness if a transition is due.
+
+        Returns True if it was. This is one comparison per frame; the schedule
+        itself is only looked at when a transition is due.
+        """
+        now = clock.wall_time()
+        if now < self._schedule_due:
+            return False
+        transition = self.schedule.state_at(schedule.local_time_of_day(now))
+        self._schedule_due = self.schedule.next_due(now)
+        if transition is None:
+            return False
+        LOG.info("Scheduled change to %s", transition)
+        commands = {"mode": transition.mode}
+        if transition.brightness is not None:
+            commands["brightness"] = transition.brightness
+        self.data_source.update(commands)
+        return True
+
+    def start_profiling(self, profiler):
+        """Profile each scene with a :py:class:`~infopanel.profiling.SceneProfiler`."""
+        self.profiler = profiler
+        if self.active_scene is not None:
+            profiler.switch(self.scene_name(self.active_scene))
 
     def init_modes(self, conf):
         """Process modes from configuration."""
         modeconf = conf["modes"]
         # blank mode for suspend. Use None brightness to keep constant
-        self.modes[MODE_BLANK] = [(scenes.SCENE_BLANK, 2.0, None)]
+        self.modes[MODE_BLANK] = [(scenes.SCENE_BLANK, 2.0, None, 1)]
 
         for mode_name, scenelist in modeconf.items():
             self.modes[mode_name] = []
@@ -197,6 +417,7 @@ class Driver(object):  # pylint: disable=too-many-instance-attributes
                             scene_name,
                             scene_settings["duration"],
                             scene_settings.get("brightness"),
+                            _weight(mode_name, scene_name, scene_settings),
                         )
                     )
 
@@ -207,7 +428,7 @@ class Driver(object):  # pylint: disable=too-many-instance-attributes
                 continue
             self.modes[MODE_ALL].append(
                 # None brightness indicates to keep it unchanged
-                (scene_name, MODE_ALL_DURATION, None)
+                (scene_name, MODE_ALL_DURATION, None, 1)
             )
 
         default_mode = conf["global"].get("default_mode", MODE_ALL)
@@ -216,6 +437,18 @@ class Driver(object):  # pylint: disable=too-many-instance-attributes
         self._change_scene()
 
 
+def _weight(mode_name, scene_name, scene_settings):
+    """Get the random mode weight of a scene in a mode, a whole number."""
+    weight = scene_settings.get("weight", 1)
+    if not isinstance(weight, int) or weight < 0:
+        raise ValueError(
+            "Weight of {} in mode {} must be a whole number, not {}".format(
+                scene_name, mode_name, weight
+            )
+        )
+    return weight
+
+
 def driver_factory(disp, data_src, conf):
     """Build factory and add scenes and sprites."""
     driver = Driver(disp, data_src)
@@ -223,17 +456,54 @@ def driver_factory(disp, data_src, conf):
     driver.scenes = scenes.scene_factory(
         disp.width, disp.height, conf["scenes"], driver.sprites
     )
+    for sprites_of_name in driver.sprites.values():
+        if sprites_of_name[0].fetch_interval():
+            driver.fetcher.add(sprites_of_name)
     driver.init_modes(conf)
+    daily = schedule.schedule_factory(conf)
+    if daily is not None:
+        driver.start_schedule(daily)
     return driver
 
 
 def apply_global_config(conf):
     """Apply config items that are global in nature."""
     helpers.FONT_DIR = os.path.expandvars(conf["global"]["font_dir"])
+    fonts.preload(fonts.font_names(conf), helpers.FONT_DIR)
 
 
-def run(conf_file=None):
-    """Run the screen."""
+def _save_history(store):
+    """Save history on the way out, if there's somewhere to save it."""
+    if store is None or not store.path:
+        return
+    try:
+        store.save()
+    except OSError as error:
+        LOG.error("Could not save history to %s: %s", store.path, error)
+
+
+def _shut_down(disp, store, profiler):
+    """Save what needs saving and release the display."""
+    if profiler is not None:
+        profiler.close()
+    _save_history(store)
+    disp.close()
+    LOG.info("Quitting.")
+
+
+def run(
+    conf_file=None,
+    use_asyncio=False,
+    profile_dir=None,
+    profile_frames=profiling.DEFAULT_FRAMES,
+    profile_format="pstats",
+):  # pylint: disable=too-many-locals
+    """
+    Run the screen.
+
+    With a ``profile_dir``, each scene is profiled separately and its profile is
+    written there after ``profile_frames`` frames; see :py:mod:`infopanel.profiling`.
+    """
     if not conf_file:
         parser = argparse.ArgumentParser()
         parser.add_argument(
@@ -242,27 +512,78 @@ def run(conf_file=None):
             help="Point to a YAML configuration file.",
             default="/etc/infopanel/infopanel.yaml",
         )
+        parser.add_argument(
+            "--asyncio",
+            action="store_true",
+            help="Run frames, MQTT, and data fetches on one asyncio event loop.",
+        )
+        parser.add_argument(
+            "--profile",
+            metavar="DIR",
+            help="Profile each scene and write the profiles to this directory.",
+        )
+        parser.add_argument(
+            "--profile-frames",
+            type=int,
+            default=profiling.DEFAULT_FRAMES,
+            help="Frames of each scene to profile before writing its profile.",
+        )
+        parser.add_argument(
+            "--profile-format",
+            choices=profiling.FORMATS,
+            default="pstats",
+            help="cProfile stats, or sampled stacks collapsed for flame graphs.",
+        )
 
         args = parser.parse_args()
         conf_file = args.config
+        use_asyncio = args.asyncio
+        profile_dir = args.profile
+        profile_frames = args.profile_frames
+        profile_format = args.profile_format
     conf = config.load_config_yaml(conf_file)
     apply_global_config(conf)
     disp = display.display_factory(conf)
-    datasrc = data.InputData()
+    datasrc = data.input_data_factory(conf)
     infopanel = driver_factory(disp, datasrc, conf)
+    store = history.history_factory(conf, datasrc)
+    if store is not None and store.path:
+        infopanel.fetcher.add([store])
 
     if conf.get("mqtt"):
-        client = mqtt.MQTTClient(datasrc, conf["mqtt"])
-        client.start()
+        client = mqtt.MQTTClient(
+            datasrc, conf["mqtt"], bound_keys=infopanel.bound_keys()
+        )
     else:
         client = None
+
+    profiler = None
+    if profile_dir:
+        profiler = profiling.SceneProfiler(profile_dir, profile_frames, profile_format)
+
+    if use_asyncio:
+        # pylint: disable=import-outside-toplevel
+        from infopanel import async_runner
+
+        try:
+            if profiler is not None:
+                infopanel.start_profiling(profiler)
+            async_runner.run(infopanel, client)
+        finally:
+            _shut_down(disp, store, profiler)
+        return
+
+    if client:
+        client.start()
     try:
+        if profiler is not None:
+            infopanel.start_profiling(profiler)
         # infopanel.start()  # multiple threads
         infopanel.run()  # main thread
     finally:
         if client:
             client.stop()
-        LOG.info("Quitting.")
+        _shut_down(disp, store, profiler)
 
 
 if __name__ == "__main__":
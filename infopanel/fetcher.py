@@ -0,0 +1,167 @@
+"""
+Background refresh of sprites that get data from somewhere slow.
+
+Sprites that define :py:meth:`~infopanel.sprites.Sprite.fetch_interval` have
+their :py:meth:`~infopanel.sprites.Sprite.fetch` run on a small pool of worker
+threads. The render thread calls :py:meth:`BackgroundFetcher.poll` once per
+frame, which never blocks: it hands finished results to
+:py:meth:`~infopanel.sprites.Sprite.apply_fetched` and starts fetches that are
+due. Until new data is ready, a sprite keeps showing what it last got.
+
+Fetches that fail or take longer than their timeout are retried with
+exponential backoff. A hung fetch can't be killed. Once it times out, the
+render thread stops waiting on it and counts it as a failure, and its sprite
+gets no second fetch until the first one returns. A new worker takes over the
+hung one's place in the pool, so hung fetches never starve the other jobs; the
+pool shrinks back when they return. If a late fetch does return with data,
+that data is still shown, since it's newer than what the sprite has.
+"""
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+LOG = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT_S = 30.0
+FIRST_RETRY_S = 10.0
+MAX_BACKOFF_S = 3600.0
+
+
+class FetchJob(object):  # pylint: disable=too-many-instance-attributes
+    """The refresh schedule of one sprite and all of its copies."""
+
+    def __init__(self, sprites_of_name, timeout_s=DEFAULT_TIMEOUT_S):
+        """Construct a job that is due right away."""
+        self.sprites = sprites_of_name
+        self.sprite = sprites_of_name[0]
+        self.interval_s = self.sprite.fetch_interval()
+        self.timeout_s = self.sprite.fetch_timeout() or timeout_s
+        self.next_due = 0.0
+        self.started = None
+        self.future = None
+        self.failures = 0
+        self.hung = False  # timed out, with a worker still running the fetch
+
+    def __repr__(self):
+        """Print out details of a job."""
+        return "<FetchJob for {} every {} s>".format(self.sprite, self.interval_s)
+
+    def backoff(self):
+        """Get the delay before retrying after the latest failure."""
+        first = min(self.interval_s, FIRST_RETRY_S)
+        return min(first * 2 ** (self.failures - 1), max(self.interval_s, MAX_BACKOFF_S))
+
+
+class BackgroundFetcher(object):  # pylint: disable=too-many-instance-attributes
+    """Run sprite fetches on worker threads and apply their results on poll."""
+
+    def __init__(self, max_workers=2, clock=time.monotonic):
+        """Construct a fetcher. Worker threads start when the first job is added."""
+        self.max_workers = max_workers
+        self.jobs = []
+        # called from a worker thread when a fetch finishes, to wake up a poller.
+        self.on_done = None
+        self._clock = clock
+        self._queue = queue.Queue()
+        self._workers = []
+        self._lock = threading.Lock()
+        self._hung = 0  # workers running timed-out fetches
+
+    def add(self, sprites_of_name):
+        """Refresh a sprite (and the copies of it in scenes) periodically."""
+        job = FetchJob(sprites_of_name)
+        LOG.debug("Adding %s", job)
+        self.jobs.append(job)
+        with self._lock:
+            while len(self._workers) < self.max_workers + self._hung:
+                self._start_worker()
+
+    def _start_worker(self):
+        """Add a worker thread to the pool. Call with the lock held."""
+        # daemon threads so a hung fetch never keeps the process alive.
+        worker = threading.Thread(target=self._work, name="fetcher")
+        worker.daemon = True
+        worker.start()
+        self._workers.append(worker)
+
+    def poll(self):
+        """Apply finished fetches and start due ones. Call from the render thread."""
+        if not self.jobs:
+            return
+        now = self._clock()
+        for job in self.jobs:
+            if job.future is not None:
+                if job.future.done():
+                    self._finish(job, now)
+                elif job.started is not None and now - job.started > job.timeout_s:
+                    LOG.warning("%s timed out after %s s", job, job.timeout_s)
+                    job.started = None  # still running, but we've stopped waiting.
+                    job.failures += 1
+                    job.next_due = now + job.backoff()
+                    with self._lock:
+                        job.hung = True
+                        self._hung += 1
+                        self._start_worker()  # to stand in for the hung one
+            elif now >= job.next_due:
+                job.future = Future()
+                job.started = now
+                self._queue.put(job)
+
+    def expedite(self, sprites, within_s):
+        """
+        Start fetches of some sprites now if they'd come due within ``within_s``.
+
+        Jobs that are backing off after a failure are left alone.
+        """
+        wanted = {id(sprite) for sprite in sprites}
+        now = self._clock()
+        for job in self.jobs:
+            if job.future is not None or job.failures:
+                continue
+            if now < job.next_due <= now + within_s and any(
+                id(sprite) in wanted for sprite in job.sprites
+            ):
+                LOG.debug("Fetching %s early", job)
+                job.next_due = now
+
+    def _finish(self, job, now):
+        """Handle a completed fetch."""
+        future, job.future = job.future, None
+        # a fetch that returns after timing out already has its retry scheduled.
+        timed_out = job.started is None
+        job.started = None
+        error = future.exception()
+        if error is not None:
+            if not timed_out:
+                job.failures += 1
+                job.next_due = now + job.backoff()
+                LOG.warning("%s failed (%s). Retrying in %s s", job, error, job.backoff())
+            return
+        job.failures = 0
+        if not timed_out:
+            job.next_due = now + job.interval_s
+        result = future.result()
+        for sprite in job.sprites:
+            sprite.apply_fetched(result)
+
+    def _work(self):
+        """Run fetches as they are queued."""
+        while True:
+            job = self._queue.get()
+            future = job.future
+            try:
+                future.set_result(job.sprite.fetch())
+            except Exception as error:  # pylint: disable=broad-except
+                future.set_exception(error)
+            if self.on_done is not None:
+                self.on_done()
+            with self._lock:
+                if job.hung:
+                    # another worker took this one's place while it was hung.
+                    job.hung = False
+                    self._hung -= 1
+                    self._workers.remove(threading.current_thread())
+                    return
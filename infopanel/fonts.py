@@ -0,0 +1,202 @@
+"""
+BDF fonts parsed once into glyph atlases that any display can draw from.
+
+A :py:class:`FontAtlas` holds every glyph of a font as packed row bitmaps plus
+its metrics, along with the lit pixels of each glyph precomputed as offsets
+from the pen position. Displays without native text support draw text by
+setting those pixels. The rgbmatrix display keeps using the library's own
+font, which the atlas loads alongside its glyphs on demand.
+
+Fonts are loaded through :py:func:`load` and cached by file path, so every
+sprite that uses a font shares one atlas. :py:func:`preload` loads all fonts a
+config refers to at startup instead of whenever a sprite first asks.
+"""
+
+import collections
+import logging
+import os
+
+try:
+    from rgbmatrix import graphics
+except ImportError:
+    graphics = None  # only the rgbmatrix display draws with native fonts.
+
+LOG = logging.getLogger(__name__)
+
+# Glyph drawn for characters a font doesn't have, if it has this one.
+REPLACEMENT_CHAR = 0xFFFD
+DEFAULT_FONT = "5x8.bdf"
+# Fonts that built-in sprites and scenes use without being configured to.
+BUILTIN_FONTS = (DEFAULT_FONT, "9x15B.bdf")
+
+ATLASES = {}
+
+Glyph = collections.namedtuple(
+    "Glyph", ["advance", "width", "height", "x_offset", "y_offset", "rows", "pixels"]
+)
+Glyph.__doc__ = """
+One character of a font.
+
+``rows`` are the bitmap rows top to bottom, each an int with the leftmost pixel
+in its highest of ``width`` bits. ``pixels`` are the lit pixels as ``(dx, dy)``
+offsets from the pen position on the baseline.
+"""
+
+
+class FontAtlas(object):
+    """All the glyphs of one bitmap font."""
+
+    def __init__(self, path, glyphs, height, baseline, default_char=None):
+        """Construct an atlas from parsed glyphs."""
+        self.path = path
+        self.glyphs = glyphs
+        self.height = height
+        self.baseline = baseline
+        self._default = glyphs.get(REPLACEMENT_CHAR) or glyphs.get(default_char)
+        self._native = None
+
+    def __repr__(self):
+        """Print out details of an atlas."""
+        return "<FontAtlas {} with {} glyphs>".format(
+            os.path.basename(self.path), len(self.glyphs)
+        )
+
+    def glyph(self, char):
+        """Get the glyph of a character, or the default glyph if there's none."""
+        return self.glyphs.get(ord(char), self._default)
+
+    def character_width(self, char):
+        """Get how far the pen moves after drawing a character."""
+        glyph = self.glyph(char)
+        return glyph.advance if glyph else 0
+
+    def text_width(self, text):
+        """Get the width of some text in pixels."""
+        return sum(self.character_width(char) for char in text)
+
+    def clip(self, x, text, width):
+        """
+        Find the part of some text at ``x`` that lands between 0 and ``width``.
+
+        Returns the x of the first visible character, the visible characters,
+        and the width of the whole text. Glyphs entirely off either side are
+        left out so nobody has to draw them.
+        """
+        pen = x
+        first_x, start, stop = x, None, 0
+        for i, char in enumerate(text):
+            glyph = self.glyph(char)
+            if glyph is not None:
+                left = pen + glyph.x_offset
+                if left + glyph.width > 0 and left < width:
+                    if start is None:
+                        first_x, start = pen, i
+                    stop = i + 1
+                pen += glyph.advance
+        if start is None:
+            return x, "", pen - x
+        return first_x, text[start:stop], pen - x
+
+    def draw(self, set_pixel, x, y, red, green, blue, text):
+        """
+        Draw text with its baseline at ``y`` using a ``set_pixel`` function.
+
+        Returns the width of the text, like rgbmatrix's ``DrawText``.
+        """
+        start = x
+        for char in text:
+            glyph = self.glyph(char)
+            if glyph is None:
+                continue
+            for dx, dy in glyph.pixels:
+                set_pixel(x + dx, y + dy, red, green, blue)
+            x += glyph.advance
+        return x - start
+
+    def native(self):
+        """Get this font as an rgbmatrix ``graphics.Font``, loading it once."""
+        if self._native is None:
+            self._native = graphics.Font()
+            self._native.LoadFont(self.path)
+        return self._native
+
+
+def parse_bdf(path):
+    """Read a BDF font file into a :py:class:`FontAtlas`."""
+    glyphs = {}
+    height, baseline, default_char = 0, 0, None
+    with open(path, encoding="latin-1") as bdf:  # BDF files are ASCII
+        lines = iter(bdf)
+        for line in lines:
+            words = line.split()
+            if not words:
+                continue
+            if words[0] == "FONTBOUNDINGBOX":
+                height = int(words[2])
+                baseline = height + int(words[4])
+            elif words[0] == "DEFAULT_CHAR":
+                default_char = int(words[1])
+            elif words[0] == "STARTCHAR":
+                code, glyph = _parse_char(lines)
+                if code >= 0:
+                    glyphs[code] = glyph
+    return FontAtlas(path, glyphs, height, baseline, default_char)
+
+
+def _parse_char(lines):
+    """Read one character from STARTCHAR to ENDCHAR."""
+    code, advance, bbx, rows = -1, 0, (0, 0, 0, 0), []
+    for line in lines:
+        words = line.split()
+        if not words:
+            continue
+        if words[0] == "ENCODING":
+            code = int(words[-1])
+        elif words[0] == "DWIDTH":
+            advance = int(words[1])
+        elif words[0] == "BBX":
+            bbx = tuple(int(word) for word in words[1:5])
+        elif words[0] == "BITMAP":
+            for row in lines:
+                row = row.strip()
+                if row == "ENDCHAR":
+                    break
+                # rows are padded to whole bytes; keep only the glyph's width.
+                rows.append(int(row, 16) >> (4 * len(row) - bbx[0]))
+            break
+    width, height, x_offset, y_offset = bbx
+    top = -(height + y_offset)
+    pixels = tuple(
+        (x_offset + col, top + row_num)
+        for row_num, row in enumerate(rows)
+        for col in range(width)
+        if row >> (width - 1 - col) & 1
+    )
+    return code, Glyph(advance, width, height, x_offset, y_offset, tuple(rows), pixels)
+
+
+def load(path):
+    """Get the atlas of a BDF file, parsing it only the first time."""
+    path = os.path.abspath(path)
+    atlas = ATLASES.get(path)
+    if atlas is None:
+        atlas = ATLASES[path] = parse_bdf(path)
+        LOG.debug("Loaded %s", atlas)
+    return atlas
+
+
+def font_names(config):
+    """Get the names of all fonts a config refers to."""
+    names = set(BUILTIN_FONTS)
+    for sprite_conf in (config.get("sprites") or {}).values():
+        names.add(sprite_conf.get("font_name", DEFAULT_FONT))
+    return names
+
+
+def preload(names, font_dir):
+    """Load fonts up front, skipping (and logging) any that can't be read."""
+    for name in sorted(names):
+        try:
+            load(os.path.join(font_dir, name))
+        except (OSError, ValueError) as error:
+            LOG.error("Could not preload font %s: %s", name, error)
@@ -0,0 +1,161 @@
+"""
+Graphs of the recent values of data keys.
+
+These are sprites like the ones in :py:mod:`infopanel.sprites`, and are
+configured the same way with ``type: Sparkline`` or ``type: BarGraph``.
+"""
+
+import abc
+
+import numpy
+import voluptuous as vol
+
+from infopanel import clock, colors, sprites
+
+
+class Graph(
+    sprites.Sprite, metaclass=abc.ABCMeta
+):  # pylint: disable=too-many-instance-attributes
+    """
+    A plot of the recent values of a data key. Subclasses say how to draw it.
+
+    Samples are kept in a ring buffer in the data source (see
+    :py:meth:`infopanel.data.InputData.samples`) as they arrive. The plot is
+    rasterized into lit pixels grouped by color only when the key gets a new
+    value; other frames just draw those pixels. Values are scaled between
+    ``low_val`` and ``high_val``, or between the lowest and highest samples
+    shown if those aren't given, and colored with the ``cmap`` colormap.
+
+    With ``history_minutes``, the graph instead spans that many minutes of the
+    key's :py:mod:`~infopanel.history`, averaging the values in each column.
+    """
+
+    CONF = sprites.Sprite.CONF.extend(
+        {
+            vol.Required("data_label"): str,
+            vol.Optional("graph_width", default=32): vol.All(int, vol.Range(min=1)),
+            vol.Optional("graph_height", default=8): vol.All(int, vol.Range(min=1)),
+            vol.Optional("low_val", default=None): vol.Any(None, vol.Coerce(float)),
+            vol.Optional("high_val", default=None): vol.Any(None, vol.Coerce(float)),
+            vol.Optional("cmap", default="green_red"): str,
+            vol.Optional("history_minutes", default=None): vol.Any(
+                None, vol.All(vol.Coerce(float), vol.Range(min=0, min_included=False))
+            ),
+        }
+    )
+
+    def __init__(self, max_x, max_y, data_source=None):
+        """Construct a graph."""
+        sprites.Sprite.__init__(self, max_x, max_y, data_source)
+        self.data_label = None
+        self.graph_width = None
+        self.graph_height = None
+        self.low_val = None
+        self.high_val = None
+        self.cmap = None
+        self.history_minutes = None
+        self._plotted_version = None
+        self._plot = []  # (color, xs, ys)
+
+    def apply_config(self, conf):
+        """Validate and apply configuration, and start keeping samples."""
+        conf = sprites.Sprite.apply_config(self, conf)
+        self.cmap = colors.colormap(conf["cmap"])
+        self.data_source.samples(self.data_label, self.graph_width)
+        return conf
+
+    @property
+    def width(self):
+        """Width of the graph."""
+        return self.graph_width
+
+    @property
+    def height(self):
+        """Height of the graph."""
+        return self.graph_height
+
+    def _render_frame(self, display):
+        """Draw the plot, re-rasterizing it if a sample arrived."""
+        version = self.data_source.view().version(self.data_label)
+        if version != self._plotted_version:
+            self._plot = self._rasterize(self._recent_values())
+            self._plotted_version = version
+        for color, xs, ys in self._plot:
+            display.set_pixels(xs, ys, color, self.x, self.y)
+
+    def _recent_values(self):
+        """Get the values to plot, oldest first and at most one per column."""
+        store = self.data_source.history
+        if self.history_minutes and store is not None and self.data_label in store:
+            span = self.history_minutes * 60.0
+            start = clock.wall_time() - span
+            series = store.query(self.data_label, start=start)
+            columns = ((series.times - start) * self.graph_width / span).astype(int)
+            keep = (columns >= 0) & (columns < self.graph_width)
+            sums = numpy.bincount(
+                columns[keep], series.means[keep], minlength=self.graph_width
+            )
+            counts = numpy.bincount(columns[keep], minlength=self.graph_width)
+            with numpy.errstate(invalid="ignore"):
+                return sums / counts  # NaN (a gap) where a column has no values
+        samples = self.data_source.samples(self.data_label, self.graph_width)
+        _times, values = samples.arrays()
+        return values[-self.graph_width :]
+
+    def _scale(self, values):
+        """Get values scaled to 0 (low) to 1 (high), and the colors of the values."""
+        low, high = self.low_val, self.high_val
+        if low is None:
+            low = numpy.nanmin(values)
+        if high is None:
+            high = numpy.nanmax(values)
+        if high > low:
+            scaled = numpy.clip((values - low) / (high - low), 0.0, 1.0)
+        else:
+            scaled = numpy.full(values.shape, 0.5)  # nothing to compare to
+        return scaled, colors.interpolate_colors(scaled, cmap=self.cmap)
+
+    def _rasterize(self, values):
+        """Get the lit pixels of a plot of some values as ``(color, xs, ys)``."""
+        columns = numpy.arange(self.graph_width - len(values), self.graph_width)
+        shown = ~numpy.isnan(values)
+        if not shown.any():
+            return []
+        columns, values = columns[shown], values[shown]
+        scaled, rgb = self._scale(values)
+        xs, ys, which = self._points(columns, scaled)
+        plot = []
+        palette, inverse = numpy.unique(rgb[which], axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        for i, color in enumerate(palette):
+            mine = inverse == i
+            plot.append((tuple(int(c) for c in color), xs[mine], ys[mine]))
+        return plot
+
+    @abc.abstractmethod
+    def _points(self, columns, scaled):
+        """
+        Get the pixels to light for scaled values in some columns.
+
+        Returns the xs and ys of the pixels, and which value each one is for.
+        """
+
+
+class Sparkline(Graph):
+    """A line of the recent values of a data key, one pixel per value."""
+
+    def _points(self, columns, scaled):
+        ys = numpy.rint((1.0 - scaled) * (self.graph_height - 1)).astype(int)
+        return columns, ys, numpy.arange(len(columns))
+
+
+class BarGraph(Graph):
+    """Bars of the recent values of a data key, one column per value."""
+
+    def _points(self, columns, scaled):
+        heights = numpy.maximum(numpy.rint(scaled * self.graph_height), 1).astype(int)
+        which = numpy.repeat(numpy.arange(len(columns)), heights)
+        # count up from the bottom row within each bar.
+        starts = numpy.cumsum(heights) - heights
+        rows = numpy.arange(heights.sum()) - numpy.repeat(starts, heights)
+        return columns[which], self.graph_height - 1 - rows, which
@@ -4,6 +4,8 @@ import datetime
 import logging
 import os
 
+from infopanel import fonts
+
 LOG = logging.getLogger(__name__)
 
 FONTS = {}
@@ -29,21 +31,15 @@ def date():
 
 
 def load_font(name):
-    """Load a font."""
+    """Load a font from the font directory, sharing one atlas per font."""
     font = FONTS.get(name)
 
     if font is None:
         # cache it
         try:
-            from rgbmatrix import graphics  # pylint: disable=import-outside-toplevel
-
-            font = graphics.Font()
-            font.LoadFont(os.path.join(FONT_DIR, name))  # slow.
-        except ImportError:
-            LOG.error(
-                "Could not load font %s because the rgbmatrix " "library is not found.",
-                name,
-            )
+            font = fonts.load(os.path.join(FONT_DIR or "", name))
+        except (OSError, ValueError) as error:
+            LOG.error("Could not load font %s: %s", name, error)
             font = None
         FONTS[name] = font
     return font
@@ -0,0 +1,338 @@
+"""
+Long-term history of data values in a fixed amount of memory.
+
+Keeping every value that ever arrives would grow without bound on a panel that
+runs for months, so each key tracked by :py:class:`History` keeps three
+resolutions, each in fixed NumPy arrays:
+
+* the latest raw values,
+* the min, max, and mean of each minute,
+* the min, max, and mean of each hour.
+
+Queries get arrays back (a :py:class:`Series`) from the finest resolution that
+reaches back far enough. History can be saved to a compressed ``.npz`` file
+and loaded at startup, so graphs don't start empty after every restart. Saves
+run on the driver's background fetcher, off the render thread.
+"""
+
+import collections
+import logging
+import os
+import threading
+
+import numpy
+
+from infopanel import clock, data
+
+LOG = logging.getLogger(__name__)
+
+RAW = "raw"
+MINUTE = "minute"
+HOUR = "hour"
+RESOLUTIONS = (RAW, MINUTE, HOUR)
+BUCKET_S = {MINUTE: 60.0, HOUR: 3600.0}
+FILE_VERSION = 1
+
+Series = collections.namedtuple("Series", ["times", "mins", "maxs", "means"])
+Series.__doc__ = """
+Values of a key over time, oldest first.
+
+``times`` are when raw values arrived, or the starts of minutes or hours. Raw
+values have the same ``mins``, ``maxs``, and ``means``.
+"""
+
+
+class Buckets(object):
+    """The min, max, and mean of values in the latest ``size`` time buckets."""
+
+    FIELDS = ("starts", "mins", "maxs", "sums", "counts")
+
+    def __init__(self, width_s, size):
+        """Construct empty buckets ``width_s`` seconds wide."""
+        self.width_s = width_s
+        self.size = size
+        self.starts = numpy.full(size, numpy.nan)
+        self.mins = numpy.full(size, numpy.nan)
+        self.maxs = numpy.full(size, numpy.nan)
+        self.sums = numpy.zeros(size)
+        self.counts = numpy.zeros(size, dtype=numpy.int64)
+        self._latest = -1  # index of the newest bucket
+        self.dropped = False  # whether any bucket was replaced
+
+    def add(self, when, value):
+        """Add a value to the bucket of its time. Values too old to keep are dropped."""
+        start = when - when % self.width_s
+        if self._latest < 0:
+            index = self._latest = 0
+            self._reset(index, start)
+        else:
+            behind = int(round((self.starts[self._latest] - start) / self.width_s))
+            if behind < 0:
+                # a new bucket, replacing the oldest one.
+                index = self._latest = (self._latest + 1) % self.size
+                self.dropped = self.dropped or self.counts[index] > 0
+                self._reset(index, start)
+            elif behind < self.size and self.starts[self._latest - behind] == start:
+                index = self._latest - behind
+            else:
+                return
+        self.mins[index] = numpy.fmin(self.mins[index], value)
+        self.maxs[index] = numpy.fmax(self.maxs[index], value)
+        self.sums[index] += value
+        self.counts[index] += 1
+
+    def _reset(self, index, start):
+        self.starts[index] = start
+        self.mins[index] = self.maxs[index] = numpy.nan
+        self.sums[index] = 0.0
+        self.counts[index] = 0
+
+    def oldest(self):
+        """Get the start of the oldest bucket, or None if there are none."""
+        if self._latest < 0:
+            return None
+        return numpy.nanmin(self.starts)
+
+    def series(self, start=None, end=None):
+        """Get the buckets that overlap ``start`` to ``end`` as a :py:class:`Series`."""
+        order = numpy.argsort(self.starts)  # NaNs (unused buckets) sort last
+        order = order[self.counts[order] > 0]
+        starts = self.starts[order]
+        keep = numpy.ones(len(order), dtype=bool)
+        if start is not None:
+            keep &= starts + self.width_s > start
+        if end is not None:
+            keep &= starts <= end
+        order = order[keep]
+        return Series(
+            self.starts[order],
+            self.mins[order],
+            self.maxs[order],
+            self.sums[order] / self.counts[order],
+        )
+
+    def state(self):
+        """Get the arrays to save."""
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    def restore(self, state):
+        """Use saved arrays, keeping as many of the newest buckets as fit."""
+        order = numpy.argsort(state["starts"])
+        order = order[state["counts"][order] > 0]
+        self.dropped = len(order) > self.size
+        order = order[-self.size :]
+        for field in self.FIELDS:
+            values = getattr(self, field)
+            values[: len(order)] = state[field][order]
+            values[len(order) :] = 0 if field in ("sums", "counts") else numpy.nan
+        self._latest = len(order) - 1
+
+
+class KeyHistory(object):
+    """Raw values, minutes, and hours of one key."""
+
+    def __init__(self, raw_size, minutes, hours):
+        """Construct an empty history."""
+        self.raw = data.RingBuffer(raw_size)
+        self.buckets = {MINUTE: Buckets(BUCKET_S[MINUTE], minutes)}
+        self.buckets[HOUR] = Buckets(BUCKET_S[HOUR], hours)
+
+    def add(self, when, value):
+        """Record a value."""
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            value = numpy.nan
+        self.raw.append(value, when)
+        if not numpy.isnan(value):
+            for buckets in self.buckets.values():
+                buckets.add(when, value)
+
+    def covers(self, resolution, start):
+        """Check if a resolution has every value since ``start`` that was recorded."""
+        if resolution == RAW:
+            times, _values = self.raw.arrays()
+            if self.raw.version <= self.raw.size:
+                return True  # nothing has been dropped yet
+            return start is not None and len(times) > 0 and times[0] <= start
+        buckets = self.buckets[resolution]
+        if not buckets.dropped:
+            return True
+        return start is not None and buckets.oldest() <= start
+
+    def query(self, start=None, end=None, resolution=None):
+        """
+        Get values between ``start`` and ``end`` as a :py:class:`Series`.
+
+        Without a resolution, the finest one that still has all values since
+        ``start`` is used.
+        """
+        if resolution is None:
+            resolution = HOUR
+            for finer in RESOLUTIONS:
+                if self.covers(finer, start):
+                    resolution = finer
+                    break
+        if resolution != RAW:
+            return self.buckets[resolution].series(start, end)
+        times, values = self.raw.arrays()
+        keep = ~numpy.isnan(values)
+        if start is not None:
+            keep &= times >= start
+        if end is not None:
+            keep &= times <= end
+        return Series(times[keep], values[keep], values[keep], values[keep])
+
+
+class History(object):
+    """
+    Fixed-memory history of some data keys.
+
+    Parameters
+    ----------
+    raw_size : int
+        Latest raw values to keep per key.
+    minutes : int
+        Minutes of min/max/mean to keep per key.
+    hours : int
+        Hours of min/max/mean to keep per key.
+    path : str, optional
+        File to save history to and load it from.
+    save_interval_s : float, optional
+        Seconds between saves when run on a fetcher.
+    """
+
+    def __init__(
+        self, raw_size=600, minutes=1440, hours=720, path=None, save_interval_s=600.0
+    ):
+        """Construct an empty history."""
+        self.raw_size = raw_size
+        self.minutes = minutes
+        self.hours = hours
+        self.path = path
+        self.save_interval_s = save_interval_s
+        self._keys = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+
+    def __contains__(self, key):
+        """Check if a key has history."""
+        return key in self._keys
+
+    def keys(self):
+        """Get the keys with history."""
+        return list(self._keys)
+
+    def _key(self, key):
+        history = self._keys.get(key)
+        if history is None:
+            history = self._keys[key] = KeyHistory(
+                self.raw_size, self.minutes, self.hours
+            )
+        return history
+
+    def record(self, key, value, when=None):
+        """Record a value of a key. Non-numeric values are kept as gaps."""
+        with self._lock:
+            self._key(key).add(clock.wall_time() if when is None else when, value)
+            self._dirty = True
+
+    def query(self, key, start=None, end=None, resolution=None):
+        """Get a key's values as a :py:class:`Series`. See :py:meth:`KeyHistory.query`."""
+        with self._lock:
+            if key not in self._keys:
+                empty = numpy.zeros(0)
+                return Series(empty, empty, empty, empty)
+            return self._key(key).query(start, end, resolution)
+
+    def attach(self, data_source, keys):
+        """Record every value that arrives for some keys of a data source."""
+        data_source.history = self
+
+        def record(key, value):
+            self.record(key, value, data_source.updated(key))
+
+        for key in keys:
+            self._key(key)
+            data_source.subscribe(key, record)
+
+    def save(self, path=None):
+        """Write all history to a file, replacing it all at once."""
+        path = path or self.path
+        with self._lock:
+            arrays = {"version": numpy.array(FILE_VERSION)}
+            arrays["keys"] = numpy.array(list(self._keys), dtype=str)
+            for i, history in enumerate(self._keys.values()):
+                times, values = history.raw.arrays()
+                arrays["{}_raw_times".format(i)] = times
+                arrays["{}_raw_values".format(i)] = values
+                for resolution, buckets in history.buckets.items():
+                    for field, values in buckets.state().items():
+                        arrays["{}_{}_{}".format(i, resolution, field)] = values
+            self._dirty = False
+        partial = path + ".partial"
+        with open(partial, "wb") as stored:
+            numpy.savez_compressed(stored, **arrays)
+        os.replace(partial, path)
+        LOG.debug("Saved history of %d keys to %s", len(arrays["keys"]), path)
+
+    def load(self, path=None):
+        """Add history from a file saved by :py:meth:`save`."""
+        path = path or self.path
+        with numpy.load(path) as stored:
+            if int(stored["version"]) != FILE_VERSION:
+                raise ValueError("{} has an unknown history format".format(path))
+            with self._lock:
+                for i, key in enumerate(stored["keys"]):
+                    history = self._key(str(key))
+                    history.raw.extend(
+                        stored["{}_raw_times".format(i)],
+                        stored["{}_raw_values".format(i)],
+                    )
+                    for resolution, buckets in history.buckets.items():
+                        buckets.restore(
+                            {
+                                field: stored["{}_{}_{}".format(i, resolution, field)]
+                                for field in Buckets.FIELDS
+                            }
+                        )
+        LOG.info("Loaded history of %d keys from %s", len(self._keys), path)
+
+    # History saves itself like a sprite fetches; see infopanel.fetcher.
+
+    def fetch_interval(self):
+        """Get seconds between saves, or None if there's nowhere to save."""
+        return self.save_interval_s if self.path else None
+
+    def fetch_timeout(self):  # pylint: disable=no-self-use
+        """Use the default timeout for saving."""
+        return None
+
+    def fetch(self):
+        """Save if anything was recorded since the last save."""
+        if self._dirty:
+            self.save()
+
+    def apply_fetched(self, result):
+        """Nothing to do on the render thread after saving."""
+
+
+def history_factory(config, data_source):
+    """Build history from the optional ``history`` config section, or None."""
+    conf = config.get("history")
+    if not conf:
+        return None
+    history = History(
+        raw_size=conf["raw_samples"],
+        minutes=conf["minutes"],
+        hours=conf["hours"],
+        path=conf.get("path"),
+        save_interval_s=conf["save_minutes"] * 60.0,
+    )
+    if history.path and os.path.exists(history.path):
+        try:
+            history.load()
+        except (OSError, ValueError, KeyError) as error:
+            LOG.error("Could not load history from %s: %s", history.path, error)
+    history.attach(data_source, conf["keys"])
+    return history
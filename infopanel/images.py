@@ -0,0 +1,101 @@
+"""
+Sprites that show picture files.
+
+These are configured like the ones in :py:mod:`infopanel.sprites`, with
+``type: Image`` or ``type: AnimatedGif`` and the ``path`` of the file.
+"""
+
+import abc
+import os
+
+import voluptuous as vol
+
+from infopanel import sprites
+
+
+class BaseImage(sprites.Sprite, metaclass=abc.ABCMeta):
+    """Abstract image."""
+
+    CONF = sprites.Sprite.CONF.extend({"path": vol.Coerce(str)})
+
+    def apply_config(self, conf):
+        """Validate and apply configuration to this sprite."""
+        conf = sprites.Sprite.apply_config(self, conf)
+        self.set_source_path(conf["path"])
+        return conf
+
+    def _render_frame(self, display):
+        display.set_image(self.frame, self.x, self.y)
+
+    @abc.abstractmethod
+    def set_source_path(self, path):
+        """Set this image source to a new path."""
+
+    def flip_horizontal(self):
+        """Images can't flip... yet."""
+
+
+class Image(BaseImage):
+    """Bitmap image that doesn't animate."""
+
+    def __init__(self, *args, **kwargs):
+        """Construct a sprite."""
+        BaseImage.__init__(self, *args, **kwargs)
+        self._image = None
+
+    def set_source_path(self, path):
+        """Set this image source to a new path."""
+        from PIL import Image as PILImage  # pylint: disable=import-outside-toplevel
+
+        with PILImage.open(os.path.expandvars(path)) as image:
+            image.thumbnail((self.max_x, self.max_y), PILImage.LANCZOS)
+            self._image = image.convert("RGB")
+
+    @property
+    def frame(self):
+        """Get the current frame."""
+        return self._image
+
+    @property
+    def width(self):
+        """Width of the sprite."""
+        return self._image.size[0]
+
+    @property
+    def height(self):
+        """Height of the sprite."""
+        return self._image.size[1]
+
+
+class AnimatedGif(BaseImage):
+    """Animated gif sprite."""
+
+    def set_source_path(self, path):
+        """Set this image source to a new path."""
+        # pylint: disable=import-outside-toplevel
+        from PIL import Image as PILImage
+        from PIL import ImageSequence
+
+        image = PILImage.open(os.path.expandvars(path))
+        frames = [frame.copy() for frame in ImageSequence.Iterator(image)]
+        for frame in frames:
+            frame.thumbnail((self.max_x, self.max_y), PILImage.LANCZOS)
+        self.frames = [frame.convert("RGB") for frame in frames]
+        self._frame_delta = 1
+
+    def check_frame_bounds(self):
+        """Roll back to first frame if all have been seen."""
+        if self._frame_num == len(self.frames) - 1:
+            self._frame_num = 0
+
+    @property
+    def width(self):
+        """Width of the sprite."""
+        width, _height = self.frame.size
+        return width
+
+    @property
+    def height(self):
+        """Height of the sprite."""
+        _width, height = self.frame.size
+        return height
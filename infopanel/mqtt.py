@@ -1,54 +1,274 @@
 """MQTT client to get data into the display from some data source."""
 
+import json
 import logging
+import re
 
 import paho.mqtt.client as mqtt
 
 LOG = logging.getLogger(__name__)
 
 
+def parse_string(payload, path=None):  # pylint: disable=unused-argument
+    """Use the payload as-is."""
+    return payload
+
+
+def parse_number(payload, path=None):  # pylint: disable=unused-argument
+    """Read the payload as a number, or None if it isn't one."""
+    try:
+        return float(payload)
+    except ValueError:
+        LOG.warning("Payload %r is not a number", payload)
+        return None
+
+
+def parse_json(payload, path=None):
+    """
+    Read a JSON payload, optionally digging out one value.
+
+    The path is dot-separated, with integers indexing into lists, like
+    ``sensors.0.temperature``.
+    """
+    try:
+        val = json.loads(payload)
+    except ValueError:
+        LOG.warning("Payload %r is not JSON", payload)
+        return None
+    if path:
+        for part in path.split("."):
+            try:
+                val = val[int(part) if isinstance(val, list) else part]
+            except (KeyError, IndexError, TypeError, ValueError):
+                LOG.warning("Path %s not found in payload %r", path, payload)
+                return None
+    return val
+
+
+def parse_batch(payload, path=None):
+    """Read a JSON object whose entries are each a data key and its value."""
+    val = parse_json(payload, path)
+    if not isinstance(val, dict):
+        LOG.warning("Batch payload %r is not a JSON object", payload)
+        return {}
+    return {str(key): item for key, item in val.items()}
+
+
+PARSERS = {
+    "string": parse_string,
+    "number": parse_number,
+    "json": parse_json,
+    "batch": parse_batch,
+}
+
+
+class Route(object):
+    """
+    Where messages on a topic (pattern) go in the data.
+
+    Topics may contain the MQTT ``+`` and ``#`` wildcards. If no key is given,
+    the last segment of the incoming topic is used as the data key. Batch routes
+    have no key; each of their messages carries many keys and values.
+    """
+
+    def __init__(self, topic, key=None, parser="string", path=None):
+        """Construct a route."""
+        self.topic = topic
+        self.key = key
+        self.path = path
+        self._parse = PARSERS[parser]
+        self.batch = parser == "batch"
+        self.wildcard = "+" in topic or "#" in topic
+        self._regex = re.compile(topic_regex(topic)) if self.wildcard else None
+
+    def __repr__(self):
+        """Print out details of a route."""
+        return "<Route {} -> {}>".format(self.topic, self.key or "[last segment]")
+
+    def matches(self, topic):
+        """Check if a concrete topic is covered by this route."""
+        if self._regex is None:
+            return topic == self.topic
+        return self._regex.match(topic) is not None
+
+    def key_for(self, topic):
+        """Get the data key for a message on a topic."""
+        return self.key or topic.split("/")[-1]
+
+    def parse(self, payload):
+        """Convert a decoded payload into a data value."""
+        return self._parse(payload, self.path)
+
+
+def topic_regex(topic):
+    """Convert an MQTT topic filter with wildcards into a regular expression."""
+    regex = ""
+    for i, level in enumerate(topic.split("/")):
+        if level == "#":
+            # matches the parent level itself and everything below it.
+            return regex + ("(/.*)?$" if i else ".*$")
+        if i:
+            regex += "/"
+        regex += "[^/]*" if level == "+" else re.escape(level)
+    return regex + "$"
+
+
+class RoutingTable(object):
+    """
+    Compiled set of routes.
+
+    A message goes to every route that covers its topic, so one topic can feed
+    several keys (e.g. different paths into the same JSON). The routes of each
+    topic are worked out once, with a dict lookup of exact topics and a pass
+    over the wildcard patterns, and remembered for the topic's next message.
+    """
+
+    MAX_CACHED_TOPICS = 4096
+
+    def __init__(self, routes):
+        """Construct a routing table."""
+        self.routes = list(routes)
+        self._exact = {}
+        self._wildcards = []
+        for route in self.routes:
+            if route.wildcard:
+                self._wildcards.append(route)
+            else:
+                self._exact.setdefault(route.topic, []).append(route)
+        self._cache = {}
+
+    def lookup(self, topic):
+        """Find the routes for a concrete topic, in config order."""
+        routes = self._cache.get(topic)
+        if routes is None:
+            routes = self._exact.get(topic, []) + [
+                route for route in self._wildcards if route.matches(topic)
+            ]
+            routes.sort(key=self.routes.index)
+            if len(self._cache) >= self.MAX_CACHED_TOPICS:
+                self._cache.clear()
+            self._cache[topic] = routes
+        return routes
+
+    def subscriptions(self, bound_keys=None):
+        """
+        Get the topic filters to subscribe to.
+
+        If ``bound_keys`` is given, routes into keys that nothing uses are left
+        out so the broker never sends those messages. Routes without a fixed key
+        can't be judged that way and are always kept.
+        """
+        topics = []
+        for route in self.routes:
+            if bound_keys is not None and route.key and route.key not in bound_keys:
+                LOG.debug("Not subscribing to unused %s", route)
+                continue
+            if route.topic not in topics:
+                topics.append(route.topic)
+        return topics
+
+
+def routing_table_factory(conf):
+    """Build the routing table from MQTT config."""
+    conf = conf or {}
+    routes = [
+        Route(
+            route["topic"],
+            route.get("key"),
+            route.get("parser", "string"),
+            route.get("path"),
+        )
+        for route in conf.get("routes") or []
+    ]
+    if conf.get("topic"):
+        # the catch-all topic keys data by the last part of the topic.
+        routes.append(Route(conf["topic"]))
+    if not routes:
+        LOG.warning("No MQTT topic or routes, so nothing is subscribed")
+    return RoutingTable(routes)
+
+
 class MQTTClient(object):
     """MQTT Client."""
 
-    def __init__(self, data_container, conf):
-        """Construct the MQTT client."""
+    def __init__(self, data_container, conf, bound_keys=None, client_factory=None):
+        """
+        Construct the MQTT client.
+
+        ``client_factory`` builds the underlying paho-style client from a client
+        id. It defaults to ``paho.mqtt.client.Client`` and is mostly there so
+        tests and benchmarks can plug in a local stand-in for a broker.
+        """
         self._client = None
+        self._client_factory = client_factory or mqtt.Client
         self._data_container = data_container
         self.conf = conf
+        self.routes = routing_table_factory(conf)
+        self.bound_keys = bound_keys
 
     def on_connect(
         self, client, userdata, flags, rc
     ):  # pylint: disable=unused-argument, invalid-name
         """Do callback for when MQTT server connects."""
         LOG.info("Connected with result code %d", rc)
-        client.subscribe(self.conf["topic"])  # subscribe in case we get disconnected
+        # subscribe here in case we get disconnected
+        for topic in self.routes.subscriptions(self.bound_keys):
+            client.subscribe(topic)
 
     def on_message(self, client, userdata, msg):  # pylint: disable=unused-argument
         """Do callback for when MQTT receives a message."""
-        LOG.debug("%s %s", msg.topic, str(msg.payload))
-        key = msg.topic.split("/")[-1]
+        routes = self.routes.lookup(msg.topic)
+        if not routes:
+            return
         # convert all payloads to str since they come in as b'' in Python3.
         # The one setting that is an int auto-converts in driver.
         if isinstance(msg.payload, bytes):
             payload = msg.payload.decode()
         else:
             payload = msg.payload
-        self._data_container[key] = payload
+        values = {}
+        for route in routes:
+            if route.batch:
+                values.update(route.parse(payload))
+            else:
+                values[route.key_for(msg.topic)] = route.parse(payload)
+        # all values land together so no frame sees half of a message.
+        if len(values) == 1:
+            key, value = values.popitem()
+            self._data_container[key] = value
+        else:
+            self._data_container.update(values)
 
     def start(self):
-        """Connect to the MQTT server."""
+        """Connect to the MQTT server and handle traffic on a background thread."""
+        self.connect()
+        self._client.loop_start()
+
+    def connect(self, prepare=None):
+        """
+        Connect to the MQTT server without starting a network thread.
+
+        ``prepare`` is called with the underlying client before connecting, so
+        callers that drive the network themselves (like the asyncio runner) can
+        hook into its sockets.
+        """
         conf = self.conf
         LOG.info("Connecting to MQTT server at %s", conf["broker"])
-        self._client = mqtt.Client(conf["client_id"])
+        self._client = self._client_factory(conf["client_id"])
         self._client.on_connect = self.on_connect
         self._client.on_message = self.on_message
         if conf.get("username"):
             self._client.username_pw_set(conf["username"], conf["password"])
         if conf.get("certificate"):
             self._client.tls_set(conf["certificate"])
+        if prepare is not None:
+            prepare(self._client)
         self._client.connect(conf["broker"], conf["port"], conf["keepalive"])
-        self._client.loop_start()
 
     def stop(self):
         """End the MQTT connection."""
         self._client.loop_stop()
+
+    def disconnect(self):
+        """End an MQTT connection made with :py:meth:`connect`."""
+        self._client.disconnect()
@@ -0,0 +1,175 @@
+"""
+Profiles of the render loop, one per scene.
+
+Run with ``python -m infopanel --profile DIR`` to find out what a slow scene
+spends its time on without attaching a profiler by hand. The driver switches
+profiles whenever it changes scenes, so each scene's time is counted apart from
+the others. Once a scene has drawn ``--profile-frames`` frames, its profile is
+written to ``DIR`` and that scene is no longer profiled. Scenes that haven't
+drawn that many frames yet are written when the panel quits.
+
+Profiles come in two formats:
+
+* ``pstats`` -- :py:mod:`cProfile` stats in ``<scene>-<frames>frames.pstats``,
+  for ``python -m pstats`` or snakeviz.
+* ``collapsed`` -- stacks sampled every few milliseconds in
+  ``<scene>-<frames>frames.collapsed``, one ``outer;inner count`` line per
+  stack, for flamegraph.pl or speedscope. Sampling costs much less than
+  cProfile on slow hardware.
+"""
+
+import collections
+import cProfile
+import logging
+import os
+import sys
+import threading
+import time
+
+LOG = logging.getLogger(__name__)
+
+FORMATS = ("pstats", "collapsed")
+DEFAULT_FRAMES = 600
+SAMPLE_INTERVAL_S = 0.005
+
+
+class CProfile(object):
+    """Deterministic profile of the thread that starts it."""
+
+    suffix = "pstats"
+
+    def __init__(self):
+        """Construct an idle profile."""
+        self._profile = cProfile.Profile()
+
+    def start(self):
+        """Start or resume profiling the calling thread."""
+        self._profile.enable()
+
+    def stop(self):
+        """Pause profiling."""
+        self._profile.disable()
+
+    def dump(self, path):
+        """Write the stats."""
+        self._profile.dump_stats(path)
+
+
+class StackSampler(object):
+    """Stacks of one thread sampled from a background thread."""
+
+    suffix = "collapsed"
+
+    def __init__(self, interval_s=SAMPLE_INTERVAL_S):
+        """Construct an idle sampler."""
+        self.interval_s = interval_s
+        self.counts = collections.Counter()
+        self._target = None
+        self._thread = None
+
+    def start(self):
+        """Start or resume sampling the calling thread."""
+        self._target = threading.get_ident()
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._sample, name="profiler")
+            self._thread.daemon = True
+            self._thread.start()
+
+    def stop(self):
+        """Pause sampling."""
+        self._target = None
+
+    def _sample(self):
+        while self._thread is threading.current_thread():
+            target = self._target
+            frame = sys._current_frames().get(target)  # pylint: disable=protected-access
+            if frame is not None:
+                self.counts[_collapse(frame)] += 1
+            time.sleep(self.interval_s)
+
+    def dump(self, path):
+        """Stop the sampling thread and write the sampled stacks."""
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            # let it finish its last sample so the counts hold still.
+            thread.join()
+        with open(path, "w", encoding="utf-8") as collapsed:
+            for stack, count in sorted(self.counts.items()):
+                collapsed.write("{} {}\n".format(stack, count))
+
+
+def _collapse(frame):
+    """Get a stack as ``outer;inner`` function names."""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(
+            "{}:{}".format(os.path.basename(code.co_filename), code.co_name)
+        )
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class SceneProfiler(object):
+    """Keep a profile per scene and write each out after enough frames."""
+
+    def __init__(self, out_dir, frames=DEFAULT_FRAMES, fmt="pstats"):
+        """Construct a profiler that writes to ``out_dir``."""
+        if fmt not in FORMATS:
+            raise ValueError(
+                "Unknown profile format {}. Use one of {}".format(fmt, FORMATS)
+            )
+        self.out_dir = out_dir
+        self.frames = frames
+        self.fmt = fmt
+        self.written = []
+        self._profiles = {}  # scene name: profile
+        self._frame_counts = collections.Counter()
+        self._done = set()
+        self._scene = None
+
+    def _profile(self, scene_name):
+        profile = self._profiles.get(scene_name)
+        if profile is None:
+            profile = CProfile() if self.fmt == "pstats" else StackSampler()
+            self._profiles[scene_name] = profile
+        return profile
+
+    def switch(self, scene_name):
+        """Stop profiling the current scene and start (or resume) another one."""
+        if self._scene is not None and self._scene not in self._done:
+            self._profiles[self._scene].stop()
+        self._scene = scene_name
+        if scene_name not in self._done:
+            self._profile(scene_name).start()
+
+    def frame_drawn(self):
+        """Count a frame of the current scene, writing its profile once it has enough."""
+        scene_name = self._scene
+        if scene_name is None or scene_name in self._done:
+            return
+        self._frame_counts[scene_name] += 1
+        if self._frame_counts[scene_name] >= self.frames:
+            self._profiles[scene_name].stop()
+            self._write(scene_name)
+
+    def close(self):
+        """Write the profiles of scenes that haven't been written yet."""
+        if self._scene is not None and self._scene not in self._done:
+            self._profiles[self._scene].stop()
+        for scene_name in list(self._profiles):
+            if scene_name not in self._done and self._frame_counts[scene_name]:
+                self._write(scene_name)
+
+    def _write(self, scene_name):
+        os.makedirs(self.out_dir, exist_ok=True)
+        profile = self._profiles[scene_name]
+        frames = self._frame_counts[scene_name]
+        path = os.path.join(
+            self.out_dir,
+            "{}-{}frames.{}".format(scene_name, frames, profile.suffix),
+        )
+        profile.dump(path)
+        self._done.add(scene_name)
+        self.written.append(path)
+        LOG.info("Wrote profile of %d frames of %s to %s", frames, scene_name, path)
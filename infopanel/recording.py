@@ -0,0 +1,149 @@
+"""
+Record rendered frames to disk.
+
+:py:class:`RecordingDisplay` is an :py:class:`~infopanel.display.ArrayDisplay`
+that hands a copy of every finished frame, with its time, to a writer thread.
+The render loop only pays for the copy; encoding and disk writes happen on the
+writer thread. If the writer falls behind, frames are dropped (and counted)
+rather than slowing down the panel.
+
+Frames go either to a compact raw stream (see :py:func:`read_raw` to play one
+back) or to a sequence of PNG files with their times in ``frames.txt``.
+"""
+
+import contextlib
+import logging
+import os
+import queue
+import struct
+import threading
+
+import numpy
+
+from infopanel import clock, display
+
+LOG = logging.getLogger(__name__)
+
+RAW_MAGIC = b"INFOPANEL-RAW1"
+RAW_HEADER = struct.Struct("<HH")  # width, height
+RAW_FRAME = struct.Struct("<d")  # seconds since recording started
+MAX_PENDING_FRAMES = 120
+FORMATS = ("raw", "png")
+
+
+class RawWriter(object):
+    """Write frames to a single file of timestamped raw RGB frames."""
+
+    def __init__(self, path):
+        """Construct a writer. The file is created on the first frame."""
+        self.path = path
+        self._files = contextlib.ExitStack()
+        self._file = None
+
+    def write(self, timestamp, frame):
+        """Append a frame."""
+        if self._file is None:
+            self._file = self._files.enter_context(open(self.path, "wb"))
+            height, width, _colors = frame.shape
+            self._file.write(RAW_MAGIC + RAW_HEADER.pack(width, height))
+        self._file.write(RAW_FRAME.pack(timestamp))
+        self._file.write(frame.tobytes())
+
+    def close(self):
+        """Finish the file."""
+        self._files.close()
+
+
+class PngWriter(object):
+    """Write frames as numbered PNG files in a directory."""
+
+    def __init__(self, path):
+        """Construct a writer. The directory is created if needed."""
+        self.path = path
+        self.count = 0
+        self._files = contextlib.ExitStack()
+        self._index = None
+
+    def write(self, timestamp, frame):
+        """Write a frame to the next PNG file."""
+        from PIL import Image  # pylint: disable=import-outside-toplevel
+
+        if self._index is None:
+            os.makedirs(self.path, exist_ok=True)
+            self._index = self._files.enter_context(
+                open(os.path.join(self.path, "frames.txt"), "w", encoding="utf-8")
+            )
+        self.count += 1
+        name = "frame{:06d}.png".format(self.count)
+        Image.fromarray(frame).save(os.path.join(self.path, name))
+        self._index.write("{:.6f} {}\n".format(timestamp, name))
+
+    def close(self):
+        """Finish the index of frames."""
+        self._files.close()
+
+
+def writer_factory(path, fmt="raw"):
+    """Make a frame writer for a format."""
+    if fmt == "raw":
+        return RawWriter(path)
+    if fmt == "png":
+        return PngWriter(path)
+    raise ValueError("Unknown recording format {}. Use one of {}".format(fmt, FORMATS))
+
+
+class RecordingDisplay(display.ArrayDisplay):
+    """A headless display that records every frame it shows."""
+
+    def __init__(self, writer, width=64, height=32, max_pending=MAX_PENDING_FRAMES):
+        """Construct a display and start its writer thread."""
+        display.ArrayDisplay.__init__(self, width, height)
+        self.writer = writer
+        self.dropped = 0
+        self._start = clock.now()
+        self._pending = queue.Queue(max_pending)
+        self._thread = threading.Thread(target=self._write, name="recorder")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def buffer(self):
+        """Keep the finished frame and queue it for writing."""
+        display.ArrayDisplay.buffer(self)
+        try:
+            self._pending.put_nowait((clock.now() - self._start, self.frame))
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        """Write out the frames still queued and close the recording."""
+        self._pending.put(None)
+        self._thread.join()
+        self.writer.close()
+        if self.dropped:
+            LOG.warning("Dropped %d frames while recording", self.dropped)
+
+    def _write(self):
+        while True:
+            item = self._pending.get()
+            if item is None:
+                break
+            try:
+                self.writer.write(*item)
+            except Exception:  # pylint: disable=broad-except
+                LOG.exception("Could not record a frame")
+
+
+def read_raw(path):
+    """Play back a raw recording as ``(timestamp, frame)`` pairs."""
+    with open(path, "rb") as stream:
+        if stream.read(len(RAW_MAGIC)) != RAW_MAGIC:
+            raise ValueError("{} is not a raw infopanel recording".format(path))
+        width, height = RAW_HEADER.unpack(stream.read(RAW_HEADER.size))
+        frame_size = width * height * 3
+        while True:
+            stamp = stream.read(RAW_FRAME.size)
+            if len(stamp) < RAW_FRAME.size:
+                return
+            (timestamp,) = RAW_FRAME.unpack(stamp)
+            pixels = numpy.frombuffer(stream.read(frame_size), dtype=numpy.uint8)
+            yield timestamp, pixels.reshape((height, width, 3))
@@ -0,0 +1,115 @@
+"""
+Lookup of sprite and scene types by name.
+
+Built-in types live in :py:mod:`infopanel.sprites`, :py:mod:`infopanel.graphs`,
+:py:mod:`infopanel.images` and :py:mod:`infopanel.scenes`.
+Third-party packages can add their own by declaring entry points in the
+``infopanel.sprites`` or ``infopanel.scenes`` groups, e.g. in their ``setup.py``::
+
+    entry_points={"infopanel.sprites": ["Weather = infopanel_weather:Weather"]}
+
+Only the entry point *names* are read at startup. A plugin module is imported
+the first time a config actually asks for one of its types, so panels only pay
+the import time and memory for the things they show.
+"""
+
+import importlib
+import inspect
+import logging
+
+try:
+    from importlib import metadata
+except ImportError:  # python < 3.8
+    metadata = None
+
+LOG = logging.getLogger(__name__)
+
+SPRITE_GROUP = "infopanel.sprites"
+SCENE_GROUP = "infopanel.scenes"
+
+
+def _iter_entry_points(group):
+    """Get the entry points of a group without loading any of them."""
+    if metadata is None:
+        # pylint: disable=import-outside-toplevel
+        import pkg_resources
+
+        return list(pkg_resources.iter_entry_points(group))
+    entry_points = metadata.entry_points()
+    if hasattr(entry_points, "select"):
+        return list(entry_points.select(group=group))
+    return list(entry_points.get(group, []))
+
+
+class Registry(object):
+    """Type names mapped to classes, loaded on demand."""
+
+    def __init__(self, group, *builtin_modules):
+        """Construct a registry for an entry point group and built-in modules."""
+        self.group = group
+        self._builtin_modules = builtin_modules
+        self._builtins = None
+        self._entry_points = None
+        self._loaded = {}
+
+    def _get_builtins(self):
+        if self._builtins is None:
+            self._builtins = {}
+            for module_name in self._builtin_modules:
+                module = importlib.import_module(module_name)
+                self._builtins.update(
+                    (name, cls)
+                    for name, cls in inspect.getmembers(module, inspect.isclass)
+                    if not inspect.isabstract(cls)  # bases like Graph can't be drawn
+                )
+        return self._builtins
+
+    def _get_entry_points(self):
+        if self._entry_points is None:
+            self._entry_points = {ep.name: ep for ep in _iter_entry_points(self.group)}
+        return self._entry_points
+
+    def register(self, name, cls):
+        """Add a class under a type name, overriding anything else of that name."""
+        self._loaded[name] = cls
+
+    def names(self):
+        """Get all known type names. This never imports plugins."""
+        known = set(self._get_builtins())
+        known.update(self._get_entry_points())
+        known.update(self._loaded)
+        return sorted(known)
+
+    def __contains__(self, name):
+        """Check if a type name is known, without importing plugins."""
+        return (
+            name in self._loaded
+            or name in self._get_builtins()
+            or name in self._get_entry_points()
+        )
+
+    def get(self, name):
+        """
+        Get the class for a type name, importing its plugin if needed.
+
+        Raises
+        ------
+        KeyError
+            If nothing is registered under that name.
+        """
+        cls = self._loaded.get(name)
+        if cls is not None:
+            return cls
+        cls = self._get_builtins().get(name)
+        if cls is None:
+            entry_point = self._get_entry_points()[name]
+            LOG.info("Loading %s plugin for %s", self.group, name)
+            cls = entry_point.load()
+        self._loaded[name] = cls
+        return cls
+
+
+SPRITES = Registry(
+    SPRITE_GROUP, "infopanel.sprites", "infopanel.graphs", "infopanel.images"
+)
+SCENES = Registry(SCENE_GROUP, "infopanel.scenes")
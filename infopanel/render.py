@@ -0,0 +1,133 @@
+"""
+Rasterize text into arrays using the glyph metrics of BDF fonts.
+
+This lets displays without native text support (and benchmarks of text-heavy
+scenes off-device) draw text with the same widths and pixels as the rgbmatrix
+library. Rendered strings are cached as boolean masks, so text that doesn't
+change from frame to frame, which is most of it, costs one array copy to draw.
+"""
+
+import collections
+
+import numpy
+
+MAX_RUNS = 512
+
+
+TextRun = collections.namedtuple("TextRun", ["mask", "top", "left", "width"])
+TextRun.__doc__ = """
+A rendered string.
+
+``mask`` is True where pixels are lit. Its top-left corner is at ``(left, top)``
+relative to the pen position on the baseline, and ``width`` is how far the pen
+moves after the string.
+"""
+
+
+class TextRenderer(object):
+    """Render strings with font atlases and remember the results."""
+
+    def __init__(self, max_runs=MAX_RUNS):
+        """Construct a renderer that caches up to ``max_runs`` strings."""
+        self.max_runs = max_runs
+        self.hits = 0
+        self.misses = 0
+        self._runs = collections.OrderedDict()
+
+    def render(self, atlas, text):
+        """Get a :py:class:`TextRun` of some text in a font."""
+        key = (atlas.path, text)
+        run = self._runs.get(key)
+        if run is not None:
+            self.hits += 1
+            self._runs.move_to_end(key)
+            return run
+        self.misses += 1
+        run = self._runs[key] = rasterize(atlas, text)
+        if len(self._runs) > self.max_runs:
+            self._runs.popitem(last=False)
+        return run
+
+
+def rasterize(atlas, text):
+    """Draw text into a new :py:class:`TextRun`."""
+    points = []
+    pen = 0
+    for char in text:
+        glyph = atlas.glyph(char)
+        if glyph is None:
+            continue
+        points.extend((pen + dx, dy) for dx, dy in glyph.pixels)
+        pen += glyph.advance
+    if not points:
+        return TextRun(numpy.zeros((0, 0), dtype=bool), 0, 0, pen)
+    xs, ys = numpy.array(points).T
+    left, top = xs.min(), ys.min()
+    mask = numpy.zeros((ys.max() - top + 1, xs.max() - left + 1), dtype=bool)
+    mask[ys - top, xs - left] = True
+    return TextRun(mask, int(top), int(left), pen)
+
+
+class Strip(object):
+    """
+    Colored text rendered once into an image, to be shown a window at a time.
+
+    ``pixels`` is an RGB array and ``lit`` is True where text was drawn. The
+    image's top-left corner is ``(left, top)`` from the pen position on the
+    baseline, and ``width`` is how far the pen moves. Lit pixels are also kept
+    sorted by column and grouped by color so that the lit pixels of any window
+    can be found without scanning the whole strip.
+    """
+
+    def __init__(self, pixels, lit, top, left, width):
+        """Construct a strip."""
+        self.pixels = pixels
+        self.lit = lit
+        self.top = top
+        self.left = left
+        self.width = width
+        self._columns = []  # (color, xs, ys) sorted by x
+        for color in numpy.unique(pixels[lit], axis=0):
+            ys, xs = numpy.nonzero(lit & (pixels == color).all(axis=2))
+            order = numpy.argsort(xs, kind="stable")
+            self._columns.append((tuple(int(c) for c in color), xs[order], ys[order]))
+
+    @property
+    def height(self):
+        """Height of the strip in pixels."""
+        return self.lit.shape[0]
+
+    def window(self, left, right):
+        """Get ``(color, xs, ys)`` of the lit pixels in columns ``left`` to ``right``."""
+        for color, xs, ys in self._columns:
+            start, stop = numpy.searchsorted(xs, (left, right))
+            if stop > start:
+                yield color, xs[start:stop], ys[start:stop]
+
+
+def render_strip(atlas, segments, renderer=None):
+    """Render ``(text, color)`` segments next to each other into a :py:class:`Strip`."""
+    renderer = renderer or TEXT
+    runs = []
+    pen = 0
+    for text, color in segments:
+        run = renderer.render(atlas, text)
+        runs.append((pen, run, color))
+        pen += run.width
+    runs = [(x, run, color) for x, run, color in runs if run.mask.size]
+    top = min([run.top for _x, run, _c in runs] or [0])
+    bottom = max([run.top + run.mask.shape[0] for _x, run, _c in runs] or [0])
+    left = min([0] + [x + run.left for x, run, _c in runs])
+    right = max([pen] + [x + run.left + run.mask.shape[1] for x, run, _c in runs])
+    pixels = numpy.zeros((bottom - top, right - left, 3), dtype=numpy.uint8)
+    lit = numpy.zeros((bottom - top, right - left), dtype=bool)
+    for x, run, color in runs:
+        height, width = run.mask.shape
+        rows = slice(run.top - top, run.top - top + height)
+        cols = slice(x + run.left - left, x + run.left - left + width)
+        pixels[rows, cols][run.mask] = color
+        lit[rows, cols] |= run.mask
+    return Strip(pixels, lit, top, left, pen)
+
+
+TEXT = TextRenderer()
@@ -1,13 +1,10 @@
 """Scenes. One of these will be active at any given time."""
 
-import time
-import inspect
-import sys
 import copy
 import logging
 import datetime
 
-from infopanel import sprites, helpers
+from infopanel import sprites, helpers, registry
 
 LOG = logging.getLogger(__name__)
 SCENE_BLANK = "blank"
@@ -21,15 +18,39 @@ class Scene(object):
         self.width = width
         self.height = height
         self.sprites = []
+        self.fixed_frame_rate = None  # set from config to override the guess
 
     def draw_frame(self, display):
         """Render all sprites in this scene to display."""
         for sprite in self.sprites:
             sprite.render(display)
 
+    def frame_rate(self):
+        """
+        Get the frames per second this scene needs.
+
+        Unless the config sets one, this is the most any of its sprites need, so
+        a dashboard of static text redraws rarely while moving sprites get a
+        smooth frame rate.
+        """
+        if self.fixed_frame_rate:
+            return self.fixed_frame_rate
+        rates = [sprite.needed_frame_rate() for sprite in self.sprites]
+        return max(rates) if rates else sprites.STATIC_FRAME_RATE
+
     def apply_config(self, conf, existing_sprites):
         """Apply optional extra config."""
 
+    def prepare(self):
+        """
+        Get ready to be shown soon.
+
+        The driver calls this as soon as it has picked this scene to be next,
+        a whole scene duration before switching to it, and starts any fetches
+        of its sprites that would come due while it is up. Scenes that load
+        something else before they can draw can start on it here.
+        """
+
     def reinit(self):
         """Reinitialize when scene comes back up on the screen."""
         for sprite in self.sprites:
@@ -37,11 +58,15 @@ class Scene(object):
 
 
 class Blank(Scene):
-    """Just a blank screen."""
+    """
+    Just a blank screen.
+
+    The driver suspends the display instead of drawing this scene, so this
+    is only drawn if something asks for it directly.
+    """
 
     def draw_frame(self, display):
         """Draw a blank frame."""
-        time.sleep(1.0)
 
 
 class Welcome(Scene):
@@ -81,9 +106,9 @@ class Giraffes(Scene):
         self._extra_phrase_frequency = extra_phrase_frequency or 1
         self.sprites = [sprites.Giraffe(width, height) for _i in range(3)]
         self.sprites[1].flip_horizontal()
-        self.sprites[1].dx = -1
+        self.sprites[1].vx = -self.sprites[1].vx
         self.sprites[1].y = 18
-        self.sprites[2].ticks_per_movement = 2
+        self.sprites[2].vx /= 2
         self.sprites[2].y = 10
         for (x, y) in [(30, 10), (10, 20), (40, 5)]:
             plant = sprites.Plant(width, height)
@@ -108,20 +133,20 @@ def scene_factory(
 ):  # pylint: disable=too-many-locals
     """Build scenes from config."""
     scenes = {SCENE_BLANK: Blank(width, height)}  # alway add blank scene for suspend
-    cls = None
     for name, scene_data in conf.items():  # pylint: disable=too-many-nested-blocks
-        for cls_name, cls in inspect.getmembers(sys.modules[__name__]):
-            if scene_data["type"] == cls_name:
-                break
-        else:
-            raise ValueError("{} is invalid active_scene".format(name))
+        try:
+            cls = registry.SCENES.get(scene_data["type"])
+        except KeyError as err:
+            raise ValueError("{} is invalid active_scene".format(name)) from err
         del scene_data["type"]
         if "sprites" in scene_data:
             sprites_to_add = scene_data.pop("sprites")
         else:
             sprites_to_add = []
+        frame_rate = scene_data.pop("frame_rate", None)
         LOG.debug("Initializing %s", cls)
         scene = cls(width, height, **scene_data)
+        scene.fixed_frame_rate = frame_rate
         for sprite_data in sprites_to_add:
             for spritename, spriteparams in sprite_data.items():  # should be only one
                 # each active_scene gets independent copies of the sprites because scenes
@@ -130,6 +155,7 @@ def scene_factory(
                 sprite = copy.copy(existing_sprites[spritename][0])
                 existing_sprites[spritename].append(sprite)  # track the copies by name
                 if spriteparams is not None:
+                    spriteparams = sprites.ticks_to_seconds(spriteparams, sprite)
                     for param, val in spriteparams.items():
                         if not hasattr(sprite, param):
                             raise ValueError(
@@ -0,0 +1,145 @@
+"""
+Modes and brightness that change with the time of day.
+
+The optional ``schedule`` config section lists daily time windows, each with a
+mode and maybe a brightness. At startup the windows are compiled into a table
+of transitions sorted by time of day, holding what should be showing from each
+transition until the next one. The driver then only compares the clock against
+the time of the next transition each frame, no matter how many windows there
+are, and looks in the table only when a transition is due. That time is worked
+out on the local calendar after each transition, so daylight saving changes and
+clock corrections move it along with the wall clock.
+
+Scheduled changes are sent through the data like MQTT commands, so a command
+that arrives during a window stays in effect until the next transition.
+"""
+
+import bisect
+import collections
+import datetime
+import logging
+
+LOG = logging.getLogger(__name__)
+
+DAY_S = 24 * 60 * 60
+
+Transition = collections.namedtuple("Transition", ["at_s", "mode", "brightness"])
+Transition.__doc__ = """
+From ``at_s`` seconds after midnight, show ``mode`` at ``brightness`` (None for
+no change).
+"""
+
+
+def parse_time(text):
+    """Get seconds after midnight from ``HH:MM`` or ``HH:MM:SS``."""
+    try:
+        parts = [int(part) for part in str(text).split(":")]
+    except ValueError:
+        parts = []
+    if len(parts) not in (2, 3):
+        raise ValueError("{} is not a time like 07:30".format(text))
+    hours, minutes, seconds = (parts + [0])[:3]
+    if not (0 <= hours < 24 and 0 <= minutes < 60 and 0 <= seconds < 60):
+        raise ValueError("{} is not a time of day".format(text))
+    return 3600 * hours + 60 * minutes + seconds
+
+
+def local_time_of_day(when=None):
+    """Get seconds since midnight, local time, of a time since the epoch or now."""
+    if when is None:
+        now = datetime.datetime.now()
+    else:
+        now = datetime.datetime.fromtimestamp(when)
+    return 3600 * now.hour + 60 * now.minute + now.second + now.microsecond / 1e6
+
+
+class Window(object):  # pylint: disable=too-few-public-methods
+    """A daily time window of a mode. It may run past midnight."""
+
+    def __init__(self, start, end, mode, brightness=None):
+        """Construct a window from ``HH:MM`` times."""
+        self.start = parse_time(start)
+        self.end = parse_time(end)
+        if self.start == self.end:
+            raise ValueError("Window of {} starts when it ends".format(mode))
+        self.mode = mode
+        self.brightness = brightness
+
+    def contains(self, at_s):
+        """Check if a time of day is in this window."""
+        if self.start < self.end:
+            return self.start <= at_s < self.end
+        return at_s >= self.start or at_s < self.end
+
+
+class Schedule(object):
+    """
+    Daily transitions between modes.
+
+    Where windows overlap, the one listed last wins. Outside of all windows
+    the panel shows ``default_mode``.
+    """
+
+    def __init__(self, windows, default_mode):
+        """Compile windows into a table of transitions."""
+        self.windows = windows
+        self.default_mode = default_mode
+        self.transitions = self._compile()
+        self._times = [transition.at_s for transition in self.transitions]
+
+    def _compile(self):
+        boundaries = sorted(
+            {window.start for window in self.windows}
+            | {window.end for window in self.windows}
+        )
+        transitions = []
+        for at_s in boundaries:
+            mode, brightness = self.default_mode, None
+            for window in self.windows:
+                if window.contains(at_s):
+                    mode, brightness = window.mode, window.brightness
+            if transitions and transitions[-1][1:] == (mode, brightness):
+                continue
+            transitions.append(Transition(at_s, mode, brightness))
+        LOG.debug("Compiled schedule: %s", transitions)
+        return transitions
+
+    def state_at(self, at_s):
+        """Get the :py:class:`Transition` in effect at a time of day, or None."""
+        if not self.transitions:
+            return None
+        # before the first transition of the day, yesterday's last one holds.
+        return self.transitions[bisect.bisect_right(self._times, at_s) - 1]
+
+    def next_due(self, when):
+        """
+        Get the time since the epoch of the first transition after ``when``.
+
+        Transition times are local times of day, so this goes by the calendar:
+        on the day clocks change, the next transition may be an hour more or
+        less away than its time of day suggests.
+        """
+        if not self.transitions:
+            return float("inf")
+        moment = datetime.datetime.fromtimestamp(when)
+        midnight = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+        i = bisect.bisect_right(self._times, local_time_of_day(when))
+        while True:
+            day, index = divmod(i, len(self._times))
+            local = midnight + datetime.timedelta(days=day, seconds=self._times[index])
+            due = local.timestamp()
+            if due > when:
+                return due
+            i += 1  # it was in an hour that repeats as clocks go back.
+
+
+def schedule_factory(config):
+    """Build the schedule from the optional ``schedule`` config section, or None."""
+    rules = config.get("schedule")
+    if not rules:
+        return None
+    windows = [
+        Window(rule["start"], rule["end"], rule["mode"], rule.get("brightness"))
+        for rule in rules
+    ]
+    return Schedule(windows, config["global"].get("default_mode", "all"))
@@ -0,0 +1,226 @@
+r"""
+Fast-forward a panel through hours of operation without waiting.
+
+The driver runs its normal loop on a :py:class:`~infopanel.clock.SimulatedClock`,
+which jumps ahead whenever the driver would sleep, so scene sequencing, mode and
+brightness commands, and ``random`` mode can be checked in seconds. Commands
+are sent at simulated times as if they came over MQTT. The
+:py:class:`SimulationReport` says how long each scene was shown and how many
+frames it would have gotten, which makes scheduling changes and frame rate
+regressions easy to catch in CI::
+
+    python -m infopanel.simulation --config panel.yaml --hours 8 --start 21:00 \
+        --command 3600=mode=night --command 7200=brightness=20
+
+Frames are really drawn (to an :py:class:`~infopanel.display.ArrayDisplay`)
+unless ``--no-draw`` is given, in which case they are only counted. Sprites
+that fetch data from the network are not refreshed during a simulation.
+"""
+
+import argparse
+import collections
+import datetime
+import functools
+import logging
+import random
+
+from infopanel import clock, config, data, display, driver, fetcher, schedule
+
+LOG = logging.getLogger(__name__)
+
+SceneStats = collections.namedtuple(
+    "SceneStats", ["name", "visits", "dwell_s", "frames"]
+)
+SceneStats.__doc__ = """How long a scene was shown in total, over how many visits."""
+
+
+class SimulationReport(object):
+    """What happened during a simulation."""
+
+    def __init__(self, duration_s, transitions, frames):
+        """
+        Construct a report.
+
+        ``transitions`` are ``(time, scene name)`` in order, and ``frames`` the
+        number of frames drawn of each scene name.
+        """
+        self.duration_s = duration_s
+        self.transitions = transitions
+        self.frames = frames
+
+    def scenes(self):
+        """Get :py:class:`SceneStats` of every scene that was shown, by name."""
+        dwell = collections.Counter()
+        visits = collections.Counter()
+        ends = [when for when, _name in self.transitions[1:]] + [self.duration_s]
+        for (start, name), end in zip(self.transitions, ends):
+            dwell[name] += end - start
+            visits[name] += 1
+        return {
+            name: SceneStats(name, visits[name], dwell[name], self.frames[name])
+            for name in visits
+        }
+
+    def __str__(self):
+        """Format the report as a table."""
+        lines = [
+            "{:16s} {:>7s} {:>11s} {:>9s} {:>8s}".format(
+                "scene", "visits", "dwell (s)", "frames", "fps"
+            )
+        ]
+        for stats in sorted(self.scenes().values()):
+            lines.append(
+                "{:16s} {:7d} {:11.1f} {:9d} {:8.1f}".format(
+                    stats.name,
+                    stats.visits,
+                    stats.dwell_s,
+                    stats.frames,
+                    stats.frames / stats.dwell_s if stats.dwell_s else 0.0,
+                )
+            )
+        return "\n".join(lines)
+
+
+class Simulation(object):
+    """Run a driver on simulated time."""
+
+    def __init__(self, infopanel, draw=True, start=0.0, time_of_day=None):
+        """
+        Construct a simulation of a driver with its scenes and modes set up.
+
+        ``time_of_day`` is the seconds after midnight that the simulation
+        starts at today, for scheduled modes. It defaults to the time now.
+        """
+        self.driver = infopanel
+        self.draw = draw
+        wall_start = None
+        if time_of_day is not None:
+            today = datetime.datetime.combine(datetime.date.today(), datetime.time())
+            wall_start = (today + datetime.timedelta(seconds=time_of_day)).timestamp()
+        self.clock = clock.SimulatedClock(start, wall_start)
+        self._started = start
+        self._transitions = []
+        self._frames = collections.Counter()
+
+    def command(self, at_s, key, value):
+        """Set a data key (e.g. ``mode``) ``at_s`` seconds into the simulation."""
+        self.clock.at(self.clock.time + at_s, functools.partial(self._send, key, value))
+
+    def _send(self, key, value):
+        LOG.debug("Sending %s=%s at %.1f s", key, value, self.clock.time)
+        self.driver.data_source[key] = value
+
+    def run(self, duration_s):
+        """Simulate ``duration_s`` seconds of the panel and report what it showed."""
+        drv = self.driver
+        drv._stop.clear()  # pylint: disable=protected-access
+        self._started = self.clock.time
+        self._transitions = []
+        self._frames = collections.Counter()
+        self.clock.at(self._started + duration_s, drv.stop)
+        previous = clock.set_clock(self.clock)
+        if drv.schedule is not None:
+            # start with whatever is scheduled at the simulated time of day.
+            drv.start_schedule(drv.schedule)
+            drv._check_for_command()  # pylint: disable=protected-access
+        # patch the instance so the driver's own loop does the work.
+        drv.draw_frame = self._draw_frame
+        drv._change_scene = self._change_scene  # pylint: disable=protected-access
+        real_fetcher, drv.fetcher = drv.fetcher, fetcher.BackgroundFetcher()
+        self._transitions.append((0.0, drv.scene_name(drv.active_scene)))
+        try:
+            drv.run()
+        finally:
+            clock.set_clock(previous)
+            del drv.draw_frame
+            del drv._change_scene  # pylint: disable=protected-access
+            drv.fetcher = real_fetcher
+        return SimulationReport(duration_s, self._transitions, self._frames)
+
+    def _draw_frame(self):
+        drv = self.driver
+        self._frames[drv.scene_name(drv.active_scene)] += 1
+        if self.draw:
+            driver.Driver.draw_frame(drv)
+
+    def _change_scene(self):
+        drv = self.driver
+        before = drv.active_scene
+        driver.Driver._change_scene(drv)  # pylint: disable=protected-access
+        if drv.active_scene is not before:
+            self._transitions.append(
+                (self.clock.time - self._started, drv.scene_name(drv.active_scene))
+            )
+
+
+def simulate(
+    conf, duration_s, commands=(), seed=None, draw=True, time_of_day=None
+):  # pylint: disable=too-many-arguments
+    """
+    Simulate a panel config for ``duration_s`` seconds.
+
+    ``commands`` are ``(seconds, key, value)`` to send along the way, and
+    ``time_of_day`` is when the simulation starts, in seconds after midnight.
+    """
+    if seed is not None:
+        random.seed(seed)
+    array_conf = conf.get("ArrayMatrix") or {}
+    disp = display.ArrayDisplay(
+        array_conf.get("width", 64), array_conf.get("height", 32)
+    )
+    datasrc = data.input_data_factory(conf)
+    simulation = Simulation(
+        driver.driver_factory(disp, datasrc, conf), draw=draw, time_of_day=time_of_day
+    )
+    for at_s, key, value in commands:
+        simulation.command(at_s, key, value)
+    return simulation.run(duration_s)
+
+
+def _command(text):
+    """Parse a ``seconds=key=value`` command line option."""
+    try:
+        at_s, key, value = text.split("=", 2)
+        return float(at_s), key, value
+    except ValueError as err:
+        raise argparse.ArgumentTypeError(
+            "Use seconds=key=value, not {}".format(text)
+        ) from err
+
+
+def main():
+    """Simulate a config from the command line and print the report."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--config", required=True, help="YAML configuration file.")
+    parser.add_argument("--hours", type=float, default=1.0, help="Hours to simulate.")
+    parser.add_argument(
+        "--command",
+        type=_command,
+        action="append",
+        default=[],
+        help="Send seconds=key=value, e.g. 3600=mode=night. Can be repeated.",
+    )
+    parser.add_argument(
+        "--start", help="Time of day to start at, like 21:30. Defaults to now."
+    )
+    parser.add_argument("--seed", type=int, help="Seed random scene order.")
+    parser.add_argument(
+        "--no-draw", action="store_true", help="Count frames without drawing them."
+    )
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+    conf = config.load_config_yaml(args.config)
+    driver.apply_global_config(conf)
+    report = simulate(
+        conf,
+        args.hours * 3600.0,
+        args.command,
+        seed=args.seed,
+        draw=not args.no_draw,
+        time_of_day=schedule.parse_time(args.start) if args.start else None,
+    )
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
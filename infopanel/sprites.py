@@ -1,21 +1,20 @@
 """There are multiple sprites in any given scene."""
 
 import random
-import inspect
-import sys
 import logging
-import datetime
-import os
-
-from PIL import Image as PILImage
-from PIL import ImageSequence
 
 from matplotlib import cm
 import voluptuous as vol
 
-from infopanel import helpers, colors, data
+from infopanel import helpers, colors, data, registry, clock, fonts, render
 
-MAX_TICKS = 10000
+# Older configs count speeds in ticks. They are converted at this many per second.
+TICKS_PER_SECOND = 60.0
+# Most time to catch up on at once, e.g. if drawing stalls.
+MAX_CATCH_UP_S = 1.0
+# Frame rates that sprites ask for to look right.
+MAX_FRAME_RATE = 60.0
+STATIC_FRAME_RATE = 1.0
 GOOFY_EXCLAMATIONS = [
     "OW",
     "HI",
@@ -71,16 +70,24 @@ class Sprite(object):  # pylint: disable=too-many-instance-attributes
 
     CONF = vol.Schema(
         {
-            vol.Optional("dx", default=0): int,
-            vol.Optional("dy", default=0): int,
-            vol.Optional("ticks_per_frame", default=1): int,
-            vol.Optional("ticks_per_movement", default=1): int,
-            vol.Optional("ticks_per_phrase", default=200): int,
-            vol.Optional("min_ticks_per_phrase", default=100): int,
-            vol.Optional("max_ticks_per_phrase", default=400): int,
+            vol.Optional("vx", default=0.0): vol.Coerce(float),
+            vol.Optional("vy", default=0.0): vol.Coerce(float),
+            vol.Optional("ticks_per_movement", default=1): vol.All(
+                vol.Coerce(float), vol.Range(min=0, min_included=False)
+            ),
+            vol.Optional("frame_rate", default=TICKS_PER_SECOND): vol.Coerce(float),
+            vol.Optional("phrase_seconds", default=200 / TICKS_PER_SECOND): vol.Coerce(
+                float
+            ),
+            vol.Optional(
+                "min_phrase_seconds", default=100 / TICKS_PER_SECOND
+            ): vol.Coerce(float),
+            vol.Optional(
+                "max_phrase_seconds", default=400 / TICKS_PER_SECOND
+            ): vol.Coerce(float),
             vol.Optional("x", default=0): int,
             vol.Optional("y", default=0): int,
-            vol.Optional("font_name", default="5x8.bdf"): str,
+            vol.Optional("font_name", default=fonts.DEFAULT_FONT): str,
             vol.Optional("phrases", default=[""]): list,
             vol.Optional(
                 "pallete",
@@ -102,16 +109,13 @@ class Sprite(object):  # pylint: disable=too-many-instance-attributes
         self.x, self.y = None, None
         self.max_x, self.max_y = max_x, max_y
         self._frame_num = 0
-        self._ticks = (
-            0  # to allow slower changes of frames, could probably be itertools.cycle
-        )
-        self.ticks_per_frame = None
-        self.ticks_per_movement = None
-        self.ticks_per_phrase = None
-        self.min_ticks_per_phrase = None
-        self.max_ticks_per_phrase = None
+        self.frame_rate = None  # animation frames per second
+        self.phrase_seconds = None
+        self.min_phrase_seconds = None
+        self.max_phrase_seconds = None
         self.pallete = None
-        self.dx, self.dy = None, None
+        self.vx, self.vy = None, None  # pixels per second
+        self.ticks_per_movement = None  # of older configs, to rescale vx/vy
         self.font = None
         self.text = None
         self.phrases = None
@@ -119,19 +123,26 @@ class Sprite(object):  # pylint: disable=too-many-instance-attributes
             data_source = data.InputData()
         self.data_source = data_source
         self.frames = []
+        self._lit_pixels = []  # compiled self.frames. See _compile_frames.
+        self._lit_source = None
         self._frame_delta = 0
         self.can_flip = None
         self.reverse_frame_loop = None
         self._phrase_width = 0
+        self._last_tick_time = None
+        # fractions of a pixel/frame/phrase carried over between ticks
+        self._x_left, self._y_left = 0.0, 0.0
+        self._frames_left = 0.0
+        self._phrase_elapsed = 0.0
 
     def __repr__(self):
         """Print out details of a sprite."""
-        return "<{} at {}, {}. dx/dy: ({}, {}), size: ({}, {})>" "".format(
+        return "<{} at {}, {}. vx/vy: ({}, {}), size: ({}, {})>" "".format(
             self.__class__.__name__,
             self.x,
             self.y,
-            self.dx,
-            self.dy,
+            self.vx,
+            self.vy,
             self.max_x,
             self.max_y,
         )
@@ -140,9 +151,10 @@ class Sprite(object):  # pylint: disable=too-many-instance-attributes
         """
         Validate and apply configuration to this sprite.
 
-        Generally, each config item becomes a instance attribute.
+        Generally, each config item becomes a instance attribute. Tick-based
+        speeds from older configs are converted to their per-second versions.
         """
-        conf = self.CONF(conf)
+        conf = self.CONF(ticks_to_seconds(conf))
         for key, val in conf.items():
             if not hasattr(self, key):
                 # this isn't a configurable attribute. May have special behavior.
@@ -153,6 +165,8 @@ class Sprite(object):  # pylint: disable=too-many-instance-attributes
         self.font = helpers.load_font(conf["font_name"])
         if conf["frames"]:
             self._build_frames(conf["frames"])
+        if self.frames:
+            self.check_frame_bounds()  # so animation starts on the first step
 
         return conf
 
@@ -198,62 +212,64 @@ class Sprite(object):  # pylint: disable=too-many-instance-attributes
         return self.frames[self._frame_num]
 
     def tick(self):
-        """Update the animation ticks."""
-        self._ticks += 1
-        self.update_frame_num()
-        self.check_movement()
-        self.check_tick_bounds()
-        self.check_frame_bounds()
-        self.update_phrase()
-
-    def update_frame_num(self):
-        """Change frame num when there have been enough ticks."""
-        if not self._ticks % self.ticks_per_frame:
+        """
+        Advance the animation by the time since the last call.
+
+        Speeds are per second of real time, so the animation looks the same no
+        matter how often the sprite is drawn.
+        """
+        now = clock.now()
+        if self._last_tick_time is None:
+            elapsed = 0.0
+        else:
+            elapsed = min(now - self._last_tick_time, MAX_CATCH_UP_S)
+        self._last_tick_time = now
+        self.update_frame_num(elapsed)
+        self.check_movement(elapsed)
+        self.update_phrase(elapsed)
+
+    def update_frame_num(self, elapsed):
+        """Step through as many animation frames as fit in the elapsed time."""
+        self._frames_left += elapsed * self.frame_rate
+        steps = int(self._frames_left)
+        self._frames_left -= steps
+        for _i in range(steps):
             self._frame_num += self._frame_delta
             if self._frame_num == len(self.frames):
                 # loop around if we overstepped the bounds
                 # This should never happen if reverse_frame_loop is true
                 self._frame_num = 0
+            self.check_frame_bounds()
 
-    def check_movement(self):
-        """Move if there have been enough ticks, and wrap."""
-        if not self.dx and not self.dy:
+    def check_movement(self, elapsed):
+        """Move by the whole pixels covered in the elapsed time, and wrap."""
+        if not self.vx and not self.vy:
             return
 
-        if not self._ticks % self.ticks_per_movement:
-            self.move()
+        self.move(elapsed)
 
-        if self.x > self.max_x and self.dx > 0:
+        if self.x > self.max_x and self.vx > 0:
             if not self._maybe_flip():
                 self.x = 0 - self.width - self._phrase_width
-        elif self.x + self.width + self._phrase_width < 0 and self.dx < 0:
+        elif self.x + self.width + self._phrase_width < 0 and self.vx < 0:
             if not self._maybe_flip():
                 self.x = self.max_x
 
-        if self.y - self.height > self.max_y and self.dy > 0:
+        if self.y - self.height > self.max_y and self.vy > 0:
             self.y = 0 - self.height
-        elif self.y + self.height < 0 and self.dy < 0:
+        elif self.y + self.height < 0 and self.vy < 0:
             self.y = self.max_y
 
     def _maybe_flip(self):
         if not self.can_flip:
             return False
         multiplier = random.choice([1, -1])
-        self.dx *= multiplier
+        self.vx *= multiplier
         if multiplier == -1:
             self.flip_horizontal()
             return True
         return False
 
-    def check_tick_bounds(self):
-        """
-        Reset ticks when it reaches some high bound.
-
-        This allows you to not have individual counters for everything.
-        """
-        if self._ticks > MAX_TICKS:
-            self._ticks = 0
-
     def check_frame_bounds(self):
         """
         Reverse back to first frame if all have been seen.
@@ -268,45 +284,78 @@ class Sprite(object):  # pylint: disable=too-many-instance-attributes
         elif self._frame_num == 0:
             self._frame_delta = 1
 
-    def update_phrase(self):
-        """Change the phrase the thing is saying."""
-        if not self._ticks % self.ticks_per_phrase:
+    def update_phrase(self, elapsed):
+        """Change the phrase the thing is saying once it has said it long enough."""
+        self._phrase_elapsed += elapsed
+        if self._phrase_elapsed >= self.phrase_seconds:
+            self._phrase_elapsed = 0.0
             text_src = random.choice(self.phrases)
-            min_ticks = self.min_ticks_per_phrase
+            min_seconds = self.min_phrase_seconds
             if callable(text_src):
                 # allow callable helpers for current date, time, etc.
                 text_src = text_src()
-                min_ticks *= 2
+                min_seconds *= 2
             elif isinstance(self.text, Sprite):
                 # allow nested sprites to be passed to get extra-fancy (traffic)
-                min_ticks *= 2  # let live data stay a bit longer
+                min_seconds *= 2  # let live data stay a bit longer
 
             self.text = text_src
-            self.ticks_per_phrase = random.randint(min_ticks, self.max_ticks_per_phrase)
-
-    def move(self):
-        """Move around on the screen."""
-        self.x += self.dx
-        self.y += self.dy
+            self.phrase_seconds = random.uniform(min_seconds, self.max_phrase_seconds)
+
+    def move(self, elapsed):
+        """Move around on the screen, keeping fractions of pixels for next time."""
+        self._x_left += self.vx * elapsed
+        self._y_left += self.vy * elapsed
+        step_x, step_y = int(self._x_left), int(self._y_left)
+        self._x_left -= step_x
+        self._y_left -= step_y
+        self.x += step_x
+        self.y += step_y
 
     def render(self, display):
-        """Render a frame and advance."""
-        self._render_frame(display)
+        """Render a frame, skipping whatever is off the screen, and advance."""
+        if self.in_view(self.x, self.y, self.x + self.width, self.y + self.height):
+            self._render_frame(display)
+            display.stats["sprites_drawn"] += 1
+        else:
+            display.stats["sprites_culled"] += 1
         self._render_phrase(display)
         self.tick()
 
+    def in_view(self, left, top, right, bottom):
+        """Check if any of a box overlaps the display."""
+        return right > 0 and left < self.max_x and bottom > 0 and top < self.max_y
+
     def _render_frame(self, display):
-        """Render main part of the sprite."""
-        # local variables for speed deep in the loop
-        x = self.x
+        """Render main part of the sprite, one call per color."""
+        if self._lit_source is not self.frames:
+            self._compile_frames()
         pallete = self.pallete
-        for yi, row in enumerate(self.frame):
-            y = self.y + yi
-            for xi, val in enumerate(row):
-                if val:
-                    # pylint: disable=unsubscriptable-object
-                    red, green, blue = pallete[val]
-                    display.set_pixel(x + xi, y, red, green, blue)
+        for val, xs, ys in self._lit_pixels[self._frame_num]:
+            # pylint: disable=unsubscriptable-object
+            display.set_pixels(xs, ys, pallete[val], self.x, self.y)
+
+    def _compile_frames(self):
+        """
+        Find the lit pixels of every frame, grouped by pallete entry.
+
+        Each frame becomes a list of ``(pallete key, xs, ys)`` so drawing skips
+        the unlit cells and looks each color up once. This is redone whenever
+        ``frames`` is replaced (e.g. by flipping).
+        """
+        self._lit_pixels = []
+        for frame in self.frames:
+            by_val = {}
+            for yi, row in enumerate(frame):
+                for xi, val in enumerate(row):
+                    if val:
+                        xs, ys = by_val.setdefault(val, ([], []))
+                        xs.append(xi)
+                        ys.append(yi)
+            self._lit_pixels.append(
+                [(val, tuple(xs), tuple(ys)) for val, (xs, ys) in by_val.items()]
+            )
+        self._lit_source = self.frames
 
     def _render_phrase(self, display):
         """Render optional follower phrase."""
@@ -320,11 +369,27 @@ class Sprite(object):  # pylint: disable=too-many-instance-attributes
                 self.text.x = xtext
                 self.text.y = ytext
                 self._phrase_width = self.text.render(display)
-            else:
+            elif self._text_in_view(xtext, ytext, self.text):
                 red, green, blue = self.pallete["text"]
                 self._phrase_width = display.text(
                     self.font, xtext, ytext, red, green, blue, self.text
                 )
+            else:
+                display.stats["phrases_culled"] += 1
+
+    def _text_in_view(self, x, y, text):
+        """
+        Check if text at ``x`` with its baseline at ``y`` would be on the screen.
+
+        The width of text that is off the screen is kept in ``_phrase_width``
+        since wraparound needs it.
+        """
+        width = self.font.text_width(text)
+        top = y - self.font.baseline
+        if self.in_view(x, top, x + width, top + self.font.height):
+            return True
+        self._phrase_width = width
+        return False
 
     def reinit(self):
         """
@@ -332,6 +397,45 @@ class Sprite(object):  # pylint: disable=too-many-instance-attributes
 
         You could reset position or whatever here.
         """
+        # pick the animation up where it left off rather than catching up.
+        self._last_tick_time = None
+
+    def needed_frame_rate(self):
+        """
+        Get how many frames per second this sprite needs to look smooth.
+
+        Moving sprites want a frame per pixel of motion, animated ones a frame per
+        animation frame. Sprites that sit still only need the occasional redraw.
+        """
+        rates = [STATIC_FRAME_RATE]
+        if self.vx or self.vy:
+            rates.append(max(abs(self.vx or 0), abs(self.vy or 0)))
+        if len(self.frames) > 1:
+            rates.append(self.frame_rate or 0)
+        if isinstance(self.text, Sprite):
+            rates.append(self.text.needed_frame_rate())
+        return min(max(rates), MAX_FRAME_RATE)
+
+    def fetch_interval(self):  # pylint: disable=no-self-use
+        """Get seconds between calls to :py:meth:`fetch`, or None to never fetch."""
+        return None
+
+    def fetch_timeout(self):  # pylint: disable=no-self-use
+        """Get seconds to wait for :py:meth:`fetch`, or None for the default."""
+        return None
+
+    def fetch(self):
+        """
+        Get fresh data for this sprite from somewhere slow, like the network.
+
+        This runs on a worker thread (see :py:mod:`infopanel.fetcher`), so it
+        must not change anything the render thread uses. The result gets handed
+        to :py:meth:`apply_fetched`. Raise if the data can't be had, and the
+        sprite keeps what it showed before.
+        """
+
+    def apply_fetched(self, result):
+        """Use what :py:meth:`fetch` got. This runs on the render thread."""
 
 
 class FancyText(Sprite):
@@ -388,11 +492,21 @@ class FancyText(Sprite):
 
         Can have lines that end with newline, and can have multiple colors.
         """
-        x = 0
         self.tick()
-        for text, rgb in self._text:
-            if callable(text):
-                text = str(text())  # for dynamic values
+        texts = [
+            (str(text()) if callable(text) else text, rgb)  # for dynamic values
+            for text, rgb in self._text
+        ]
+        if self.font is not None:  # without a font, let the display sort it out.
+            width = sum(self.font.text_width(text) for text, _rgb in texts)
+            top = self.y - self.font.baseline
+            if not self.in_view(self.x, top, self.x + width, top + self.font.height):
+                display.stats["sprites_culled"] += 1
+                self._width = width
+                return width
+        display.stats["sprites_drawn"] += 1
+        x = 0
+        for text, rgb in texts:
             r, g, b = rgb
             x += display.text(self.font, self.x + x, self.y, r, g, b, text)
         self._width = x
@@ -429,21 +543,54 @@ class DynamicFancyText(FancyText):  # pylint:disable=too-many-instance-attribute
         self.data_label = None
         self.label_color = None
         self.value_color = None
+        self._value_version = None
+        self._value_stale = False
+        self._parsed_value = None
 
     def apply_config(self, conf):
         """Validate and apply configuration to this sprite."""
         conf = FancyText.apply_config(self, conf)
-        if conf["data_label"]:
+        if conf.get("data_label"):
             # make this a callable function to enable live/updating data
-            self.value = lambda: self._convert_data(
-                self.data_source[conf["data_label"]]
-            )
+            self.value = self._read_value
         self._make_text()
         return conf
 
     def _convert_data(self, val):  # pylint: disable=no-self-use
         return val
 
+    def _read_value(self):
+        """
+        Get the current value, converted.
+
+        Bound data is only re-converted when its version in the data source
+        changes, so steady values cost a dict lookup per frame rather than a parse.
+        Values that have outlived their ttl in the data source read as None.
+        Data is read from the snapshot of the frame being drawn, never from the
+        live data that other threads write to.
+        """
+        if not self.data_label:
+            return self.value() if callable(self.value) else self.value
+        view = self.data_source.view()
+        if self._bound_value_changed(view):
+            self._value_version = view.version(self.data_label)
+            self._value_stale = view.is_stale(self.data_label)
+            if self._value_stale:
+                self._parsed_value = None
+            else:
+                self._parsed_value = self._convert_data(view[self.data_label])
+        return self._parsed_value
+
+    def _bound_value_changed(self, view=None):
+        """Check if the bound data got a new value or went stale since last read."""
+        if view is None:
+            view = self.data_source.view()
+        key = self.data_label
+        return (
+            view.version(key) != self._value_version
+            or view.is_stale(key) != self._value_stale
+        )
+
     def _make_text(self):
         """Render the label and live value."""
         if self.label:
@@ -452,18 +599,17 @@ class DynamicFancyText(FancyText):  # pylint:disable=too-many-instance-attribute
                 self.label_fmt.format(self.label),
                 colors.rgb_from_name(self.label_color),
             )
-        val = (
-            self.value() if callable(self.value) else self.value
-        )  # pylint: disable=not-callable
+        val = self._read_value()
         text = self.val_fmt.format(val)
         self.last_val = val
         DynamicFancyText.add(self, text, colors.rgb_from_name(self.value_color))
 
     def update_value(self):
         """Update, but only if the value has changed."""
-        val = (
-            self.value() if callable(self.value) else self.value
-        )  # pylint: disable=not-callable
+        if self.data_label and not self._bound_value_changed():
+            # nothing was pushed to our key since the last layout.
+            return
+        val = self._read_value()
         if val != self.last_val:
             # only do lookup when things change for speed.
             self.clear()
@@ -496,7 +642,7 @@ class Duration(DynamicFancyText):  # pylint:disable=too-many-instance-attributes
     def _convert_data(self, val):  # pylint: disable=no-self-use
         try:
             return int(val)
-        except ValueError:
+        except (TypeError, ValueError):
             return None
 
     def _make_text(self):
@@ -506,9 +652,7 @@ class Duration(DynamicFancyText):  # pylint:disable=too-many-instance-attributes
             self.label_fmt.format(self.label),
             colors.rgb_from_name(self.label_color),
         )
-        val = (
-            self.value() if callable(self.value) else self.value
-        )  # pylint: disable=not-callable
+        val = self._read_value()
         if val is None:
             color = colors.interpolate_color(
                 self.low_val, self.low_val, self.high_val, self.cmap
@@ -543,7 +687,7 @@ class Temperature(Duration):
     def _convert_data(self, val):
         try:
             return float(val)
-        except ValueError:
+        except (TypeError, ValueError):
             # can happen if data is 'unknown' or something.
             return None
 
@@ -554,9 +698,9 @@ class Giraffe(Sprite):
     def __init__(self, max_x, max_y, data_source=None):
         """Construct a sprite."""
         Sprite.__init__(self, max_x, max_y, data_source)
-        self.ticks_per_frame = 3
+        self.frame_rate = 20.0
         self.pallete = {1: (255, 255, 0), "text": [0, 255, 0]}
-        self.dx = 1
+        self.vx = 60.0
         self.phrases = (
             [""] * 6
             + GOOFY_EXCLAMATIONS
@@ -621,96 +765,64 @@ class Plant(Sprite):
             ],
         ]
 
-        self.ticks_per_frame = random.randint(10, 20)
+        self.frame_rate = random.uniform(3.0, 6.0)
         self.pallete = {1: (0, 240, 0), 2: (165, 42, 42)}
 
 
-class BaseImage(Sprite):
-    """Abstract image."""
-
-    CONF = Sprite.CONF.extend({"path": vol.Coerce(str)})
-
-    def apply_config(self, conf):
-        """Validate and apply configuration to this sprite."""
-        conf = Sprite.apply_config(self, conf)
-        self.set_source_path(conf["path"])
-        return conf
-
-    def _render_frame(self, display):
-        display.set_image(self.frame, self.x, self.y)
-
-    def set_source_path(self, path):
-        """Set this image source to a new path."""
-        raise NotImplementedError
-
-    def flip_horizontal(self):
-        """Images can't flip... yet."""
-
-
-class Image(BaseImage):
-    """Bitmap image that doesn't animate."""
-
-    def __init__(self, *args, **kwargs):
-        """Construct a sprite."""
-        BaseImage.__init__(self, *args, **kwargs)
-        self._image = None
-
-    def set_source_path(self, path):
-        """Set this image source to a new path."""
-        with PILImage.open(os.path.expandvars(path)) as image:
-            image.thumbnail((self.max_x, self.max_y), PILImage.ANTIALIAS)
-            self._image = image.convert("RGB")
-
-    @property
-    def frame(self):
-        """Get the current frame."""
-        return self._image
-
-    @property
-    def width(self):
-        """Width of the sprite."""
-        return self._image.size[0]
-
-    @property
-    def height(self):
-        """Height of the sprite."""
-        return self._image.size[1]
-
-
-class AnimatedGif(BaseImage):
-    """Animated gif sprite."""
+class Ticker(FancyText):
+    """
+    Text that scrolls across the screen, like a news or stock ticker.
 
-    def set_source_path(self, path):
-        """Set this image source to a new path."""
-        image = PILImage.open(os.path.expandvars(path))
-        frames = [frame.copy() for frame in ImageSequence.Iterator(image)]
-        for frame in frames:
-            frame.thumbnail((self.max_x, self.max_y), PILImage.ANTIALIAS)
-        self.frames = [frame.convert("RGB") for frame in frames]
-        self._frame_delta = 1
+    The whole message is rendered once into a strip and each frame only shows
+    the window of it that is on the screen, so long messages cost no more to
+    draw than short ones. The strip is rebuilt only when the message changes.
+    """
 
-    def check_frame_bounds(self):
-        """Roll back to first frame if all have been seen."""
-        if self._frame_num == len(self.frames) - 1:
-            self._frame_num = 0
+    CONF = FancyText.CONF.extend(
+        {
+            vol.Optional("vx", default=-30.0): vol.Coerce(float),
+            vol.Optional("can_flip", default=False): bool,
+        }
+    )
 
-    @property
-    def width(self):
-        """Width of the sprite."""
-        width, _height = self.frame.size
-        return width
+    def __init__(self, max_x, max_y, data_source=None):
+        """Construct a ticker."""
+        FancyText.__init__(self, max_x, max_y, data_source=data_source)
+        self._strip = None
+        self._strip_segments = None
 
-    @property
-    def height(self):
-        """Height of the sprite."""
-        _width, height = self.frame.size
-        return height
+    def render(self, display):
+        """Show the part of the message that is on the screen and advance."""
+        if self.font is None:
+            return FancyText.render(self, display)
+        self.tick()
+        strip = self._current_strip()
+        self._width = strip.width
+        left, top = self.x + strip.left, self.y + strip.top
+        height, width = strip.lit.shape
+        if self.in_view(left, top, left + width, top + height):
+            display.blit(strip, left, top)
+            display.stats["sprites_drawn"] += 1
+        else:
+            display.stats["sprites_culled"] += 1
+        return strip.width
+
+    def _current_strip(self):
+        """Get the strip of the current message, rendering it if it changed."""
+        segments = tuple(
+            (str(text()) if callable(text) else text, tuple(rgb))
+            for text, rgb in self._text
+        )
+        if segments != self._strip_segments:
+            self._strip = render.render_strip(self.font, segments)
+            self._strip_segments = segments
+        return self._strip
 
 
-class Reddit(FancyText):
+class Reddit(Ticker):
     """The titles of some top posts in various subreddits."""
 
-    CONF = FancyText.CONF.extend(
+    CONF = Ticker.CONF.extend(
         {
             "client_id": str,
             "client_secret": str,
@@ -718,21 +830,22 @@ class Reddit(FancyText):
             vol.Optional("subreddits", default=["worldnews", "politics", "news"]): list,
             vol.Optional("num_headlines", default=5): int,
             vol.Optional("update_minutes", default=5): int,
+            vol.Optional("fetch_timeout_s", default=30.0): vol.Coerce(float),
         }
     )
 
     def __init__(self, *args, **kwargs):
         """Construct a sprite."""
-        FancyText.__init__(self, *args, **kwargs)
+        Ticker.__init__(self, *args, **kwargs)
         self._praw = None
         self.subreddits = None
         self.num_headlines = None
         self.update_minutes = None
-        self._last_update_time = datetime.datetime.now()
+        self.fetch_timeout_s = None
 
     def apply_config(self, conf):
         """Validate and apply configuration to this sprite."""
-        conf = FancyText.apply_config(self, conf)
+        conf = Ticker.apply_config(self, conf)
         import praw  # pylint: disable=import-outside-toplevel, import-error
 
         self._praw = praw.Reddit(
@@ -740,53 +853,84 @@ class Reddit(FancyText):
             client_secret=conf["client_secret"],
             user_agent=conf["user_agent"],
         )
-        self.update_headlines()
+        # the first headlines come from the background fetcher right away.
+        self.clear()
+        # pylint: disable=unsubscriptable-object
+        self.add("Loading headlines...", self.pallete["text"])
         return conf
 
-    def update_headlines(self):
-        """Update sprite text based on current subreddit contents."""
+    def fetch_interval(self):
+        """Get seconds between headline updates."""
+        return self.update_minutes * 60.0
+
+    def fetch_timeout(self):
+        """Get seconds to wait for reddit."""
+        return self.fetch_timeout_s
+
+    def fetch(self):
+        """Get the current headline titles from reddit."""
+        headlines = self._praw.subreddit("+".join(self.subreddits)).hot(
+            limit=self.num_headlines
+        )
+        return [headline.title for headline in headlines]
+
+    def apply_fetched(self, result):
+        """Show fetched headline titles."""
         self.clear()
-        try:
-            headlines = self._praw.subreddit("+".join(self.subreddits)).hot(
-                limit=self.num_headlines
-            )
-            for headline in headlines:
-                # pylint: disable=unsubscriptable-object
-                self.add(headline.title + 10 * " ", self.pallete["text"])
-        except:  # pylint: disable=bare-except
-            # possibly a connection error.
+        for title in result:
             # pylint: disable=unsubscriptable-object
-            self.add("Headlines N/A", self.pallete["text"])
-
-    def update_phrase(self):
-        """Occasionally update the headlines."""
-        if not self._ticks % self.ticks_per_phrase:
-            now = datetime.datetime.now()
-            if now - self._last_update_time > datetime.timedelta(
-                minutes=self.update_minutes
-            ):
-                self.update_headlines()
-                self._last_update_time = now
+            self.add(title + 10 * " ", self.pallete["text"])
 
-    def _maybe_flip(self):
-        return False
+    def update_phrase(self, elapsed):
+        """Headlines are updated by the background fetcher, not per phrase."""
+
+
+def ticks_to_seconds(conf, sprite=None):
+    """
+    Convert tick-based speed options to per-second ones.
+
+    Older configs give ``dx``/``dy`` in pixels per move with ``ticks_per_movement``
+    ticks between moves, and count animation frames and phrases in ticks too. A
+    tick is ``1 / TICKS_PER_SECOND`` seconds. Per-second options that are also
+    given win. When converting options that override an existing ``sprite``,
+    missing ones are taken from it: its speed in pixels per move is its speed
+    per second times its own ``ticks_per_movement``.
+    """
+    conf = dict(conf)
+    ticks_per_movement = conf.get("ticks_per_movement")
+    for old, new in (("dx", "vx"), ("dy", "vy")):
+        if old not in conf and ticks_per_movement is None:
+            continue
+        if old in conf:
+            step = float(conf.pop(old))
+        elif sprite is not None:
+            speed = getattr(sprite, new, None) or 0.0
+            step = speed * (sprite.ticks_per_movement or 1) / TICKS_PER_SECOND
+        else:
+            step = 0.0
+        conf.setdefault(new, step * TICKS_PER_SECOND / (ticks_per_movement or 1))
+    if "ticks_per_frame" in conf:
+        conf.setdefault("frame_rate", TICKS_PER_SECOND / conf.pop("ticks_per_frame"))
+    for old, new in (
+        ("ticks_per_phrase", "phrase_seconds"),
+        ("min_ticks_per_phrase", "min_phrase_seconds"),
+        ("max_ticks_per_phrase", "max_phrase_seconds"),
+    ):
+        if old in conf:
+            conf.setdefault(new, conf.pop(old) / TICKS_PER_SECOND)
+    return conf
 
 
 def sprite_factory(config, data_source, disp):
     """Build sprites from config file."""
     sprites = {}
     for name, sprite_conf in config.items():
-        for cls_name, cls in inspect.getmembers(sys.modules[__name__]):
-            try:
-                if sprite_conf["type"] == cls_name:
-                    break
-            except KeyError:
-                LOG.error("%s", name)
-                raise
-        else:
-            raise ValueError("{} is invalid sprite".format(name))
+        try:
+            cls = registry.SPRITES.get(sprite_conf["type"])
+        except KeyError as err:
+            LOG.error("%s", name)
+            raise ValueError("{} is invalid sprite".format(name)) from err
         del sprite_conf["type"]
-        # pylint:disable=undefined-loop-variable
         sprite = cls(disp.width, disp.height, data_source=data_source)
         sprite.apply_config(sprite_conf)
         sprites[name] = [
@@ -1,8 +1,9 @@
 """Universal test stuff."""
 # pylint: disable=abstract-method
 import os
+from unittest import mock
 
-from infopanel import driver, config, display
+from infopanel import driver, clock, config, display, sprites, registry
 
 TEST_ROOT = os.path.dirname(os.path.abspath(__file__))
 
@@ -15,7 +16,48 @@ def load_test_config():
 
 
 class MockDisplay(display.Display):
-    """A display mock."""
+    """A display mock that draws nothing but counts frames."""
+
+    def __init__(self):
+        """Construct a mock display."""
+        display.Display.__init__(self)
+        self._brightness = 100
+        self.frames = 0
+        self.suspended = False
+
+    @property
+    def brightness(self):
+        """Brightness of display from 0 to 100."""
+        return self._brightness
+
+    @brightness.setter
+    def brightness(self, value):
+        self._brightness = value
+
+    def text(self, font, x, y, red, green, blue, text):
+        """Pretend to render text 5 pixels per character."""
+        return 5 * len(text)
+
+    def set_pixel(self, x, y, red, green, blue):
+        """Pretend to set a pixel."""
+
+    def set_pixels(self, xs, ys, color, x=0, y=0):
+        """Pretend to set some pixels."""
+
+    def clear(self):
+        """Pretend to clear the screen."""
+
+    def buffer(self):
+        """Count a finished frame."""
+        self.frames += 1
+
+    def suspend(self):
+        """Pretend to power down."""
+        self.suspended = True
+
+    def resume(self):
+        """Pretend to power up."""
+        self.suspended = False
 
     @property
     def height(self):
@@ -26,3 +68,74 @@ class MockDisplay(display.Display):
     def width(self):
         """Get the width."""
         return 64
+
+
+class ManualClock(clock.Clock):
+    """A clock that only moves when told to."""
+
+    def __init__(self):
+        """Construct a clock stopped at 100 seconds."""
+        self.time = 100.0
+
+    def now(self):
+        """Get the time it was last set to."""
+        return self.time
+
+
+class Placard(sprites.Sprite):
+    """A sprite that remembers its image path without loading anything."""
+
+    def __init__(self, *args, **kwargs):
+        """Construct a sprite."""
+        sprites.Sprite.__init__(self, *args, **kwargs)
+        self.path = None
+        self.frames = [[[1]]]
+
+    def set_source_path(self, path):
+        """Set this image source to a new path."""
+        self.path = path
+
+
+def sprite_types(**types):
+    """
+    Register sprite types, and :py:class:`Placard`, in a ``with`` block.
+
+    They are removed again afterwards so tests don't leak types into each other.
+    """
+    types.setdefault("Placard", Placard)
+    return mock.patch.dict(
+        registry.SPRITES._loaded, types  # pylint: disable=protected-access
+    )
+
+
+def use_sprite_types(test, **types):
+    """Register sprite types like :py:func:`sprite_types` until a test ends."""
+    patcher = sprite_types(**types)
+    patcher.start()
+    test.addCleanup(patcher.stop)
+
+
+def headless_config():
+    """
+    Make a small panel config whose scenes render without fonts.
+
+    Its sprites need :py:func:`sprite_types` to be built.
+    """
+    return {
+        "sprites": {
+            "I90": {
+                "type": "Duration",
+                "label": "I90",
+                "data_label": "travel_time_i90",
+            },
+            "placard": {"type": "Placard", "dx": 1},
+        },
+        "scenes": {
+            "traffic": {"type": "Scene", "sprites": [{"I90": {"x": 0, "y": 8}}]},
+            "sign": {"type": "Scene", "sprites": [{"placard": {"y": 10}}]},
+        },
+        "modes": {
+            "both": [{"traffic": {"duration": 5}}, {"sign": {"duration": 5}}],
+        },
+        "global": {"default_mode": "both"},
+    }
@@ -18,6 +18,7 @@ class DummyScreen(display.Display):
 
     def __init__(self, width=64, height=32):
         """Construct a dummy screen."""
+        display.Display.__init__(self)
         pygame.init()  # pylint: disable=no-member
 
         self.canvas = pygame.Surface(
@@ -53,6 +54,9 @@ class DummyScreen(display.Display):
 
     def text(self, font, x, y, red, green, blue, text):
         """Render text in a font to a place on the screen in a certain color."""
+        if font is not None:
+            return display.Display.text(self, font, x, y, red, green, blue, text)
+        # no BDF font available, so approximate with a system font.
         val = self.font.render(text, 0, (red, green, blue))
         width, _height = self.font.size(text)
         self.canvas.blit(val, (x + 1, y + 1 - self.font.get_height()))
@@ -62,6 +66,15 @@ class DummyScreen(display.Display):
         """Set a pixel to a color."""
         self.canvas.fill((red, green, blue), (x + 1, y + 1, 1, 1))
 
+    def set_pixels(self, xs, ys, color, x=0, y=0):
+        """Set many pixels to one color."""
+        color = self.canvas.map_rgb(color)
+        self.canvas.lock()
+        set_at = self.canvas.set_at
+        for xi, yi in zip(xs, ys):
+            set_at((x + xi + 1, y + yi + 1), color)
+        self.canvas.unlock()
+
     def set_image(self, image, x=0, y=0):
         """Apply an image to the screen."""
         raise NotImplementedError
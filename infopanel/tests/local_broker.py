@@ -0,0 +1,120 @@
+"""
+In-process stand-in for an MQTT broker.
+
+This lets tests and benchmarks run the real :py:class:`infopanel.mqtt.MQTTClient`
+without a network. Pass :py:meth:`LocalBroker.client_factory` as the client's
+``client_factory`` and publish with :py:meth:`LocalBroker.publish`. Like paho,
+each client delivers messages on its own loop thread.
+"""
+
+import queue
+import threading
+
+from infopanel import mqtt
+
+
+class LocalMessage(object):  # pylint: disable=too-few-public-methods
+    """A message as seen by ``on_message``."""
+
+    def __init__(self, topic, payload):
+        """Construct a message."""
+        self.topic = topic
+        self.payload = payload
+
+
+class LocalClient(object):
+    """Just enough of a paho client to be driven by MQTTClient."""
+
+    def __init__(self, broker, client_id):
+        """Construct a client attached to a broker."""
+        self.broker = broker
+        self.client_id = client_id
+        self.on_connect = None
+        self.on_message = None
+        self.subscriptions = []
+        self._inbox = queue.Queue()
+        self._thread = None
+        self.connected = False
+
+    def username_pw_set(self, username, password=None):
+        """Accept credentials and ignore them."""
+
+    def tls_set(self, certificate):
+        """Accept a certificate and ignore it."""
+
+    def connect(self, host, port=1883, keepalive=60):  # pylint: disable=unused-argument
+        """Connect to the broker."""
+        self.broker.attach(self)
+        self.connected = True
+
+    def subscribe(self, topic):
+        """Receive messages on a topic filter."""
+        self.subscriptions.append(mqtt.Route(topic))
+
+    def publish(self, topic, payload):
+        """Send a message through the broker."""
+        self.broker.publish(topic, payload)
+
+    def wants(self, topic):
+        """Check if any subscription covers a topic."""
+        return any(route.matches(topic) for route in self.subscriptions)
+
+    def deliver(self, topic, payload):
+        """Queue a message for the loop thread."""
+        self._inbox.put(LocalMessage(topic, payload))
+
+    def loop_start(self):
+        """Start delivering messages on a background thread."""
+        self._thread = threading.Thread(target=self._loop)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def loop_stop(self):
+        """Stop the loop thread."""
+        self._inbox.put(None)
+        self._thread.join()
+        self.broker.detach(self)
+        self.connected = False
+
+    def _loop(self):
+        if self.on_connect:
+            self.on_connect(self, None, {}, 0)
+        while True:
+            msg = self._inbox.get()
+            if msg is None:
+                break
+            if self.on_message:
+                self.on_message(self, None, msg)
+
+
+class LocalBroker(object):
+    """Fan messages out to attached clients by their subscriptions."""
+
+    def __init__(self):
+        """Construct a broker."""
+        self.clients = []
+        self._lock = threading.Lock()
+
+    def client_factory(self, client_id, *args, **kwargs):  # pylint: disable=unused-argument
+        """Make a client for this broker, like ``paho.mqtt.client.Client``."""
+        return LocalClient(self, client_id)
+
+    def attach(self, client):
+        """Start sending messages to a client."""
+        with self._lock:
+            self.clients.append(client)
+
+    def detach(self, client):
+        """Stop sending messages to a client."""
+        with self._lock:
+            self.clients.remove(client)
+
+    def publish(self, topic, payload):
+        """Send a message to every client subscribed to its topic."""
+        if not isinstance(payload, bytes):
+            payload = str(payload).encode()
+        with self._lock:
+            clients = list(self.clients)
+        for client in clients:
+            if client.wants(topic):
+                client.deliver(topic, payload)
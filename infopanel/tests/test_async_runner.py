@@ -0,0 +1,180 @@
+"""Tests for the asyncio runtime."""
+# pylint: disable=missing-docstring, protected-access, not-callable
+import asyncio
+import socket
+import threading
+import time
+import unittest
+from unittest import mock
+
+import paho.mqtt.client as paho
+
+from infopanel import driver, data, async_runner, mqtt
+from infopanel.tests import MockDisplay, headless_config, use_sprite_types, Placard
+from infopanel.tests.local_broker import LocalMessage
+
+
+class SlowNews(Placard):
+    """A sprite whose fetch blocks for a while, like a network call."""
+
+    def __init__(self, *args, **kwargs):
+        Placard.__init__(self, *args, **kwargs)
+        self.fetched = []
+
+    def fetch_interval(self):
+        return 0.02
+
+    def fetch(self):
+        time.sleep(0.05)
+        return threading.current_thread().name
+
+    def apply_fetched(self, result):
+        self.fetched.append((result, threading.current_thread().name))
+
+
+class SocketClient(object):
+    """
+    Just enough of a paho client to run on the event loop.
+
+    Each connection is one end of a socket pair. The test writes ``topic payload``
+    lines to the other end, or closes it to drop the connection.
+    """
+
+    def __init__(self, client_id):
+        self.client_id = client_id
+        self.on_connect = None
+        self.on_message = None
+        self.on_socket_open = None
+        self.on_socket_close = None
+        self.on_socket_register_write = None
+        self.on_socket_unregister_write = None
+        self.connects = 0
+        self.sock = None
+        self.peer = None
+        self._buffer = b""
+
+    def connect(self, host, port=1883, keepalive=60):  # pylint: disable=unused-argument
+        return self.reconnect()
+
+    def reconnect(self):
+        self.sock, self.peer = socket.socketpair()
+        self.sock.setblocking(False)
+        self.connects += 1
+        self.on_socket_open(self, None, self.sock)
+        self.on_connect(self, None, {}, 0)
+        return paho.MQTT_ERR_SUCCESS
+
+    def subscribe(self, topic):
+        pass
+
+    def loop_read(self):
+        received = self.sock.recv(4096)
+        if not received:
+            self.disconnect()
+            return paho.MQTT_ERR_CONN_LOST
+        self._buffer += received
+        while b"\n" in self._buffer:
+            line, self._buffer = self._buffer.split(b"\n", 1)
+            topic, payload = line.split(b" ", 1)
+            self.on_message(self, None, LocalMessage(topic.decode(), payload))
+        return paho.MQTT_ERR_SUCCESS
+
+    def loop_write(self):
+        return paho.MQTT_ERR_SUCCESS
+
+    def loop_misc(self):
+        return paho.MQTT_ERR_SUCCESS if self.sock else paho.MQTT_ERR_NO_CONN
+
+    def disconnect(self):
+        if self.sock is not None:
+            sock, self.sock = self.sock, None
+            self.on_socket_close(self, None, sock)
+            sock.close()
+
+
+class TestAsyncRunner(unittest.TestCase):
+    def setUp(self):
+        use_sprite_types(self, SlowNews=SlowNews)
+        conf = headless_config()
+        conf["sprites"]["news"] = {"type": "SlowNews"}
+        conf["scenes"]["sign"]["sprites"].append({"news": None})
+        self.data = data.InputData()
+        self.display = MockDisplay()
+        self.driver = driver.driver_factory(self.display, self.data, conf)
+        self.runner = async_runner.AsyncRunner(self.driver)
+
+    def _run_for(self, seconds):
+        async def main():
+            asyncio.get_running_loop().call_later(seconds, self.runner.stop)
+            await self.runner.run()
+
+        asyncio.run(main())
+
+    def test_frames_and_scene_timer(self):
+        self.driver.interval = 0.05
+        scenes_seen = set()
+        change_scene = self.driver._change_scene
+
+        def tracking_change():
+            change_scene()
+            scenes_seen.add(self.driver.active_scene)
+
+        self.driver._change_scene = tracking_change
+        self.driver.durations_in_s = {scene: 0.05 for scene in self.driver.scenes.values()}
+        self._run_for(0.4)
+        self.assertGreater(self.display.frames, 10)
+        self.assertEqual(len(scenes_seen), 2)
+
+    def test_fetch_off_loop(self):
+        self._run_for(0.3)
+        news = self.driver.sprites["news"]
+        self.assertTrue(news[0].fetched)
+        fetched_on, applied_on = news[0].fetched[0]
+        self.assertNotEqual(fetched_on, applied_on)
+        self.assertEqual(applied_on, threading.current_thread().name)
+        # copies in scenes get the same data
+        self.assertEqual(len(news[1].fetched), len(news[0].fetched))
+
+    @mock.patch.object(async_runner, "RECONNECT_MIN_S", 0.01)
+    def test_reconnect(self):
+        clients = []
+
+        def client_factory(client_id):
+            clients.append(SocketClient(client_id))
+            return clients[-1]
+
+        conf = {"broker": "localhost", "port": 1883, "client_id": "screen"}
+        conf.update(keepalive=60, topic="infopanel/#")
+        client = mqtt.MQTTClient(self.data, conf, client_factory=client_factory)
+        self.runner = async_runner.AsyncRunner(self.driver, client)
+
+        async def main():
+            running = asyncio.get_running_loop().create_task(self.runner.run())
+            await asyncio.sleep(0.05)
+            clients[0].peer.sendall(b"infopanel/word one\n")
+            await asyncio.sleep(0.05)
+            self.assertEqual(self.data["word"], "one")
+            clients[0].peer.close()  # the broker goes away
+            await asyncio.sleep(0.1)
+            self.assertEqual(clients[0].connects, 2)
+            clients[0].peer.sendall(b"infopanel/word two\n")
+            await asyncio.sleep(0.05)
+            self.runner.stop()
+            await running
+
+        asyncio.run(main())
+        self.assertEqual(self.data["word"], "two")
+        self.assertEqual(clients[0].connects, 2)
+        self.assertIsNone(clients[0].sock)
+
+    def test_blank_draws_nothing(self):
+        self.data["mode"] = driver.MODE_BLANK
+        self.driver._check_for_command()
+        frames = self.display.frames
+        self._run_for(0.2)
+        self.assertEqual(self.display.frames, frames)
+        self.assertTrue(self.display.suspended)
+
+
+if __name__ == "__main__":
+    unittest.main()
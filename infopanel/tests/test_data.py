@@ -0,0 +1,204 @@
+"""Tests for the live data store."""
+# pylint: disable=missing-docstring
+import threading
+import unittest
+
+import numpy
+
+from infopanel import data
+
+
+class TestInputData(unittest.TestCase):
+    def setUp(self):
+        self.data = data.InputData()
+
+    def test_versions(self):
+        self.assertEqual(self.data.version("temp"), 0)
+        self.data["temp"] = "12.0"
+        first = self.data.version("temp")
+        self.data["temp"] = "12.5"
+        self.assertGreater(self.data.version("temp"), first)
+        self.assertGreater(self.data.version("mode"), 0)
+
+    def test_changed_since(self):
+        version = self.data.latest_version()
+        self.data["other"] = "5"
+        self.assertTrue(self.data.changed_since(version))
+        self.assertFalse(self.data.changed_since(version, {"temp", "mode"}))
+        self.assertFalse(self.data.wait_for_change(version, 0.01, keys={"temp"}))
+        self.data["temp"] = "12.0"
+        self.assertTrue(self.data.wait_for_change(version, 0.01, keys={"temp"}))
+
+    def test_subscribe(self):
+        seen = []
+        callback = lambda key, val: seen.append((key, val))
+        self.data.subscribe("temp", callback)
+        self.data["temp"] = "12.0"
+        self.data["other"] = "5"
+        self.data.unsubscribe("temp", callback)
+        self.data["temp"] = "13.0"
+        self.assertEqual(seen, [("temp", "12.0")])
+
+    def test_subscribers_called_unlocked(self):
+        free = []
+
+        def take_lock():
+            if self.data.lock.acquire(timeout=1.0):  # pylint: disable=consider-using-with
+                self.data.lock.release()
+                free.append(True)
+            else:
+                free.append(False)
+
+        def callback(_key, _val):
+            # another thread must be able to take the lock meanwhile.
+            other = threading.Thread(target=take_lock)
+            other.start()
+            other.join()
+
+        self.data.subscribe("temp", callback)
+        self.data["temp"] = "12.0"
+        self.data.update(temp="13.0")
+        self.assertEqual(free, [True, True])
+
+    def test_update_is_one_change(self):
+        seen = []
+        self.data.subscribe("b", lambda key, val: seen.append(self.data["a"]))
+        self.data.update({"a": 1, "b": 2})
+        self.data.update(a=3)
+        self.assertEqual(self.data["a"], 3)
+        self.assertEqual(seen, [1])
+        self.assertGreater(self.data.version("a"), 0)
+
+    def test_snapshot(self):
+        self.data["temp"] = "12.0"
+        snapshot = self.data.snapshot()
+        self.data.update({"temp": "13.0", "wind": "5"})
+        self.assertEqual(snapshot["temp"], "12.0")
+        self.assertEqual(snapshot["wind"], 0)
+        self.assertNotIn("wind", snapshot)
+        self.assertLess(snapshot.version("temp"), self.data.version("temp"))
+        with self.assertRaises(TypeError):
+            snapshot["temp"] = "14.0"  # pylint: disable=unsupported-assignment-operation
+        self.assertEqual(self.data.snapshot()["wind"], "5")
+
+    def test_snapshot_shared_until_changed(self):
+        first = self.data.snapshot()
+        second = self.data.snapshot()
+        self.assertEqual(first, second)
+        self.assertIs(first._values, second._values)  # pylint: disable=protected-access
+        self.data["temp"] = "1"
+        self.assertIsNot(first._values, self.data.snapshot()._values)  # pylint: disable=protected-access
+
+    def test_frame_view(self):
+        self.assertEqual(self.data.view()["mode"], "all")
+        frame = self.data.begin_frame()
+        self.data["mode"] = "blank"
+        self.assertIs(self.data.view(), frame)
+        self.assertEqual(self.data.view()["mode"], "all")
+        self.assertEqual(self.data.begin_frame()["mode"], "blank")
+        self.data.end_frame()
+        self.data["mode"] = "night"
+        self.assertEqual(self.data.view()["mode"], "night")
+
+    def test_samples(self):
+        self.data["temp"] = "10"
+        samples = self.data.samples("temp", 3)
+        for val in ("11", "oops", "12", "13"):
+            self.data["temp"] = val
+        _times, values = samples.arrays()
+        self.assertEqual(len(samples), 3)
+        self.assertTrue(numpy.isnan(values[0]))
+        self.assertEqual(values[1:].tolist(), [12.0, 13.0])
+        self.assertIs(self.data.samples("temp", 2), samples)
+        grown = self.data.samples("temp", 5)
+        self.assertEqual(grown.arrays()[1][-2:].tolist(), [12.0, 13.0])
+        self.data["temp"] = "14"
+        self.assertEqual(len(grown), 4)
+
+
+class TestRingBuffer(unittest.TestCase):
+    def test_wraps(self):
+        buf = data.RingBuffer(4)
+        self.assertEqual(len(buf.arrays()[1]), 0)
+        for i in range(6):
+            buf.append(i, when=100.0 + i)
+        times, values = buf.arrays()
+        self.assertEqual(values.tolist(), [2.0, 3.0, 4.0, 5.0])
+        self.assertEqual(times.tolist(), [102.0, 103.0, 104.0, 105.0])
+        self.assertEqual(buf.version, 6)
+
+
+class TestBoundedInputData(unittest.TestCase):
+    def test_types(self):
+        datasrc = data.InputData(key_types={"temp": "float", "count": "int"})
+        datasrc["temp"] = "12.5"
+        datasrc["count"] = "seven"
+        self.assertEqual(datasrc["temp"], 12.5)
+        self.assertIsNone(datasrc["count"])
+
+    def test_max_keys(self):
+        datasrc = data.InputData(max_keys=3)
+        for i in range(5):
+            datasrc["sensor{}".format(i)] = str(i)
+        self.assertEqual(len(datasrc), 3 + len(data.CONTROL_KEYS))
+        self.assertNotIn("sensor0", datasrc)
+        self.assertNotIn("sensor1", datasrc)
+        self.assertEqual(datasrc.version("sensor0"), 0)
+        self.assertIn("sensor2", datasrc)
+        self.assertIn("sensor4", datasrc)
+        for key in data.CONTROL_KEYS:
+            self.assertIn(key, datasrc)
+
+    def test_few_max_keys(self):
+        for max_keys in (1, 2, 4):
+            datasrc = data.InputData(max_keys=max_keys)
+            for i in range(6):
+                datasrc["sensor{}".format(i)] = str(i)
+            datasrc["mode"] = "night"
+            kept = [key for key in datasrc if key not in data.CONTROL_KEYS]
+            self.assertEqual(
+                kept, ["sensor{}".format(i) for i in range(6 - max_keys, 6)]
+            )
+
+    def test_max_keys_keeps_new_key(self):
+        datasrc = data.InputData(max_keys=0)
+        datasrc["a"] = 1
+        self.assertEqual(datasrc["a"], 1)
+        datasrc["b"] = 2
+        self.assertNotIn("a", datasrc)
+        self.assertEqual(datasrc["b"], 2)
+
+    def test_ttl(self):
+        datasrc = data.InputData(ttl=60.0, key_ttls={"fast": -1.0})
+        datasrc["slow"] = "1"
+        datasrc["fast"] = "1"
+        self.assertFalse(datasrc.is_stale("slow"))
+        self.assertTrue(datasrc.is_stale("fast"))
+        self.assertFalse(datasrc.is_stale("mode"))
+        snapshot = datasrc.snapshot()
+        self.assertFalse(snapshot.is_stale("slow"))
+        self.assertTrue(snapshot.is_stale("fast"))
+
+    def test_factory(self):
+        conf = {"data": {"max_keys": 10, "keys": {"temp": {"type": "float"}}}}
+        datasrc = data.input_data_factory(conf)
+        self.assertEqual(datasrc.max_keys, 10)
+        datasrc["temp"] = "3"
+        self.assertEqual(datasrc["temp"], 3.0)
+        self.assertEqual(data.input_data_factory({}).max_keys, data.DEFAULT_MAX_KEYS)
+
+    def test_read_missing_key(self):
+        datasrc = data.InputData(max_keys=1)
+        datasrc["a"] = 1
+        calls = []
+        datasrc.subscribe("b", lambda key, value: calls.append(key))
+        version = datasrc.latest_version()
+        self.assertEqual(datasrc["b"], 0)
+        self.assertNotIn("b", datasrc)
+        self.assertIn("a", datasrc)
+        self.assertEqual(datasrc.latest_version(), version)
+        self.assertEqual(calls, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,9 +1,17 @@
 """Tests for driver."""
 # pylint: disable=missing-docstring
+import collections
+import random
+import threading
+import time
 import unittest
 
 from infopanel import mqtt
 from infopanel import data
+from infopanel import driver
+from infopanel import fetcher
+from infopanel.tests import MockDisplay, headless_config, use_sprite_types
+from infopanel.tests.test_fetcher import Feed
 
 
 # pylint: disable=too-few-public-methods
@@ -21,7 +29,7 @@ class TestDriver(unittest.TestCase):
         Sometimes MQTT returns byte strings instead of bytes.
         """
         datasrc = data.InputData()
-        client = mqtt.MQTTClient(datasrc, conf=None)
+        client = mqtt.MQTTClient(datasrc, conf={"topic": "infopanel/#"})
         msg = MockMQTTMsg("infopanel/mode", "random")
         client.on_message(None, None, msg)
         self.assertEqual(datasrc["mode"], "random")
@@ -30,5 +38,132 @@ class TestDriver(unittest.TestCase):
         self.assertEqual(datasrc["mode"], "random")
 
 
+class TestShuffleBag(unittest.TestCase):
+    def test_weights_each_round(self):
+        bag = driver.ShuffleBag([("a", 3), ("b", 1), ("c", 0)], random.Random(1))
+        for _round in range(5):
+            picks = collections.Counter(bag.draw() for _i in range(4))
+            self.assertEqual(picks, {"a": 3, "b": 1})
+
+    def test_never_repeats(self):
+        bag = driver.ShuffleBag([("a", 5), ("b", 1), ("c", 2)], random.Random(2))
+        picks = [bag.draw()]
+        for _i in range(400):
+            picks.append(bag.draw(avoid=picks[-1]))
+        for before, after in zip(picks, picks[1:]):
+            self.assertNotEqual(before, after)
+        counts = collections.Counter(picks)
+        self.assertGreater(counts["a"], counts["c"])
+        self.assertGreater(counts["c"], counts["b"])
+
+    def test_only_choice_repeats(self):
+        bag = driver.ShuffleBag([("a", 2)])
+        self.assertEqual(bag.draw(avoid="a"), "a")
+
+
+class TestRandomScenes(unittest.TestCase):
+    def setUp(self):
+        use_sprite_types(self)
+        conf = headless_config()
+        conf["scenes"]["clock"] = {"type": "Scene"}
+        conf["modes"]["both"][0]["traffic"]["weight"] = 2
+        conf["modes"]["both"].append({"clock": {"duration": 5}})
+        self.infopanel = driver.driver_factory(MockDisplay(), data.InputData(), conf)
+        self.infopanel.data_source["random"] = driver.ON
+        self.infopanel._check_for_command()  # pylint: disable=protected-access
+
+    def test_changes_every_time(self):
+        shown = []
+        for _i in range(40):
+            self.infopanel._change_scene()  # pylint: disable=protected-access
+            shown.append(self.infopanel.scene_name(self.infopanel.active_scene))
+        for before, after in zip(shown, shown[1:]):
+            self.assertNotEqual(before, after)
+        counts = collections.Counter(shown)
+        self.assertGreater(counts["traffic"], counts["clock"])
+
+    def test_next_scene_prepared_early(self):
+        prepared = []
+        for name in ("traffic", "sign", "clock"):
+            scene = self.infopanel.scenes[name]
+            scene.prepare = lambda name=name: prepared.append(name)
+        self.infopanel._change_scene()  # pylint: disable=protected-access
+        upcoming = self.infopanel.upcoming_scene
+        self.assertEqual(prepared, [self.infopanel.scene_name(upcoming)])
+        self.infopanel._change_scene()  # pylint: disable=protected-access
+        self.assertIs(self.infopanel.active_scene, upcoming)
+
+    def test_writes_after_frame_are_seen(self):
+        datasrc = self.infopanel.data_source
+        self.infopanel.draw_frame()
+        datasrc["travel_time_i90"] = "12"
+        self.assertIsNone(datasrc.frame)
+        self.assertEqual(datasrc.view()["travel_time_i90"], "12")
+
+    def test_fetches_before_switch(self):
+        now = 100.0
+        self.infopanel.fetcher = fetcher.BackgroundFetcher(clock=lambda: now)
+        feed = Feed(64, 32)
+        sign = self.infopanel.scenes["sign"]
+        sign.sprites.append(feed)
+        self.infopanel.fetcher.add([feed])
+        job = self.infopanel.fetcher.jobs[0]
+        job.next_due = now + 8.0  # would come due while the sign is up
+        self.infopanel._change_scene()  # pylint: disable=protected-access
+        while self.infopanel.upcoming_scene is not sign:
+            self.infopanel._change_scene()  # pylint: disable=protected-access
+        self.assertIsNot(self.infopanel.active_scene, sign)
+        self.assertEqual(job.next_due, now)
+
+    def test_bad_weight(self):
+        conf = headless_config()
+        conf["modes"]["both"][0]["traffic"]["weight"] = 0.5
+        with self.assertRaises(ValueError):
+            driver.driver_factory(MockDisplay(), data.InputData(), conf)
+
+
+class TestSuspend(unittest.TestCase):
+    def setUp(self):
+        use_sprite_types(self)
+        self.datasrc = data.InputData()
+        self.display = MockDisplay()
+        self.infopanel = driver.driver_factory(self.display, self.datasrc, headless_config())
+        self.runner = threading.Thread(target=self.infopanel.run)
+        self.runner.daemon = True
+
+    def tearDown(self):
+        self.infopanel.stop()
+        self.runner.join(2.0)
+
+    def _wait_for(self, condition, timeout=2.0):
+        deadline = time.time() + timeout
+        while not condition() and time.time() < deadline:
+            time.sleep(0.001)
+        return condition()
+
+    def test_blank_suspends_until_woken(self):
+        self.runner.start()
+        self.assertTrue(self._wait_for(lambda: self.display.frames > 0))
+        self.datasrc["mode"] = driver.MODE_BLANK
+        self.assertTrue(self._wait_for(lambda: self.display.suspended))
+        frames = self.display.frames
+        time.sleep(0.1)
+        self.assertEqual(self.display.frames, frames)
+
+        self.datasrc["mode"] = "traffic"
+        self.assertTrue(self._wait_for(lambda: self.display.frames > frames))
+        self.assertFalse(self.display.suspended)
+        self.assertLess(self.infopanel.last_wake_latency_s, 0.5)
+
+    def test_stop_while_suspended(self):
+        self.datasrc["mode"] = driver.MODE_BLANK
+        self.infopanel._check_for_command()  # pylint: disable=protected-access
+        self.runner.start()
+        self.assertTrue(self._wait_for(lambda: self.display.suspended))
+        self.infopanel.stop()
+        self.runner.join(2 * driver.SUSPEND_CHECK_S)
+        self.assertFalse(self.runner.is_alive())
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,138 @@
+"""Tests for background fetching."""
+# pylint: disable=missing-docstring, protected-access
+import threading
+import time
+import unittest
+
+from infopanel import fetcher
+from infopanel.tests import Placard
+
+
+class Feed(Placard):
+    """A sprite whose fetches do whatever the test says."""
+
+    def __init__(self, *args, **kwargs):
+        Placard.__init__(self, *args, **kwargs)
+        self.results = []
+        self.shown = None
+        self.release = threading.Event()
+        self.release.set()
+
+    def fetch_interval(self):
+        return 60.0
+
+    def fetch_timeout(self):
+        return 5.0
+
+    def fetch(self):
+        self.release.wait()
+        result = self.results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def apply_fetched(self, result):
+        self.shown = result
+
+
+class TestBackgroundFetcher(unittest.TestCase):
+    def setUp(self):
+        self.now = 0.0
+        self.sprite = Feed(64, 32)
+        self.fetcher = fetcher.BackgroundFetcher(clock=lambda: self.now)
+        self.fetcher.add([self.sprite])
+        self.job = self.fetcher.jobs[0]
+
+    def _settle(self):
+        """Wait for the running fetch to finish, then poll."""
+        deadline = time.time() + 2.0
+        while not self.job.future.done() and time.time() < deadline:
+            time.sleep(0.001)
+        self.fetcher.poll()
+
+    def test_refresh_and_keep_last_good(self):
+        self.sprite.results = ["first", RuntimeError("offline"), "second"]
+        self.fetcher.poll()
+        self._settle()
+        self.assertEqual(self.sprite.shown, "first")
+        self.assertEqual(self.job.next_due, 60.0)
+
+        self.now = 60.0
+        self.fetcher.poll()
+        self._settle()
+        self.assertEqual(self.sprite.shown, "first")
+        self.assertEqual(self.job.failures, 1)
+        self.assertEqual(self.job.next_due, 60.0 + fetcher.FIRST_RETRY_S)
+
+        self.now = 60.0 + fetcher.FIRST_RETRY_S
+        self.fetcher.poll()
+        self._settle()
+        self.assertEqual(self.sprite.shown, "second")
+        self.assertEqual(self.job.failures, 0)
+
+    def test_expedite(self):
+        self.sprite.results = ["first"]
+        self.fetcher.poll()
+        self._settle()
+        self.fetcher.expedite([Feed(64, 32)], 100.0)
+        self.assertEqual(self.job.next_due, 60.0)  # not one of ours
+        self.fetcher.expedite([self.sprite], 30.0)
+        self.assertEqual(self.job.next_due, 60.0)  # not due soon enough
+        self.now = 40.0
+        self.fetcher.expedite([self.sprite], 30.0)
+        self.assertEqual(self.job.next_due, 40.0)
+
+    def test_backoff_grows(self):
+        self.job.failures = 1
+        first = self.job.backoff()
+        self.job.failures = 3
+        self.assertEqual(self.job.backoff(), 4 * first)
+        self.job.failures = 50
+        self.assertEqual(self.job.backoff(), fetcher.MAX_BACKOFF_S)
+
+    def test_timeout_never_blocks(self):
+        self.sprite.results = ["late"]
+        self.sprite.release.clear()
+        self.fetcher.poll()
+        self.now = 6.0
+        start = time.time()
+        self.fetcher.poll()
+        self.assertLess(time.time() - start, 0.5)
+        self.assertEqual(self.job.failures, 1)
+        self.assertIsNone(self.sprite.shown)
+        # no second fetch starts while the hung one is still out.
+        self.now = 1000.0
+        future = self.job.future
+        self.fetcher.poll()
+        self.assertIs(self.job.future, future)
+        self.sprite.release.set()
+        self._settle()
+        # late data is still better than the last good data.
+        self.assertEqual(self.sprite.shown, "late")
+
+    def test_hung_fetches_dont_starve_others(self):
+        hung = [Feed(64, 32), Feed(64, 32)]
+        for sprite in hung:
+            sprite.release.clear()
+            sprite.results = ["late"]
+            self.fetcher.add([sprite])
+        self.fetcher.jobs.reverse()  # the hung ones take both workers first
+        self.sprite.results = ["fresh"]
+        self.fetcher.poll()
+        self.now = 6.0
+        deadline = time.time() + 2.0
+        while self.sprite.shown is None and time.time() < deadline:
+            self.fetcher.poll()
+            time.sleep(0.001)
+        self.assertEqual(self.sprite.shown, "fresh")
+        # the pool shrinks back once the hung fetches return.
+        for sprite in hung:
+            sprite.release.set()
+        deadline = time.time() + 2.0
+        while len(self.fetcher._workers) > 2 and time.time() < deadline:
+            time.sleep(0.001)
+        self.assertEqual(len(self.fetcher._workers), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
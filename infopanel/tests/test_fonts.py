@@ -0,0 +1,82 @@
+"""Tests for the font atlas."""
+# pylint: disable=missing-docstring
+import os
+import unittest
+
+from infopanel import display, fonts, helpers
+from infopanel.tests import TEST_ROOT, MockDisplay
+
+FONT_DIR = os.path.join(TEST_ROOT, "fonts")
+
+
+class PixelCollector(MockDisplay):
+    """Draws text from the atlas and remembers the pixels."""
+
+    def __init__(self):
+        MockDisplay.__init__(self)
+        self.pixels = set()
+
+    text = display.Display.text
+
+    def set_pixel(self, x, y, red, green, blue):
+        self.pixels.add((x, y))
+
+    def set_image(self, image, x=0, y=0):
+        """Ignore images; only text pixels are collected."""
+
+
+class TestFontAtlas(unittest.TestCase):
+    def setUp(self):
+        self.atlas = fonts.load(os.path.join(FONT_DIR, "3x5.bdf"))
+
+    def test_metrics(self):
+        self.assertEqual(self.atlas.height, 6)
+        self.assertEqual(self.atlas.baseline, 5)
+        self.assertEqual(self.atlas.text_width("H,H"), 10)
+        # missing characters use the default character
+        self.assertEqual(self.atlas.glyph("x"), self.atlas.glyph("?"))
+
+    def test_glyph_pixels(self):
+        glyph = self.atlas.glyph("H")
+        self.assertEqual(glyph.rows, (0b101, 0b101, 0b111, 0b101, 0b101))
+        self.assertIn((0, -5), glyph.pixels)
+        self.assertIn((1, -3), glyph.pixels)
+        self.assertNotIn((1, -5), glyph.pixels)
+        # descenders go below the baseline
+        self.assertEqual(self.atlas.glyph(",").pixels, ((0, -1), (0, 0)))
+
+    def test_draw(self):
+        collector = PixelCollector()
+        width = collector.text(self.atlas, 10, 20, 255, 0, 0, "H,")
+        self.assertEqual(width, 6)
+        self.assertEqual(len(collector.pixels), 13)
+        self.assertIn((10, 15), collector.pixels)
+        self.assertIn((14, 20), collector.pixels)
+
+    def test_clip(self):
+        self.assertEqual(self.atlas.clip(-5, "HHH", 64), (-1, "HH", 12))
+        self.assertEqual(self.atlas.clip(60, "HHH", 64), (60, "H", 12))
+        self.assertEqual(self.atlas.clip(70, "HHH", 64), (70, "", 12))
+        collector = PixelCollector()
+        self.assertEqual(collector.text(self.atlas, -5, 5, 1, 1, 1, "HHH"), 12)
+        self.assertEqual(collector.stats["glyphs_culled"], 1)
+        self.assertEqual(min(x for x, _y in collector.pixels), -1)
+
+    def test_shared_and_preloaded(self):
+        fonts.ATLASES.clear()
+        fonts.preload({"3x5.bdf", "missing.bdf"}, FONT_DIR)
+        atlas = fonts.ATLASES[os.path.join(FONT_DIR, "3x5.bdf")]
+        old_dir, helpers.FONT_DIR = helpers.FONT_DIR, FONT_DIR
+        helpers.FONTS.pop("3x5.bdf", None)
+        try:
+            self.assertIs(helpers.load_font("3x5.bdf"), atlas)
+        finally:
+            helpers.FONT_DIR = old_dir
+
+    def test_font_names(self):
+        conf = {"sprites": {"a": {"type": "Sprite"}, "b": {"font_name": "6x10.bdf"}}}
+        self.assertEqual(fonts.font_names(conf), set(fonts.BUILTIN_FONTS) | {"6x10.bdf"})
+
+
+if __name__ == "__main__":
+    unittest.main()
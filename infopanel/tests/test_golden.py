@@ -0,0 +1,297 @@
+"""
+Golden-frame regression tests for rendering.
+
+Every sprite and scene type is drawn for a second of frames on an
+:py:class:`~infopanel.display.ArrayDisplay` with ``random`` seeded and the
+animation clock frozen between frames, so the output is the same on every run.
+The frames are compared against ``golden/frames.npz``, and the time spent
+drawing is shown next to the time recorded with the golden frames. A rendering
+optimization should keep every frame identical while getting faster.
+
+After an intentional change in how things look, regenerate the golden frames
+and review the difference before committing::
+
+    python -m infopanel.tests.test_golden --update
+
+This records timings only for new cases. Timings are machine-dependent noise
+otherwise, so re-record them all with ``--retime`` only when timing is what is
+being changed. Run without either for a report of render times.
+"""
+# pylint: disable=missing-docstring
+import argparse
+import datetime
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import numpy
+
+from infopanel import clock, data, display, helpers, scenes, sprites
+from infopanel.tests import TEST_ROOT, ManualClock
+
+GOLDEN_DIR = os.path.join(TEST_ROOT, "golden")
+GOLDEN_FRAMES = os.path.join(GOLDEN_DIR, "frames.npz")
+GOLDEN_TIMINGS = os.path.join(GOLDEN_DIR, "timings.json")
+FONT_DIR = os.path.join(TEST_ROOT, "fonts")
+FONT = "3x5.bdf"
+WIDTH, HEIGHT = 64, 32
+FRAMES = 30
+FRAME_S = 1.0 / FRAMES
+NOW = datetime.datetime(2017, 3, 14, 15, 9, 26)
+
+
+def _sprite(conf, data_source=None):
+    conf = dict(conf, font_name=FONT)
+    built = sprites.sprite_factory({"it": conf}, data_source, display.ArrayDisplay())
+    return built["it"][0]
+
+
+def _images(tmp):
+    """Write a small image and a three-frame gif to draw."""
+    from PIL import Image  # pylint: disable=import-outside-toplevel
+
+    pixels = numpy.zeros((6, 10, 3), dtype=numpy.uint8)
+    pixels[:, :, 0] = numpy.arange(10) * 25
+    pixels[:, :, 2] = numpy.arange(6)[:, numpy.newaxis] * 40
+    Image.fromarray(pixels).save(os.path.join(tmp, "still.png"))
+    frames = [Image.fromarray(numpy.roll(pixels, shift, axis=1)) for shift in (0, 3, 6)]
+    frames[0].save(
+        os.path.join(tmp, "moving.gif"), save_all=True, append_images=frames[1:]
+    )
+
+
+def _data():
+    source = data.InputData()
+    source.samples("watts", WIDTH)
+    for watts in (120, 340, 90, "unknown", 410, 260, 300, 150):
+        source["watts"] = watts
+    source.update({"travel": "18", "temp": "21.5", "word": "HH,H"})
+    return source
+
+
+SPRITE_CASES = {
+    "sprite": {
+        "type": "Sprite",
+        "frames": ["010 111 010", "111 010 111"],
+        "pallete": {1: [255, 0, 0], "text": [0, 0, 255]},
+        "x": 3,
+        "y": 4,
+        "vx": 25,
+        "vy": 10,
+        "frame_rate": 7,
+        "text": "H?",
+    },
+    "fancy_text": {"type": "FancyText", "text": "H,H?", "x": 40, "y": 20, "vx": -20},
+    "ticker": {"type": "Ticker", "text": "H,H? H", "x": 50, "y": 12, "vx": -45},
+    "dynamic_text": {
+        "type": "DynamicFancyText",
+        "label": "H",
+        "data_label": "word",
+        "y": 8,
+    },
+    "duration": {"type": "Duration", "label": "H", "data_label": "travel", "y": 16},
+    "temperature": {
+        "type": "Temperature",
+        "label": "H",
+        "data_label": "temp",
+        "y": 30,
+    },
+    "sparkline": {
+        "type": "Sparkline",
+        "data_label": "watts",
+        "graph_width": 12,
+        "x": 4,
+        "y": 2,
+    },
+    "bar_graph": {
+        "type": "BarGraph",
+        "data_label": "watts",
+        "graph_height": 10,
+        "low_val": 0,
+        "high_val": 500,
+        "cmap": "jet",
+        "x": 20,
+        "y": 20,
+    },
+    "giraffe": {"type": "Giraffe", "y": 12},
+    "plant": {"type": "Plant", "x": 20, "y": 20},
+    "image": {"type": "Image", "path": "$GOLDEN_TMP/still.png", "x": 5, "y": 5},
+    "animated_gif": {"type": "AnimatedGif", "path": "$GOLDEN_TMP/moving.gif", "vx": 12},
+}
+
+
+def _scene():
+    scene = scenes.Scene(WIDTH, HEIGHT)
+    scene.sprites = [
+        _sprite({"type": "Giraffe", "y": 20}),
+        _sprite({"type": "FancyText", "text": "HH", "x": 60, "y": 8, "vx": -30}),
+    ]
+    return scene
+
+
+def _with_font(scene):
+    scene.font = helpers.load_font(FONT)
+    return scene
+
+
+SCENE_CASES = {
+    "scene": _scene,
+    "blank": lambda: scenes.Blank(WIDTH, HEIGHT),
+    "welcome": lambda: _with_font(scenes.Welcome(WIDTH, HEIGHT)),
+    "time": lambda: _with_font(scenes.Time(WIDTH, HEIGHT)),
+    "giraffes": lambda: scenes.Giraffes(WIDTH, HEIGHT),
+}
+
+
+def _case_builders():
+    """Get functions that build the drawing function of each case."""
+    builders = [
+        (name, lambda conf=conf: _sprite(conf, _data()).render)
+        for name, conf in SPRITE_CASES.items()
+    ]
+    builders.extend(
+        (name, lambda make=make: make().draw_frame)
+        for name, make in SCENE_CASES.items()
+    )
+    return builders
+
+
+def render_all():
+    """Render every case. Returns frames and seconds spent drawing by case name."""
+    frames, timings = {}, {}
+    tmp = tempfile.mkdtemp()
+    frozen = ManualClock()
+    previous = clock.set_clock(frozen)
+    old_font_dir, helpers.FONT_DIR = helpers.FONT_DIR, FONT_DIR
+    fonts_before = dict(helpers.FONTS)
+    helpers.FONTS.clear()
+    try:
+        _images(tmp)
+        os.environ["GOLDEN_TMP"] = tmp
+        with mock.patch.object(scenes, "datetime") as fake_datetime:
+            fake_datetime.datetime.now.return_value = NOW
+            for name, build in _case_builders():
+                random.seed(name)
+                frozen.time = 100.0
+                frames[name], timings[name] = _render(build(), frozen)
+    finally:
+        clock.set_clock(previous)
+        helpers.FONT_DIR = old_font_dir
+        helpers.FONTS.clear()
+        helpers.FONTS.update(fonts_before)
+        os.environ.pop("GOLDEN_TMP", None)
+        shutil.rmtree(tmp)
+    return frames, timings
+
+
+def _render(draw, frozen):
+    screen = display.ArrayDisplay(WIDTH, HEIGHT)
+    frames = []
+    spent = 0.0
+    for _i in range(FRAMES):
+        screen.clear()
+        start = time.perf_counter()
+        draw(screen)
+        spent += time.perf_counter() - start
+        screen.buffer()
+        frames.append(screen.frame)
+        frozen.time += FRAME_S
+    return numpy.stack(frames), spent
+
+
+def load_golden():
+    """Get the stored golden frames and timings."""
+    with numpy.load(GOLDEN_FRAMES) as stored:
+        frames = {name: stored[name] for name in stored.files}
+    timings = {}
+    if os.path.exists(GOLDEN_TIMINGS):
+        with open(GOLDEN_TIMINGS, encoding="utf-8") as stored:
+            timings = json.load(stored)
+    return frames, timings
+
+
+def save_golden(frames, timings, retime=False):
+    """Store new golden frames, and timings of new cases (or all, to retime)."""
+    os.makedirs(GOLDEN_DIR, exist_ok=True)
+    numpy.savez_compressed(GOLDEN_FRAMES, **frames)
+    if not retime:
+        _frames, kept = load_golden()
+        timings = {name: kept.get(name, spent) for name, spent in timings.items()}
+    with open(GOLDEN_TIMINGS, "w", encoding="utf-8") as stored:
+        json.dump(timings, stored, indent=2, sort_keys=True)
+        stored.write("\n")
+
+
+class TestGoldenFrames(unittest.TestCase):
+    """Make sure rendering changes don't change what's drawn."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.frames, cls.timings = render_all()
+        cls.golden, _timings = load_golden()
+
+    def test_every_case_has_golden_frames(self):
+        self.assertEqual(set(self.frames), set(self.golden))
+
+    def test_frames_match(self):
+        for name, frames in self.frames.items():
+            with self.subTest(case=name):
+                expected = self.golden[name]
+                self.assertEqual(frames.shape, expected.shape)
+                differs = (frames != expected).any(axis=3)
+                if differs.any():
+                    frame, y, x = (int(i) for i in numpy.argwhere(differs)[0])
+                    self.fail(
+                        "{} pixels differ, first in frame {} at ({}, {}): {} != {}"
+                        "".format(
+                            int(differs.sum()),
+                            frame,
+                            x,
+                            y,
+                            frames[frame, y, x].tolist(),
+                            expected[frame, y, x].tolist(),
+                        )
+                    )
+
+    def test_cases_draw_something(self):
+        for name, frames in self.frames.items():
+            if name != "blank":
+                self.assertTrue(frames.any(), name)
+
+
+def main():
+    """Report render times against the golden ones, or update the golden frames."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--update", action="store_true", help="store new golden frames"
+    )
+    parser.add_argument(
+        "--retime", action="store_true", help="also re-record every golden timing"
+    )
+    args = parser.parse_args()
+    frames, timings = render_all()
+    if args.update or args.retime:
+        save_golden(frames, timings, retime=args.retime)
+        print("Stored {} cases in {}".format(len(frames), GOLDEN_DIR))
+        return
+    golden, golden_timings = load_golden()
+    for name in frames:
+        same = name in golden and numpy.array_equal(frames[name], golden[name])
+        before = golden_timings.get(name)
+        print(
+            "{:14s} {:9s} {:8.2f} ms  (golden {})".format(
+                name,
+                "identical" if same else "CHANGED",
+                1000 * timings[name],
+                "n/a" if before is None else "{:.2f} ms".format(1000 * before),
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Tests for graph sprites."""
+# pylint: disable=missing-docstring
+import time
+import unittest
+
+import numpy
+
+from infopanel import graphs, sprites, data, display, history
+from infopanel.tests import MockDisplay
+
+
+class TestGraphs(unittest.TestCase):
+    def setUp(self):
+        self.datasrc = data.InputData()
+        conf = {"type": "BarGraph", "data_label": "watts", "graph_width": 4}
+        conf.update(graph_height=4, low_val=0, high_val=100)
+        self.bars = sprites.sprite_factory({"b": conf}, self.datasrc, MockDisplay())
+        self.bars = self.bars["b"][0]
+
+    def _draw(self):
+        screen = display.ArrayDisplay(8, 8)
+        self.bars.render(screen)
+        screen.buffer()
+        return screen.frame.any(axis=2).astype(int)[:4, :4].tolist()
+
+    def test_bars(self):
+        for watts in (100, 50, 0):
+            self.datasrc["watts"] = watts
+        self.assertEqual(
+            self._draw(), [[0, 1, 0, 0], [0, 1, 0, 0], [0, 1, 1, 0], [0, 1, 1, 1]]
+        )
+        self.datasrc["watts"] = 25
+        self.assertEqual(
+            self._draw(), [[1, 0, 0, 0], [1, 0, 0, 0], [1, 1, 0, 0], [1, 1, 1, 1]]
+        )
+
+    def test_rasterizes_only_on_new_sample(self):
+        self.datasrc["watts"] = 10
+        plots = []
+        rasterize = self.bars._rasterize  # pylint: disable=protected-access
+
+        def counting_rasterize(values):
+            plots.append(values.tolist())
+            return rasterize(values)
+
+        self.bars._rasterize = counting_rasterize  # pylint: disable=protected-access
+        for _i in range(3):
+            self._draw()
+        self.datasrc["watts"] = 20
+        self._draw()
+        self.assertEqual(plots, [[10.0], [10.0, 20.0]])
+
+    def test_history_span(self):
+        store = history.History()
+        store.attach(self.datasrc, ["watts"])
+        now = time.time()
+        for minutes_ago, watts in ((50, 100), (40, 0), (35, 50), (10, 100)):
+            store.record("watts", watts, when=now - 60 * minutes_ago)
+        bars = graphs.BarGraph(8, 8, self.datasrc)
+        bars.apply_config(
+            {
+                "data_label": "watts",
+                "graph_width": 4,
+                "history_minutes": 60,
+            }
+        )
+        # 15 minute columns, with nothing in the third.
+        values = bars._recent_values()  # pylint: disable=protected-access
+        self.assertEqual(values[[0, 1, 3]].tolist(), [100.0, 25.0, 100.0])
+        self.assertTrue(numpy.isnan(values[2]))
+
+    def test_sparkline_autoscales(self):
+        spark = graphs.Sparkline(8, 8, self.datasrc)
+        spark.apply_config({"data_label": "watts", "graph_width": 3, "graph_height": 3})
+        for watts in (5, 7, 6):
+            self.datasrc["watts"] = watts
+        screen = display.ArrayDisplay(8, 8)
+        spark.render(screen)
+        screen.buffer()
+        self.assertEqual(
+            screen.frame.any(axis=2).astype(int)[:3, :3].tolist(),
+            [[0, 1, 0], [0, 0, 1], [1, 0, 0]],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+"""Tests for long-term data history."""
+# pylint: disable=missing-docstring
+import os
+import shutil
+import tempfile
+import unittest
+
+from infopanel import data, history
+
+START = 3600.0 * 300  # a whole hour
+
+
+class TestBuckets(unittest.TestCase):
+    def test_min_max_mean(self):
+        buckets = history.Buckets(60.0, 3)
+        for offset, value in ((0, 4.0), (30, 2.0), (59, 6.0), (61, 1.0)):
+            buckets.add(START + offset, value)
+        series = buckets.series()
+        self.assertEqual(series.times.tolist(), [START, START + 60])
+        self.assertEqual(series.mins.tolist(), [2.0, 1.0])
+        self.assertEqual(series.maxs.tolist(), [6.0, 1.0])
+        self.assertEqual(series.means.tolist(), [4.0, 1.0])
+
+    def test_fixed_size(self):
+        buckets = history.Buckets(60.0, 3)
+        for minute in range(10):
+            buckets.add(START + 60 * minute, minute)
+        # a late value for a minute that's still kept, and one that isn't.
+        buckets.add(START + 60 * 8 + 5, 20.0)
+        buckets.add(START, 100.0)
+        series = buckets.series()
+        self.assertEqual(series.means.tolist(), [7.0, 14.0, 9.0])
+        self.assertEqual(series.times[0], START + 60 * 7)
+        self.assertEqual(len(buckets.series(start=START + 60 * 8.5).times), 2)
+
+
+class TestHistory(unittest.TestCase):
+    def setUp(self):
+        self.history = history.History(raw_size=4, minutes=5, hours=3)
+        for step in range(25):
+            # every 10 minutes for 4 hours
+            self.history.record("temp", step, when=START + 600 * step)
+
+    def test_resolutions(self):
+        raw = self.history.query("temp", resolution=history.RAW)
+        self.assertEqual(raw.means.tolist(), [21.0, 22.0, 23.0, 24.0])
+        hours = self.history.query("temp", resolution=history.HOUR)
+        self.assertEqual(hours.times.tolist(), [START + 3600 * h for h in (2, 3, 4)])
+        self.assertEqual(hours.mins.tolist(), [12.0, 18.0, 24.0])
+        self.assertEqual(hours.means.tolist(), [14.5, 20.5, 24.0])
+
+    def test_picks_finest_resolution(self):
+        recent = self.history.query("temp", start=START + 600 * 22)
+        self.assertEqual(recent.times.tolist(), [START + 600 * s for s in (22, 23, 24)])
+        older = self.history.query("temp", start=START + 600 * 20)
+        self.assertEqual(older.means.tolist(), [20.0, 21.0, 22.0, 23.0, 24.0])
+        oldest = self.history.query("temp", start=START)
+        self.assertEqual(len(oldest.times), 3)
+
+    def test_unknown_key(self):
+        self.assertEqual(len(self.history.query("nope").times), 0)
+
+    def test_gaps(self):
+        self.history.record("temp", "unknown", when=START + 600 * 25)
+        raw = self.history.query("temp", resolution=history.RAW)
+        self.assertEqual(raw.means.tolist(), [22.0, 23.0, 24.0])
+
+    def test_save_and_load(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        path = os.path.join(tmp, "history.npz")
+        self.history.path = path
+        self.history.fetch()
+        self.assertTrue(os.path.exists(path))
+        loaded = history.History(raw_size=4, minutes=5, hours=2, path=path)
+        loaded.load()
+        for resolution in (history.RAW, history.MINUTE):
+            self.assertEqual(
+                loaded.query("temp", resolution=resolution).means.tolist(),
+                self.history.query("temp", resolution=resolution).means.tolist(),
+            )
+        hours = loaded.query("temp", resolution=history.HOUR)
+        self.assertEqual(hours.means.tolist(), [20.5, 24.0])
+        loaded.record("temp", 30, when=START + 600 * 26)
+        self.assertEqual(loaded.query("temp", resolution=history.HOUR).maxs[-1], 30.0)
+
+    def test_factory_attaches(self):
+        datasrc = data.InputData()
+        store = history.history_factory(
+            {
+                "history": {
+                    "keys": ["temp"],
+                    "raw_samples": 10,
+                    "minutes": 10,
+                    "hours": 10,
+                    "save_minutes": 10.0,
+                }
+            },
+            datasrc,
+        )
+        self.assertIs(datasrc.history, store)
+        self.assertIsNone(store.fetch_interval())
+        datasrc["temp"] = "12.5"
+        datasrc["other"] = "3"
+        self.assertEqual(store.query("temp").means.tolist(), [12.5])
+        self.assertEqual(store.keys(), ["temp"])
+        self.assertIsNone(history.history_factory({}, datasrc))
+
+
+if __name__ == "__main__":
+    unittest.main()
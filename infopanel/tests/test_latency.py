@@ -0,0 +1,216 @@
+"""
+End-to-end latency of MQTT commands.
+
+Commands are published on a :py:class:`~infopanel.tests.local_broker.LocalBroker`
+at a controlled rate while the real driver loop runs against a mock display. For
+each command we measure the time from publish until the driver state changes
+(mode, brightness, random, image path) and until the next frame is drawn after
+that. The cost of each ``Driver._check_for_command`` call is recorded too.
+
+Run this module directly for a report::
+
+    python -m infopanel.tests.test_latency --rate 100 --count 500
+
+The test only checks how long commands take to be drawn when the
+``INFOPANEL_TIMING_TESTS`` environment variable is set, since wall-clock
+bounds fail spuriously on busy machines.
+"""
+# pylint: disable=protected-access
+import argparse
+import os
+import threading
+import time
+import unittest
+
+from infopanel import driver, data, mqtt
+from infopanel.tests import MockDisplay, headless_config, sprite_types, use_sprite_types
+from infopanel.tests.local_broker import LocalBroker
+
+
+MQTT_CONF = {
+    "client_id": "latency",
+    "broker": "local",
+    "port": 1883,
+    "keepalive": 60,
+    "topic": "infopanel/#",
+}
+TIMING_TESTS = bool(os.environ.get("INFOPANEL_TIMING_TESTS"))
+
+
+class Probe(object):  # pylint: disable=too-few-public-methods
+    """One published command and when its effects showed up."""
+
+    def __init__(self, kind, value, check):
+        """Construct a probe."""
+        self.kind = kind
+        self.value = value
+        self.check = check
+        self.published = None
+        self.applied = None
+        self.drawn = None
+
+
+class LatencyBench(object):
+    """A panel wired to a local broker with its driver instrumented."""
+
+    def __init__(self):
+        """Build the panel."""
+        self.broker = LocalBroker()
+        self.data = data.InputData()
+        self.display = MockDisplay()
+        self.driver = driver.driver_factory(self.display, self.data, headless_config())
+        self.client = mqtt.MQTTClient(
+            self.data, MQTT_CONF, client_factory=self.broker.client_factory
+        )
+        self.probes = []
+        self.check_costs = []
+        self._instrument()
+
+    def _instrument(self):
+        """Wrap driver methods to timestamp state changes and frames."""
+        check_for_command = self.driver._check_for_command
+        draw_frame = self.driver.draw_frame
+
+        def timed_check():
+            start = time.perf_counter()
+            check_for_command()
+            now = time.perf_counter()
+            self.check_costs.append(now - start)
+            for probe in list(self.probes):
+                if probe.applied is None and probe.published and probe.check():
+                    probe.applied = now
+
+        def timed_draw():
+            draw_frame()
+            now = time.perf_counter()
+            for probe in list(self.probes):
+                if probe.applied is not None and probe.drawn is None:
+                    probe.drawn = now
+
+        self.driver._check_for_command = timed_check
+        self.driver.draw_frame = timed_draw
+
+    def commands(self):
+        """Cycle through commands that each change driver state."""
+        drv = self.driver
+        placard = drv.sprites["placard"][0]
+        while True:
+            for mode in ("traffic", "sign"):
+                yield "mode", mode, lambda m=mode: drv._mode == m
+            for level in ("40", "80"):
+                yield "brightness", level, lambda b=int(level): self.display.brightness == b
+            for flag in (driver.ON, driver.OFF):
+                yield "random", flag, lambda f=flag: drv._randomize_scenes == f
+            for path in ("one.png", "two.png"):
+                yield "image_path", "placard=" + path, lambda p=path: placard.path == p
+
+    def run(self, rate_hz, count, timeout=5.0):
+        """Publish ``count`` commands at ``rate_hz`` and collect the probes."""
+        self.client.start()
+        mqtt_client = self.broker.clients[0]
+        deadline = time.time() + timeout
+        while not mqtt_client.subscriptions and time.time() < deadline:
+            time.sleep(0.001)
+
+        runner = threading.Thread(target=self.driver.run)
+        runner.daemon = True
+        runner.start()
+        commands = self.commands()
+        try:
+            for _i in range(count):
+                kind, value, check = next(commands)
+                probe = Probe(kind, value, check)
+                self.probes.append(probe)
+                probe.published = time.perf_counter()
+                self.broker.publish("infopanel/" + kind, value)
+                time.sleep(1.0 / rate_hz)
+            deadline = time.time() + timeout
+            while time.time() < deadline and any(p.drawn is None for p in self.probes):
+                time.sleep(0.01)
+        finally:
+            self.driver.stop()
+            runner.join(timeout)
+            self.client.stop()
+        return self.probes
+
+
+def percentile(values, fraction):
+    """Get a percentile of some values without numpy."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def summarize(probes, check_costs):
+    """Get latency stats in milliseconds by command kind."""
+    report = {}
+    for kind in sorted({p.kind for p in probes}):
+        done = [p for p in probes if p.kind == kind and p.drawn is not None]
+        applied = [1000 * (p.applied - p.published) for p in done]
+        drawn = [1000 * (p.drawn - p.published) for p in done]
+        report[kind] = {
+            "sent": len([p for p in probes if p.kind == kind]),
+            "done": len(done),
+            "applied_mean": sum(applied) / len(applied) if applied else None,
+            "applied_p95": percentile(applied, 0.95) if applied else None,
+            "drawn_mean": sum(drawn) / len(drawn) if drawn else None,
+            "drawn_p95": percentile(drawn, 0.95) if drawn else None,
+        }
+    costs = [1e6 * c for c in check_costs]
+    report["_check_for_command"] = {
+        "calls": len(costs),
+        "mean_us": sum(costs) / len(costs) if costs else None,
+        "p95_us": percentile(costs, 0.95) if costs else None,
+        "max_us": max(costs) if costs else None,
+    }
+    return report
+
+
+class TestCommandLatency(unittest.TestCase):
+    """Make sure commands over MQTT get applied and drawn promptly."""
+
+    def _report(self):
+        use_sprite_types(self)
+        bench = LatencyBench()
+        probes = bench.run(rate_hz=50.0, count=16)
+        return probes, summarize(probes, bench.check_costs)
+
+    def test_latency(self):
+        """Make sure every command gets applied and then drawn."""
+        probes, report = self._report()
+        for kind in ("mode", "brightness", "random", "image_path"):
+            self.assertEqual(report[kind]["done"], report[kind]["sent"], kind)
+        for probe in probes:
+            self.assertGreaterEqual(probe.drawn, probe.applied)
+        self.assertGreater(report["_check_for_command"]["calls"], 0)
+
+    @unittest.skipUnless(TIMING_TESTS, "set INFOPANEL_TIMING_TESTS to check timing")
+    def test_drawn_promptly(self):
+        """Make sure commands are drawn within half a second."""
+        _probes, report = self._report()
+        for kind in ("mode", "brightness", "random", "image_path"):
+            self.assertLess(report[kind]["drawn_mean"], 500.0, kind)
+
+
+def main():
+    """Print a latency report."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rate", type=float, default=50.0, help="commands per second")
+    parser.add_argument("--count", type=int, default=200, help="commands to send")
+    args = parser.parse_args()
+    with sprite_types():
+        bench = LatencyBench()
+    probes = bench.run(args.rate, args.count)
+    for kind, stats in summarize(probes, bench.check_costs).items():
+        print(
+            "{:20s} ".format(kind)
+            + "  ".join(
+                "{}={}".format(name, "n/a" if val is None else "{:.2f}".format(val))
+                if isinstance(val, float) or val is None
+                else "{}={}".format(name, val)
+                for name, val in stats.items()
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,9 @@
 
 import unittest
 
-from infopanel import mqtt
+import voluptuous as vol
+
+from infopanel import config, mqtt, data
 from infopanel.tests import load_test_config
 
 
@@ -15,8 +17,7 @@ class TestMqtt(unittest.TestCase):
 
     def setUp(self):
         """Set up each test."""
-        data = {}
-        self.client = mqtt.MQTTClient(data, self.conf["mqtt"])
+        self.client = mqtt.MQTTClient({}, self.conf["mqtt"])
 
     @unittest.skip(
         "Something wrong with the test.mosquitto.org connection from travis ci"
@@ -31,6 +32,129 @@ class TestMqtt(unittest.TestCase):
         self.client.stop()
 
 
+class MockMQTTMsg(object):  # pylint: disable=too-few-public-methods
+    """A received message."""
+
+    def __init__(self, topic, payload):
+        self.topic = topic
+        self.payload = payload
+
+
+class TestRouting(unittest.TestCase):
+    """Test mapping topics into data keys."""
+
+    def setUp(self):
+        """Set up each test."""
+        self.conf = {
+            "topic": "house/screen/#",
+            "routes": [
+                {"topic": "house/kitchen/temp", "key": "kitchen_temp", "parser": "number"},
+                {"topic": "house/+/temp", "key": "other_temp", "parser": "number"},
+                {
+                    "topic": "weather/forecast",
+                    "key": "daily_high",
+                    "parser": "json",
+                    "path": "days.0.high",
+                },
+                {"topic": "power/meter", "key": "watts", "parser": "number"},
+                {"topic": "bridge/state", "parser": "batch", "path": "sensors"},
+            ],
+        }
+        self.data = {}
+        self.client = mqtt.MQTTClient(self.data, self.conf)
+
+    def _send(self, topic, payload):
+        self.client.on_message(None, None, MockMQTTMsg(topic, payload))
+
+    def test_same_last_segment(self):
+        """Make sure sensors with the same name under different prefixes don't collide."""
+        self._send("house/kitchen/temp", b"21.5")
+        self._send("house/garage/temp", b"4")
+        self.assertEqual(self.data["kitchen_temp"], 21.5)
+        self.assertEqual(self.data["other_temp"], 4.0)
+        self.assertNotIn("temp", self.data)
+
+    def test_nothing_to_subscribe(self):
+        """Make sure a config without topics doesn't subscribe to the whole broker."""
+        self.assertEqual(mqtt.routing_table_factory({}).subscriptions(), [])
+        conf = {"broker": "localhost", "client_id": "screen"}
+        with self.assertRaises(vol.Invalid):
+            config.MQTT(conf)
+        self.assertEqual(config.MQTT(dict(conf, topic="a/#"))["routes"], [])
+
+    def test_catch_all(self):
+        """Make sure the catch-all topic keys data by the last part of the topic."""
+        self._send("house/screen/mode", b"morning")
+        self._send("somewhere/else", b"ignored")
+        self.assertEqual(self.data, {"mode": "morning"})
+
+    def test_json_path(self):
+        """Make sure a value can be dug out of a JSON payload."""
+        self._send("weather/forecast", b'{"days": [{"high": 25.5}, {"high": 20}]}')
+        self.assertEqual(self.data["daily_high"], 25.5)
+        self._send("weather/forecast", b'{"days": []}')
+        self.assertIsNone(self.data["daily_high"])
+
+    def test_two_routes_one_topic(self):
+        """Make sure every route on a topic gets its key from each message."""
+        conf = {
+            "routes": [
+                {
+                    "topic": "weather/forecast",
+                    "key": "hi",
+                    "parser": "json",
+                    "path": "days.0.high",
+                },
+                {
+                    "topic": "weather/forecast",
+                    "key": "lo",
+                    "parser": "json",
+                    "path": "days.0.low",
+                },
+            ]
+        }
+        datasrc = data.InputData()
+        client = mqtt.MQTTClient(datasrc, conf, bound_keys={"lo"})
+        self.assertEqual(client.routes.subscriptions({"lo"}), ["weather/forecast"])
+        forecast = b'{"days": [{"high": 25, "low": 12}]}'
+        client.on_message(None, None, MockMQTTMsg("weather/forecast", forecast))
+        self.assertEqual(datasrc["hi"], 25)
+        self.assertEqual(datasrc["lo"], 12)
+
+    def test_subscribe_only_bound(self):
+        """Make sure routes into keys nothing displays are not subscribed."""
+        table = mqtt.routing_table_factory(self.conf)
+        topics = table.subscriptions({"kitchen_temp", "daily_high"})
+        self.assertEqual(
+            topics,
+            ["house/kitchen/temp", "weather/forecast", "bridge/state", "house/screen/#"],
+        )
+        self.assertEqual(len(table.subscriptions()), 6)
+
+    def test_batch(self):
+        """Make sure one batched message updates many keys at once."""
+        datasrc = data.InputData()
+        client = mqtt.MQTTClient(datasrc, self.conf)
+        before = datasrc.version("mode")
+        client.on_message(
+            None,
+            None,
+            MockMQTTMsg("bridge/state", b'{"sensors": {"temp": 4.5, "humidity": 80}}'),
+        )
+        self.assertEqual(datasrc["temp"], 4.5)
+        self.assertEqual(datasrc["humidity"], 80)
+        self.assertEqual(datasrc.version("mode"), before)
+        client.on_message(None, None, MockMQTTMsg("bridge/state", b"[1, 2]"))
+        self.assertEqual(datasrc["temp"], 4.5)
+
+    def test_topic_regex(self):
+        """Make sure wildcards match whole topic levels."""
+        self.assertTrue(mqtt.Route("a/#").matches("a"))
+        self.assertTrue(mqtt.Route("a/#").matches("a/b/c"))
+        self.assertFalse(mqtt.Route("a/#").matches("ab"))
+        self.assertFalse(mqtt.Route("a/+/c").matches("a/b/b/c"))
+
+
 if __name__ == "__main__":
     # import sys;sys.argv = ['', 'Test.testName']
     unittest.main()
@@ -0,0 +1,87 @@
+"""Tests for per-scene profiling."""
+# pylint: disable=missing-docstring
+import os
+import pstats
+import shutil
+import tempfile
+import time
+import unittest
+
+from infopanel import data, driver, profiling
+from infopanel.tests import MockDisplay, headless_config, use_sprite_types
+
+
+class TestSceneProfiler(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        use_sprite_types(self)
+        self.infopanel = driver.driver_factory(
+            MockDisplay(), data.InputData(), headless_config()
+        )
+        self.infopanel.data_source["mode"] = "both"
+        self.infopanel._check_for_command()  # pylint: disable=protected-access
+
+    def _draw(self, scene_name, frames):
+        # pylint: disable=protected-access
+        while self.infopanel.scene_name(self.infopanel.active_scene) != scene_name:
+            self.infopanel._change_scene()
+        for _i in range(frames):
+            self.infopanel.draw_frame()
+
+    def test_pstats_per_scene(self):
+        profiler = profiling.SceneProfiler(self.tmp, frames=3)
+        self.infopanel.start_profiling(profiler)
+        self._draw("traffic", 2)
+        self._draw("sign", 4)
+        self._draw("traffic", 2)
+        profiler.close()
+        names = sorted(os.path.basename(path) for path in profiler.written)
+        self.assertEqual(names, ["sign-3frames.pstats", "traffic-3frames.pstats"])
+        stats = pstats.Stats(os.path.join(self.tmp, "traffic-3frames.pstats"))
+        drawn = [func for func in stats.stats if func[2] == "render"]
+        self.assertTrue(drawn)
+        self.assertFalse(
+            [func for func in stats.stats if func[2] == "_render_frame"],
+            "the sign's sprite was counted against traffic",
+        )
+
+    def test_partial_profiles_written_on_close(self):
+        profiler = profiling.SceneProfiler(self.tmp, frames=100)
+        self.infopanel.start_profiling(profiler)
+        self._draw("sign", 5)
+        profiler.close()
+        self.assertEqual(
+            [os.path.basename(path) for path in profiler.written],
+            ["sign-5frames.pstats"],
+        )
+
+    def test_collapsed_stacks(self):
+        profiler = profiling.SceneProfiler(self.tmp, frames=10, fmt="collapsed")
+        self.infopanel.start_profiling(profiler)
+        sampler = profiler._profile("sign")  # pylint: disable=protected-access
+        sampler.interval_s = 0.001
+        self._draw("sign", 1)
+        deadline = time.time() + 2.0
+        while not sampler.counts and time.time() < deadline:
+            time.sleep(0.005)  # sampled in this very function
+        thread = sampler._thread  # pylint: disable=protected-access
+        self._draw("sign", 9)
+        self.assertFalse(thread.is_alive())  # stopped before writing
+        counts = dict(sampler.counts)
+        time.sleep(0.01)
+        self.assertEqual(sampler.counts, counts)
+        with open(profiler.written[0], encoding="utf-8") as collapsed:
+            lines = collapsed.read().splitlines()
+        self.assertTrue(lines)
+        stack, count = lines[0].rsplit(" ", 1)
+        self.assertIn("test_profiling.py:test_collapsed_stacks", stack)
+        self.assertGreater(int(count), 0)
+
+    def test_bad_format(self):
+        with self.assertRaises(ValueError):
+            profiling.SceneProfiler(self.tmp, fmt="svg")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+"""Tests for recording frames."""
+# pylint: disable=missing-docstring
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from infopanel import recording, clock
+from infopanel.tests import ManualClock
+
+
+class TestRecording(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.clock = ManualClock()
+        self.previous = clock.set_clock(self.clock)
+
+    def tearDown(self):
+        clock.set_clock(self.previous)
+        shutil.rmtree(self.tmp)
+
+    def _record(self, writer, frames=3):
+        screen = recording.RecordingDisplay(writer, 8, 4)
+        for i in range(frames):
+            screen.clear()
+            screen.set_pixel(i, 1, 255, 0, 10 * i)
+            screen.buffer()
+            self.clock.time += 0.25
+        screen.close()
+        return screen
+
+    def test_raw_round_trip(self):
+        path = os.path.join(self.tmp, "panel.raw")
+        self._record(recording.writer_factory(path))
+        frames = list(recording.read_raw(path))
+        self.assertEqual([stamp for stamp, _frame in frames], [0.0, 0.25, 0.5])
+        _stamp, last = frames[-1]
+        self.assertEqual(last.shape, (4, 8, 3))
+        self.assertEqual(last[1, 2].tolist(), [255, 0, 20])
+        self.assertEqual(int(last.sum()), 275)
+
+    def test_png_sequence(self):
+        path = os.path.join(self.tmp, "frames")
+        self._record(recording.writer_factory(path, "png"), frames=2)
+        with open(os.path.join(path, "frames.txt"), encoding="utf-8") as index:
+            lines = index.read().splitlines()
+        self.assertEqual(lines, ["0.000000 frame000001.png", "0.250000 frame000002.png"])
+        self.assertTrue(os.path.exists(os.path.join(path, "frame000002.png")))
+
+    def test_drops_when_behind(self):
+        class Stuck(object):
+            def __init__(self):
+                self.frames = 0
+                self.go = threading.Event()
+
+            def write(self, timestamp, frame):  # pylint: disable=unused-argument
+                self.go.wait()
+                self.frames += 1
+
+            def close(self):
+                pass
+
+        writer = Stuck()
+        screen = recording.RecordingDisplay(writer, 8, 4, max_pending=2)
+        for _i in range(10):
+            screen.buffer()
+        writer.go.set()
+        screen.close()
+        self.assertGreater(screen.dropped, 0)
+        self.assertEqual(writer.frames + screen.dropped, 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+"""Tests for the sprite and scene type registry."""
+# pylint: disable=missing-docstring
+import unittest
+
+import voluptuous as vol
+
+from infopanel import registry, sprites, config
+from infopanel.tests import MockDisplay, sprite_types
+
+
+class Pebble(sprites.Sprite):
+    """A plugin-style sprite defined outside of the sprites module."""
+
+
+class TestRegistry(unittest.TestCase):
+    def test_builtin_lookup(self):
+        self.assertIs(registry.SPRITES.get("Giraffe"), sprites.Giraffe)
+        self.assertIn("Temperature", registry.SPRITES.names())
+        self.assertIn("Giraffes", registry.SCENES)
+
+    def test_abstract_types_left_out(self):
+        self.assertIn("Sparkline", registry.SPRITES)
+        for name in ("Graph", "BaseImage"):
+            self.assertNotIn(name, registry.SPRITES)
+            with self.assertRaises(vol.Invalid):
+                config.SPRITE({"type": name})
+
+    def test_unknown_type(self):
+        self.assertNotIn("NotASprite", registry.SPRITES)
+        with self.assertRaises(KeyError):
+            registry.SPRITES.get("NotASprite")
+        with self.assertRaises(vol.Invalid):
+            config.SPRITE({"type": "NotASprite"})
+
+    def test_registered_sprite_in_factory(self):
+        types = registry.Registry(registry.SPRITE_GROUP, "infopanel.sprites")
+        types.register("Pebble", Pebble)
+        self.assertIs(types.get("Pebble"), Pebble)
+
+        with sprite_types(Pebble=Pebble):
+            built = sprites.sprite_factory(
+                {"rock": {"type": "Pebble"}}, None, MockDisplay()
+            )
+        self.assertIsInstance(built["rock"][0], Pebble)
+        self.assertNotIn("Pebble", registry.SPRITES)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+"""Tests for array text rendering."""
+# pylint: disable=missing-docstring
+import os
+import unittest
+
+from infopanel import display, fonts, render, sprites
+from infopanel.tests.test_fonts import FONT_DIR, PixelCollector
+
+
+class TestTextRenderer(unittest.TestCase):
+    def setUp(self):
+        self.atlas = fonts.load(os.path.join(FONT_DIR, "3x5.bdf"))
+        self.renderer = render.TextRenderer(max_runs=2)
+
+    def test_matches_glyph_pixels(self):
+        """Make sure arrays light the same pixels as drawing glyph by glyph."""
+        reference = PixelCollector()
+        width = reference.text(self.atlas, 3, 10, 255, 255, 255, "H,?H")
+        screen = display.ArrayDisplay(text_renderer=self.renderer)
+        self.assertEqual(screen.text(self.atlas, 3, 10, 0, 255, 0, "H,?H"), width)
+        ys, xs = screen.canvas[:, :, 1].nonzero()
+        self.assertEqual(set(zip(xs.tolist(), ys.tolist())), reference.pixels)
+
+    def test_cache(self):
+        first = self.renderer.render(self.atlas, "HH")
+        self.assertIs(self.renderer.render(self.atlas, "HH"), first)
+        self.assertEqual((self.renderer.hits, self.renderer.misses), (1, 1))
+        self.renderer.render(self.atlas, "H")
+        self.renderer.render(self.atlas, ",")
+        self.assertIsNot(self.renderer.render(self.atlas, "HH"), first)
+
+    def test_clipping(self):
+        screen = display.ArrayDisplay(8, 4, text_renderer=self.renderer)
+        self.assertEqual(screen.text(self.atlas, -2, 2, 9, 9, 9, "HH"), 8)
+        self.assertEqual(screen.text(self.atlas, 50, 50, 9, 9, 9, "H"), 4)
+        self.assertEqual(screen.canvas[0, 0].tolist(), [9, 9, 9])
+        screen.buffer()
+        screen.clear()
+        self.assertEqual(screen.frame[0, 0].tolist(), [9, 9, 9])
+        self.assertFalse(screen.canvas.any())
+
+
+class TestTicker(unittest.TestCase):
+    def setUp(self):
+        self.atlas = fonts.load(os.path.join(FONT_DIR, "3x5.bdf"))
+
+    def _sprite(self, cls):
+        sprite = cls(64, 32)
+        sprite.apply_config({"text": "H?", "x": -3, "y": 10, "vx": 0})
+        sprite.font = self.atlas
+        sprite.add("H,H", (255, 0, 0))
+        return sprite
+
+    def test_same_pixels_as_fancy_text(self):
+        for x in (-9, -3, 0, 55, 61):
+            with self.subTest(x=x):
+                screens = []
+                for cls in (sprites.FancyText, sprites.Ticker):
+                    sprite = self._sprite(cls)
+                    sprite.x = x
+                    screen = display.ArrayDisplay()
+                    self.assertEqual(sprite.render(screen), 18)
+                    screens.append(screen.canvas)
+                self.assertTrue((screens[0] == screens[1]).all())
+
+    def test_strip_reused_until_message_changes(self):
+        ticker = self._sprite(sprites.Ticker)
+        screen = display.ArrayDisplay()
+        ticker.render(screen)
+        strip = ticker._strip  # pylint: disable=protected-access
+        ticker.render(screen)
+        self.assertIs(ticker._strip, strip)  # pylint: disable=protected-access
+        ticker.add("H", (0, 0, 255))
+        self.assertEqual(ticker.render(screen), 22)
+        self.assertIsNot(ticker._strip, strip)  # pylint: disable=protected-access
+
+    def test_blit_window(self):
+        """Make sure the generic blit draws the same as the array one."""
+        strip = render.render_strip(self.atlas, [("HH", (1, 2, 3)), ("H", (4, 5, 6))])
+        screen = display.ArrayDisplay(8, 8)
+        screen.blit(strip, -3, 1)
+        generic = display.ArrayDisplay(8, 8)
+        display.Display.blit(generic, strip, -3, 1)
+        self.assertTrue((screen.canvas == generic.canvas).all())
+        self.assertEqual(screen.canvas[1, 1].tolist(), [1, 2, 3])
+        self.assertEqual(screen.canvas[1, 5].tolist(), [4, 5, 6])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -26,6 +26,15 @@ class TestScenes(unittest.TestCase):
         self.assertEqual(scene.sprites[0].x, 0)
         self.assertEqual(scene.sprites[0].max_x, 64)
 
+    def test_frame_rate(self):
+        """Make sure static scenes ask for few frames and moving ones for many."""
+        scene = self.scenes["traffic"]
+        self.assertEqual(scene.frame_rate(), sprites.STATIC_FRAME_RATE)
+        scene.sprites[0].vx = -60.0
+        self.assertEqual(scene.frame_rate(), sprites.MAX_FRAME_RATE)
+        scene.fixed_frame_rate = 5.0
+        self.assertEqual(scene.frame_rate(), 5.0)
+
     def test_all(self):
         """Test all configured sprites."""
         existing_sprites = sprites.sprite_factory(
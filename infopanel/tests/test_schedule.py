@@ -0,0 +1,152 @@
+"""Tests for time-of-day mode schedules."""
+# pylint: disable=missing-docstring
+import datetime
+import os
+import time
+import unittest
+
+import voluptuous as vol
+
+from infopanel import clock, config, data, driver, schedule, simulation
+from infopanel.tests import MockDisplay, headless_config, use_sprite_types
+
+HOUR = 3600
+
+
+def _schedule():
+    return schedule.Schedule(
+        [
+            schedule.Window("22:00", "07:00", "blank"),
+            schedule.Window("06:00", "09:00", "sign", brightness=40),
+            schedule.Window("12:00", "13:00", "traffic"),
+            schedule.Window("13:00", "14:00", "traffic"),
+        ],
+        "both",
+    )
+
+
+class TestSchedule(unittest.TestCase):
+    def _use_timezone(self, zone):
+        previous = os.environ.get("TZ")
+        os.environ["TZ"] = zone
+        time.tzset()
+
+        def restore():
+            if previous is None:
+                del os.environ["TZ"]
+            else:
+                os.environ["TZ"] = previous
+            time.tzset()
+
+        self.addCleanup(restore)
+
+    def test_parse_time(self):
+        self.assertEqual(schedule.parse_time("07:30"), 7 * HOUR + 1800)
+        self.assertEqual(schedule.parse_time("23:59:59"), schedule.DAY_S - 1)
+        for bad in ("7", "24:00", "07:60", "noon"):
+            with self.assertRaises(ValueError):
+                schedule.parse_time(bad)
+
+    def test_transitions(self):
+        self.assertEqual(
+            [tuple(transition) for transition in _schedule().transitions],
+            [
+                (6 * HOUR, "sign", 40),  # the later window wins
+                (9 * HOUR, "both", None),
+                (12 * HOUR, "traffic", None),  # back-to-back windows merge
+                (14 * HOUR, "both", None),
+                (22 * HOUR, "blank", None),
+            ],
+        )
+
+    def test_state_at(self):
+        daily = _schedule()
+        self.assertEqual(daily.state_at(2 * HOUR).mode, "blank")  # after midnight
+        self.assertEqual(daily.state_at(6 * HOUR).mode, "sign")
+        self.assertEqual(daily.state_at(10 * HOUR).mode, "both")
+        self.assertIsNone(schedule.Schedule([], "both").state_at(0))
+
+    def test_next_due(self):
+        self._use_timezone("UTC")
+        daily = _schedule()
+        six = datetime.datetime(2026, 1, 5, 6).timestamp()
+        self.assertEqual(daily.next_due(six), six + 3 * HOUR)
+        self.assertEqual(daily.next_due(six + 17 * HOUR), six + 24 * HOUR)
+        self.assertEqual(schedule.Schedule([], "both").next_due(six), float("inf"))
+
+    def test_next_due_across_dst(self):
+        self._use_timezone("America/New_York")
+        daily = _schedule()
+        # clocks go forward an hour at 02:00 on March 8, 2026, so from 23:00
+        # the day before, the 06:00 transition is 6 hours away rather than 7.
+        evening = datetime.datetime(2026, 3, 7, 23).timestamp()
+        self.assertEqual(daily.next_due(evening), evening + 6 * HOUR)
+        # and they go back at 02:00 on November 1.
+        evening = datetime.datetime(2026, 10, 31, 23).timestamp()
+        self.assertEqual(daily.next_due(evening), evening + 8 * HOUR)
+
+    def test_driver_follows_dst(self):
+        self._use_timezone("America/New_York")
+        use_sprite_types(self)
+        conf = headless_config()
+        conf["schedule"] = [{"start": "07:00", "end": "08:00", "mode": "sign"}]
+        panel = driver.driver_factory(MockDisplay(), data.InputData(), conf)
+        sim = clock.SimulatedClock(
+            wall_start=datetime.datetime(2026, 3, 7, 21).timestamp()
+        )
+        self.addCleanup(clock.set_clock, clock.set_clock(sim))
+        panel.start_schedule(panel.schedule)
+        # 07:00 comes 9 hours later, not 10, since an hour is skipped overnight.
+        sim.sleep(9 * HOUR - 1)
+        self.assertFalse(panel._check_schedule())  # pylint: disable=protected-access
+        sim.sleep(1)
+        self.assertTrue(panel._check_schedule())  # pylint: disable=protected-access
+        self.assertEqual(panel.data_source["mode"], "sign")
+
+    def test_config(self):
+        conf = {"schedule": [{"start": "22:00", "end": "06:30", "mode": "blank"}]}
+        self.assertEqual(config.SCHEDULE(conf["schedule"])[0]["mode"], "blank")
+        with self.assertRaises(vol.Invalid):
+            config.SCHEDULE([{"start": "25:00", "end": "06:30", "mode": "blank"}])
+        conf["global"] = {}
+        daily = schedule.schedule_factory(conf)
+        self.assertEqual(daily.transitions[0].mode, "all")
+        self.assertIsNone(schedule.schedule_factory({"global": {}}))
+
+    def test_driver_follows_schedule(self):
+        self._use_timezone("UTC")  # no clock changes tonight
+        use_sprite_types(self)
+        conf = headless_config()
+        conf["schedule"] = [
+            {"start": "22:00", "end": "07:00", "mode": "blank"},
+            {"start": "07:00", "end": "08:00", "mode": "sign", "brightness": 40},
+        ]
+        report = simulation.simulate(
+            conf, 12 * HOUR, draw=False, time_of_day=21 * HOUR
+        )
+        scenes = report.scenes()
+        self.assertAlmostEqual(scenes["blank"].dwell_s, 9 * HOUR, delta=2)
+        self.assertAlmostEqual(scenes["sign"].dwell_s, 2 * HOUR, delta=20)
+        self.assertEqual(scenes["blank"].visits, 1)
+        blank_at = [when for when, name in report.transitions if name == "blank"]
+        self.assertAlmostEqual(blank_at[0], HOUR, delta=1)
+
+    def test_command_overrides_until_next_transition(self):
+        self._use_timezone("UTC")  # no clock changes tonight
+        use_sprite_types(self)
+        conf = headless_config()
+        conf["schedule"] = [{"start": "07:00", "end": "08:00", "mode": "sign"}]
+        report = simulation.simulate(
+            conf,
+            HOUR,
+            [(600, "mode", "traffic")],
+            draw=False,
+            time_of_day=7 * HOUR + 600,  # 07:10
+        )
+        (start, first), (command, second), (end, _third) = report.transitions[:3]
+        self.assertEqual((start, first, second), (0.0, "sign", "traffic"))
+        self.assertAlmostEqual(command, 600, delta=1)
+        self.assertAlmostEqual(end, 50 * 60, delta=6)  # "both" from 08:00
+
+if __name__ == "__main__":
+    unittest.main()
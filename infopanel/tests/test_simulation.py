@@ -0,0 +1,103 @@
+"""Tests for fast-forward simulation of scene timing."""
+# pylint: disable=missing-docstring
+import time
+import unittest
+
+from infopanel import clock, data, display, driver, simulation
+from infopanel.tests import headless_config, use_sprite_types
+
+
+class TestSimulatedClock(unittest.TestCase):
+    def test_sleep_runs_events(self):
+        sim = clock.SimulatedClock(10.0)
+        seen = []
+        sim.at(12.0, lambda: seen.append(sim.now()))
+        sim.at(11.0, lambda: seen.append(sim.now()))
+        sim.sleep(1.5)
+        self.assertEqual(seen, [11.0])
+        self.assertEqual(sim.now(), 11.5)
+        sim.sleep(1.0)
+        self.assertEqual(seen, [11.0, 12.0])
+
+    def test_wait_for_change(self):
+        sim = clock.SimulatedClock()
+        datasrc = data.InputData()
+        version = datasrc.latest_version()
+        self.assertFalse(sim.wait_for_change(datasrc, version, 5.0))
+        self.assertEqual(sim.now(), 5.0)
+        sim.at(7.0, lambda: datasrc.__setitem__("mode", "night"))
+        self.assertTrue(sim.wait_for_change(datasrc, version, 5.0))
+        self.assertEqual(sim.now(), 7.0)
+
+    def test_data_goes_stale(self):
+        sim = clock.SimulatedClock(wall_start=1000.0)
+        previous = clock.set_clock(sim)
+        self.addCleanup(clock.set_clock, previous)
+        datasrc = data.InputData(ttl=60.0)
+        datasrc["temp"] = "12"
+        self.assertEqual(datasrc.updated("temp"), 1000.0)
+        self.assertFalse(datasrc.is_stale("temp"))
+        sim.sleep(61.0)
+        self.assertTrue(datasrc.is_stale("temp"))
+
+
+class TestSimulation(unittest.TestCase):
+    def setUp(self):
+        use_sprite_types(self)
+        self.conf = headless_config()
+
+    def test_scene_dwell_times(self):
+        start = time.time()
+        report = simulation.simulate(self.conf, 3600.0, seed=2, draw=False)
+        self.assertLess(time.time() - start, 30.0)
+        scenes = report.scenes()
+        self.assertEqual(set(scenes), {"traffic", "sign"})
+        for name in scenes:
+            self.assertAlmostEqual(scenes[name].dwell_s, 1800.0, delta=20.0)
+        # the sign moves at 60 pixels/s; traffic just sits there.
+        self.assertAlmostEqual(scenes["sign"].frames / scenes["sign"].dwell_s, 60, delta=3)
+        self.assertLess(scenes["traffic"].frames / scenes["traffic"].dwell_s, 2)
+
+    def test_commands(self):
+        commands = [(60.0, "mode", "blank"), (90.0, "mode", "sign")]
+        report = simulation.simulate(self.conf, 120.0, commands, seed=2)
+        scenes = report.scenes()
+        self.assertAlmostEqual(scenes["blank"].dwell_s, 30.0, delta=0.1)
+        self.assertEqual(scenes["blank"].frames, 0)
+        self.assertEqual(report.transitions[-1][1], "sign")
+        self.assertAlmostEqual(report.transitions[-1][0], 90.0, delta=0.1)
+        self.assertIn("blank", str(report))
+
+    def test_unshown_data_doesnt_redraw(self):
+        def flood(key):
+            commands = [(0.0, "mode", "traffic")]
+            commands.extend((0.1 * i, key, str(i)) for i in range(1, 600))
+            report = simulation.simulate(headless_config(), 60.0, commands, draw=False)
+            stats = report.scenes()["traffic"]
+            return stats.frames / stats.dwell_s
+
+        self.assertLess(flood("somebody_elses_data"), 2)
+        self.assertGreater(flood("travel_time_i90"), 8)
+
+    def test_run_again(self):
+        infopanel = driver.driver_factory(
+            display.ArrayDisplay(64, 32), data.InputData(), self.conf
+        )
+        sim = simulation.Simulation(infopanel, draw=False)
+        sim.run(60.0)
+        report = sim.run(60.0)
+        self.assertGreaterEqual(sim.clock.now(), 120.0)
+        dwell = sum(stats.dwell_s for stats in report.scenes().values())
+        self.assertAlmostEqual(dwell, 60.0)
+        self.assertGreater(sum(report.frames.values()), 60)
+
+    def test_random_is_repeatable(self):
+        commands = [(1.0, "random", "1")]
+        first = simulation.simulate(headless_config(), 300.0, commands, seed=5)
+        again = simulation.simulate(headless_config(), 300.0, commands, seed=5)
+        self.assertEqual(first.transitions, again.transitions)
+        self.assertGreater(len(first.transitions), 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,8 +2,8 @@
 # pylint: disable=missing-docstring
 import unittest
 
-from infopanel import sprites, data
-from infopanel.tests import load_test_config, MockDisplay
+from infopanel import sprites, data, clock
+from infopanel.tests import load_test_config, MockDisplay, ManualClock
 
 
 class TestSprite(unittest.TestCase):
@@ -23,6 +23,42 @@ class TestSprite(unittest.TestCase):
         self.sprites["I90"][0].data_source["travel_time_i90"] = 11.0
         self.assertEqual(self.sprites["I90"][0].value(), 11.0)
 
+    def test_reads_frame_snapshot(self):
+        sprite = self.sprites["I90"][0]
+        sprite.data_source.begin_frame()
+        sprite.data_source["travel_time_i90"] = 11.0
+        self.assertEqual(sprite.value(), 10.0)
+        sprite.data_source.begin_frame()
+        self.assertEqual(sprite.value(), 11.0)
+
+    def test_converts_only_on_change(self):
+        sprite = self.sprites["I90"][0]
+        conversions = []
+        convert = sprite._convert_data  # pylint: disable=protected-access
+
+        def counting_convert(val):
+            conversions.append(val)
+            return convert(val)
+
+        sprite._convert_data = counting_convert  # pylint: disable=protected-access
+        display = MockDisplay()
+        display.text = lambda *args: 5
+        sprite.data_source["travel_time_i90"] = "15"
+        for _i in range(5):
+            sprite.render(display)
+        self.assertEqual(conversions, ["15"])
+        self.assertEqual(sprite.last_val, 15)
+
+    def test_stale_value(self):
+        sprite = self.sprites["I90"][0]
+        display = MockDisplay()
+        display.text = lambda *args: 5
+        sprite.data_source.ttl = -1.0  # everything set from now on is stale
+        sprite.data_source["travel_time_i90"] = "15"
+        sprite.render(display)
+        self.assertIsNone(sprite.last_val)
+        self.assertEqual(sprite._text[-1][0], "N/A")  # pylint: disable=protected-access
+
 
 class TestTemperature(unittest.TestCase):
     def setUp(self):
@@ -42,6 +78,121 @@ class TestTemperature(unittest.TestCase):
         self.assertEqual(len(temp.frames[0][0]), 0)
 
 
+class TestAnimationTiming(unittest.TestCase):
+    def setUp(self):
+        self.clock = ManualClock()
+        self.previous = clock.set_clock(self.clock)
+        self.sprite = sprites.Sprite(64, 32)
+        self.sprite.apply_config({"vx": 60, "frames": ["1"]})
+        self.display = MockDisplay()
+
+    def tearDown(self):
+        clock.set_clock(self.previous)
+
+    def test_motion_independent_of_frame_rate(self):
+        """Make sure drawing more often doesn't make things move faster."""
+        self.sprite.render(self.display)  # first tick
+        start = self.sprite.x
+        for _i in range(32):
+            self.clock.time += 1.0 / 32
+            self.sprite.render(self.display)
+        fast = self.sprite.x - start
+
+        self.sprite.x = start
+        for _i in range(2):
+            self.clock.time += 0.5
+            self.sprite.render(self.display)
+        self.assertEqual(self.sprite.x - start, fast)
+        self.assertEqual(fast, 60)
+
+    def test_subpixel_motion(self):
+        """Make sure slow sprites still move when frames come faster than pixels."""
+        self.sprite.vx = 10.0
+        self.sprite.render(self.display)
+        start = self.sprite.x
+        for _i in range(64):
+            self.clock.time += 1.0 / 64
+            self.sprite.render(self.display)
+        self.assertEqual(self.sprite.x - start, 10)
+
+    def test_animation_frames(self):
+        sprite = sprites.Sprite(64, 32)
+        sprite.apply_config({"frames": ["1", "0"], "frame_rate": 4})
+        sprite.render(self.display)
+        seen = []
+        for _i in range(8):
+            self.clock.time += 0.125
+            sprite.render(self.display)
+            seen.append(sprite._frame_num)  # pylint: disable=protected-access
+        self.assertEqual(seen, [0, 1, 1, 0, 0, 1, 1, 0])
+
+    def test_frame_rates(self):
+        self.assertEqual(self.sprite.needed_frame_rate(), 60)
+        self.sprite.vx = 15.0
+        self.assertEqual(self.sprite.needed_frame_rate(), 15)
+        self.sprite.vx = 0.0
+        self.assertEqual(self.sprite.needed_frame_rate(), sprites.STATIC_FRAME_RATE)
+
+    def test_ticks_to_seconds(self):
+        """Make sure tick-based speeds from older configs still work."""
+        sprite = sprites.Sprite(64, 32)
+        sprite.apply_config(
+            {"dx": -1, "ticks_per_movement": 2, "ticks_per_frame": 3, "frames": ["1"]}
+        )
+        self.assertEqual(sprite.vx, -sprites.TICKS_PER_SECOND / 2)
+        self.assertEqual(sprite.vy, 0.0)
+        self.assertEqual(sprite.frame_rate, sprites.TICKS_PER_SECOND / 3)
+        # the same ticks_per_movement in a scene keeps the same speed.
+        self.assertEqual(
+            sprites.ticks_to_seconds({"ticks_per_movement": 2}, sprite),
+            {"ticks_per_movement": 2, "vx": -sprites.TICKS_PER_SECOND / 2, "vy": 0.0},
+        )
+        # and twice as many ticks per move makes it half as fast.
+        self.assertEqual(
+            sprites.ticks_to_seconds({"ticks_per_movement": 4}, sprite)["vx"],
+            -sprites.TICKS_PER_SECOND / 4,
+        )
+
+
+class TestLitPixels(unittest.TestCase):
+    def test_one_call_per_color(self):
+        sprite = sprites.Sprite(64, 32)
+        sprite.apply_config(
+            {
+                "frames": ["120 001", "000 222"],
+                "pallete": {1: [1, 1, 1], 2: [2, 2, 2]},
+                "x": 10,
+                "y": 5,
+            }
+        )
+        calls = []
+        display = MockDisplay()
+        display.set_pixels = lambda *args: calls.append(args)
+        sprite.render(display)
+        self.assertEqual(
+            sorted(calls),
+            [((0, 2), (0, 1), [1, 1, 1], 10, 5), ((1,), (0,), [2, 2, 2], 10, 5)],
+        )
+        sprite.flip_horizontal()
+        calls[:] = []
+        sprite.render(display)
+        self.assertIn(((2, 0), (0, 1), [1, 1, 1], 10, 5), calls)
+
+
+class TestCulling(unittest.TestCase):
+    def test_off_screen_skipped(self):
+        sprite = sprites.Sprite(64, 32)
+        sprite.apply_config({"frames": ["11 11"], "x": -10, "y": 5})
+        display = MockDisplay()
+        display.set_pixels = lambda *args: self.fail("drew an off-screen sprite")
+        sprite.render(display)
+        self.assertEqual(display.stats["sprites_culled"], 1)
+        sprite.x = 63
+        del display.set_pixels
+        sprite.render(display)
+        self.assertEqual(display.stats["sprites_drawn"], 1)
+
+
 def build_test_sprites():
     # pylint:disable=invalid-name
     DURATION_CONFIG = {
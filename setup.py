@@ -6,7 +6,8 @@ with open('README.rst') as f:
 required = ['Pillow>=3.1.2',
             'voluptuous>=0.9.3',
             'PyYAML>=3.11',
-            'matplotlib>=1.0',
+            'matplotlib>=3.5',
+            'numpy>=1.17',
             'paho-mqtt',
             'pytest',
             'pydocstyle']